@@ -0,0 +1,440 @@
+"""Column-wise screening of whole applicant files.
+
+``evaluate_rules`` walks every rule for one form. ``screen_batch`` takes many
+forms at once - a pandas ``DataFrame``, a dict of equal-length columns or a list
+of dicts - and translates each condition of ``rule_based_screening_rules.json``
+into NumPy operations over columns:
+
+* comparisons ``< <= > >= == !=`` between field names and constants;
+* ``in`` / ``not in`` against a literal list, tuple or set, or a field;
+* ``is None`` / ``is not None``;
+* ``and`` / ``or`` / ``not`` and bare names (truthiness);
+* ``matches_regex(field, r'...')`` - the pattern runs once per distinct value.
+
+Outcomes are exactly those of ``evaluate_rules``. A comparison that would
+raise for a row (``None < 18``, ``"23" < 18``) makes the rule not fire for that
+row, and a rule whose inputs are all absent takes its precomputed outcome.
+Rules using anything else (other calls, arithmetic, chained comparisons) are
+evaluated row by row with the compiled rule, as are rows whose values are not
+plain numbers, strings, ``None`` or containers. Only those rules and rows
+take the slow path.
+"""
+from __future__ import annotations
+
+import ast
+import re
+from itertools import chain, repeat
+from operator import is_, is_not
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.validators import SAFE_GLOBALS, CompiledRule, CompiledRuleset, load_ruleset
+
+_ABSENT = object()
+_NUM, _STR, _NONE, _SEQ, _OTHER = range(5)
+_KINDS = {bool: _NUM, int: _NUM, float: _NUM, str: _STR, type(None): _NONE,
+          list: _SEQ, tuple: _SEQ, set: _SEQ, frozenset: _SEQ, dict: _SEQ}
+_ORDER = {ast.Lt: "__lt__", ast.LtE: "__le__", ast.Gt: "__gt__", ast.GtE: "__ge__"}
+_LITERALS = (ast.List, ast.Tuple, ast.Set)
+
+
+class _Unsupported(Exception):
+    """The condition uses syntax this module does not vectorise."""
+
+
+def _kind(cls: type) -> int:
+    kind = _KINDS.get(cls)
+    if kind is None:
+        if issubclass(cls, str):
+            kind = _STR
+        elif issubclass(cls, (bool, int, float, np.bool_, np.integer, np.floating)):
+            kind = _NUM
+        else:
+            kind = _OTHER
+        _KINDS[cls] = kind  # subclasses such as np.float64 / np.str_
+    return kind
+
+
+class _Column:
+    """Object values of one field plus a mask per value kind."""
+
+    __slots__ = ("values", "absent", "num", "str", "none", "seq", "other")
+
+    def __init__(self, values: np.ndarray, absent: Optional[np.ndarray] = None) -> None:
+        n = len(values)
+        self.absent = absent if absent is not None else np.zeros(n, dtype=bool)
+        if values.dtype.kind in "biufU":
+            kinds = np.full(n, _STR if values.dtype.kind == "U" else _NUM, dtype=np.int8)
+        else:
+            types = list(map(type, values))
+            for cls in set(types).difference(_KINDS):
+                _kind(cls)
+            kinds = np.fromiter(map(_KINDS.__getitem__, types), dtype=np.int8, count=n)
+        self.values = values if values.dtype == object else values.astype(object)
+        self.num, self.str = kinds == _NUM, kinds == _STR
+        self.none, self.seq, self.other = kinds == _NONE, kinds == _SEQ, kinds == _OTHER
+
+    @classmethod
+    def constant(cls, value: Any, n: int) -> "_Column":
+        values = np.empty(n, dtype=object)
+        values.fill(value)
+        col = cls.__new__(cls)
+        kind = _kind(type(value))
+        col.values, col.absent = values, np.zeros(n, dtype=bool)
+        col.num, col.str, col.none, col.seq, col.other = (
+            np.full(n, kind == k) for k in (_NUM, _STR, _NONE, _SEQ, _OTHER))
+        return col
+
+    @classmethod
+    def with_absent(cls, values: np.ndarray) -> "_Column":
+        """Column from values where ``_ABSENT`` marks a missing key."""
+        absent = np.fromiter(map(is_, values, repeat(_ABSENT)), dtype=bool, count=len(values))
+        values[absent] = None
+        return cls(values, absent)
+
+
+def _object_array(values: Iterable[Any], n: int) -> np.ndarray:
+    # fromiter keeps list/tuple values as single elements (no broadcasting).
+    return np.fromiter(values, dtype=object, count=n)
+
+
+class _Columns:
+    """The fields the rules read, resolved like ``CompiledRuleset.lookup``:
+    a lower-cased key wins over an exact one, the last such key over earlier ones."""
+
+    def __init__(self, data: Any, names: Iterable[str]) -> None:
+        self.by_name: Dict[str, _Column] = {}
+        self._constants: Dict[Tuple[str, Any], _Column] = {}
+        rows: Optional[List[Dict[str, Any]]] = None
+        if hasattr(data, "columns") and hasattr(data, "to_numpy"):  # pandas DataFrame
+            self.n = len(data)
+            keys = list(data.columns)
+            get = lambda key: _Column(data[key].to_numpy())  # noqa: E731
+        elif isinstance(data, dict):
+            lengths = {len(v) for v in data.values()}
+            if len(lengths) > 1:
+                raise ValueError("columns must have equal length")
+            self.n = lengths.pop() if lengths else 0
+            keys = list(data)
+            get = lambda key: _Column(self._array(data[key]))  # noqa: E731
+        else:
+            rows = data if isinstance(data, list) else list(data)
+            self.n = len(rows)
+            keys = list(dict.fromkeys(chain.from_iterable(rows)))
+            get = lambda key: _Column.with_absent(  # noqa: E731
+                _object_array(map(dict.get, rows, repeat(key), repeat(_ABSENT)), self.n))
+
+        for name in names:
+            candidates = [k for k in keys if isinstance(k, str) and k.lower() == name] or \
+                [k for k in keys if k == name]
+            if not candidates:
+                continue
+            if len(candidates) == 1 or rows is None:
+                # columns share one key order: the last candidate wins everywhere
+                self.by_name[name] = get(candidates[-1])
+            else:
+                self.by_name[name] = self._resolved(rows, candidates)
+
+    def _array(self, column: Any) -> np.ndarray:
+        if isinstance(column, np.ndarray):
+            return column
+        if hasattr(column, "to_numpy"):  # pandas Series
+            return column.to_numpy()
+        return _object_array(column, self.n)
+
+    def _resolved(self, rows: List[Dict[str, Any]], candidates: List[str]) -> _Column:
+        """Several keys lower to one name (``Age`` and ``age``) and rows may
+        order them differently: the key inserted last in each row wins."""
+        columns = [_object_array(map(dict.get, rows, repeat(k), repeat(_ABSENT)), self.n)
+                   for k in candidates]
+        present = [np.fromiter(map(is_not, c, repeat(_ABSENT)), dtype=bool, count=self.n)
+                   for c in columns]
+        values = np.empty(self.n, dtype=object)
+        values.fill(_ABSENT)
+        for column, mask in zip(columns, present):
+            values[mask] = column[mask]
+        wanted = set(candidates)
+        for i in np.flatnonzero(np.sum(present, axis=0) > 1):
+            values[i] = rows[i][[k for k in rows[i] if k in wanted][-1]]
+        return _Column.with_absent(values)
+
+    def operand(self, node: ast.AST) -> _Column:
+        if isinstance(node, ast.Name):
+            col = self.by_name.get(node.id)
+            return col if col is not None else self._constant(None)
+        return self._constant(_literal(node))
+
+    def _constant(self, value: Any) -> _Column:
+        key = (type(value).__name__, value if not isinstance(value, (list, dict, set)) else repr(value))
+        col = self._constants.get(key)
+        if col is None:
+            col = self._constants[key] = _Column.constant(value, self.n)
+        return col
+
+    def lookup(self, i: int, names: Iterable[str]) -> Dict[str, Any]:
+        """Row ``i`` as ``CompiledRule.fires`` expects it (absent names left out)."""
+        out = {}
+        for name in names:
+            col = self.by_name.get(name)
+            if col is not None and not col.absent[i]:
+                out[name] = col.values[i]
+        return out
+
+
+def _literal(node: ast.AST) -> Any:
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, _LITERALS) and all(isinstance(e, ast.Constant) for e in node.elts):
+        values = [e.value for e in node.elts]
+        return set(values) if isinstance(node, ast.Set) else tuple(values) if isinstance(node, ast.Tuple) else values
+    raise _Unsupported(ast.dump(node))
+
+
+def _check(node: ast.AST) -> None:
+    """Raise :class:`_Unsupported` unless :func:`_evaluate` can vectorise ``node``."""
+    if isinstance(node, ast.BoolOp):
+        for value in node.values:
+            _check(value)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        _check(node.operand)
+    elif isinstance(node, ast.Compare):
+        if len(node.ops) != 1:
+            raise _Unsupported("chained comparison")
+        left, right, op = node.left, node.comparators[0], node.ops[0]
+        for side in (left, right):
+            if not isinstance(side, ast.Name):
+                _literal(side)
+        if isinstance(op, (ast.Is, ast.IsNot)):
+            if not any(isinstance(s, ast.Constant) and s.value is None for s in (left, right)):
+                raise _Unsupported("'is' other than 'is None'")
+        elif not isinstance(op, (ast.Eq, ast.NotEq, ast.In, ast.NotIn) + tuple(_ORDER)):
+            raise _Unsupported(type(op).__name__)
+    elif isinstance(node, ast.Call):
+        if not (isinstance(node.func, ast.Name) and node.func.id == "matches_regex"
+                and len(node.args) == 2 and not node.keywords
+                and isinstance(node.args[0], (ast.Name, ast.Constant))
+                and isinstance(node.args[1], ast.Constant) and isinstance(node.args[1].value, str)):
+            raise _Unsupported("call")
+    elif not isinstance(node, (ast.Name, ast.Constant)):
+        raise _Unsupported(type(node).__name__)
+
+
+# A vectorised sub-expression: (truthy, raised, needs per-row evaluation)
+Masks = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _truthiness(col: _Column, n: int) -> Masks:
+    truth = np.zeros(n, dtype=bool)
+    for mask, empty in ((col.num, 0), (col.str, "")):
+        if mask.any():
+            truth[mask] = col.values[mask] != empty
+    if col.seq.any():
+        truth[col.seq] = np.fromiter((bool(v) for v in col.values[col.seq]), dtype=bool)
+    return truth, np.zeros(n, dtype=bool), col.other.copy()
+
+
+def _compare(node: ast.Compare, cols: _Columns) -> Masks:
+    n = cols.n
+    left, right, op = node.left, node.comparators[0], node.ops[0]
+    a, b = cols.operand(left), cols.operand(right)
+    truth, err = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+
+    if isinstance(op, (ast.Is, ast.IsNot)):
+        other = a if isinstance(right, ast.Constant) and right.value is None else b
+        truth = other.none.copy() if isinstance(op, ast.Is) else ~other.none
+        return truth, err, np.zeros(n, dtype=bool)
+
+    if isinstance(op, (ast.Eq, ast.NotEq)):
+        fb = a.other | b.other
+        ok = ~fb
+        if ok.any():
+            equal = np.asarray(a.values[ok] == b.values[ok], dtype=bool)
+            truth[ok] = equal if isinstance(op, ast.Eq) else ~equal
+        return truth, err, fb
+
+    if type(op) in _ORDER:
+        valid = (a.num & b.num) | (a.str & b.str)
+        fb = a.other | b.other | (a.seq & b.seq)
+        err = ~valid & ~fb
+        if valid.any():
+            with np.errstate(invalid="ignore"):  # NaN orders False, as in Python
+                truth[valid] = np.asarray(getattr(a.values[valid], _ORDER[type(op)])(b.values[valid]), dtype=bool)
+        return truth, err, fb
+
+    # in / not in
+    if isinstance(right, _LITERALS):
+        container = _literal(right)
+        fb = a.other.copy()
+        if isinstance(container, set):
+            err = a.seq & ~np.fromiter((isinstance(v, tuple) for v in a.values), dtype=bool, count=n)
+            fb |= a.seq & ~err  # tuples: hashable only if their items are
+        ok = ~fb & ~err
+        for item in container:
+            truth[ok] |= np.asarray(a.values[ok] == item, dtype=bool)
+    elif isinstance(right, ast.Constant):
+        if isinstance(right.value, str):
+            fb = a.str | a.other  # substring test, row by row
+            err = ~fb
+        else:
+            fb = np.zeros(n, dtype=bool)
+            err = np.ones(n, dtype=bool)  # 'in' on a non-container raises
+    else:
+        err = b.none | b.num
+        fb = ~err
+        ok = np.zeros(n, dtype=bool)
+    if isinstance(op, ast.NotIn):
+        truth = ~truth & ~err & ~fb
+    return truth, err, fb
+
+
+def _regex(node: ast.Call, cols: _Columns) -> Masks:
+    n = cols.n
+    col = cols.operand(node.args[0])
+    truth, err = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+    try:
+        pattern = re.compile(node.args[1].value)
+    except re.error:
+        return truth, np.ones(n, dtype=bool), np.zeros(n, dtype=bool)
+    ok = ~col.other
+    memo: Dict[str, bool] = {}
+
+    def match(value: Any) -> bool:
+        text = value if type(value) is str else str(value)
+        hit = memo.get(text)
+        if hit is None:
+            hit = memo[text] = pattern.fullmatch(text) is not None
+        return hit
+
+    if ok.any():
+        truth[ok] = np.fromiter((match(v) for v in col.values[ok]), dtype=bool, count=int(ok.sum()))
+    return truth, err, col.other.copy()
+
+
+def _evaluate(node: ast.AST, cols: _Columns) -> Masks:
+    if isinstance(node, ast.BoolOp):
+        truth, err, fb = _evaluate(node.values[0], cols)
+        is_and = isinstance(node.op, ast.And)
+        for value in node.values[1:]:
+            # the next operand only runs where the previous ones did not decide
+            runs = ~err & ~fb & (truth if is_and else ~truth)
+            t2, e2, f2 = _evaluate(value, cols)
+            err = err | (runs & e2)
+            fb = fb | (runs & f2)
+            truth = np.where(runs, t2, truth)
+        return truth, err, fb
+    if isinstance(node, ast.UnaryOp):
+        truth, err, fb = _evaluate(node.operand, cols)
+        return ~truth, err, fb
+    if isinstance(node, ast.Compare):
+        return _compare(node, cols)
+    if isinstance(node, ast.Call):
+        return _regex(node, cols)
+    return _truthiness(cols.operand(node), cols.n)
+
+
+class _BatchRule:
+    def __init__(self, rule: CompiledRule) -> None:
+        self.rule = rule
+        self.tree: Optional[ast.AST] = ast.parse(rule.condition, mode="eval").body
+        try:
+            _check(self.tree)
+        except _Unsupported:
+            self.tree = None  # evaluated per row
+
+    def fires(self, cols: _Columns, active: np.ndarray) -> np.ndarray:
+        n = cols.n
+        present = [cols.by_name[name] for name in self.rule.inputs if name in cols.by_name]
+        all_absent = np.ones(n, dtype=bool)
+        for col in present:
+            all_absent &= col.absent
+        shadowed = any(name in cols.by_name for name in self.rule.names if name in SAFE_GLOBALS)
+
+        if self.tree is None or shadowed:
+            fires = np.zeros(n, dtype=bool)
+            slow = active & ~all_absent
+        else:
+            truth, err, slow = _evaluate(self.tree, cols)
+            fires = truth & ~err & ~slow
+            slow = slow & active & ~all_absent
+        fires[all_absent] = self.rule.when_absent
+        for i in np.flatnonzero(slow):
+            fires[i] = self.rule.fires(cols.lookup(int(i), self.rule.names))
+        return fires
+
+    @property
+    def vectorised(self) -> bool:
+        return self.tree is not None
+
+
+def _batch_rules(ruleset: CompiledRuleset) -> List[_BatchRule]:
+    cached = getattr(ruleset, "_batch_rules", None)
+    if cached is None:
+        cached = [_BatchRule(rule) for rule in ruleset.rules]
+        ruleset._batch_rules = cached  # type: ignore[attr-defined]
+    return cached
+
+
+def screen_batch(data: Any, ruleset: Optional[CompiledRuleset] = None) -> Dict[str, Any]:
+    """Screen every row of ``data``; column-wise results in row order:
+
+    * ``status`` - ``"ok"`` or ``"reject"`` per row;
+    * ``rule`` / ``description`` - the first reject rule (``None`` when ok);
+    * ``flags`` - names of the flag rules each ok row tripped, as a tuple;
+    * ``per_row_rules`` - rules that could not be vectorised.
+    """
+    ruleset = ruleset or load_ruleset()
+    rules = _batch_rules(ruleset)
+    cols = _Columns(data, {name for br in rules for name in br.rule.names})
+    n = cols.n
+    rejected = np.zeros(n, dtype=bool)
+    first_reject = np.full(n, -1, dtype=np.int32)
+    flagged: List[Tuple[int, np.ndarray]] = []
+    for index, br in enumerate(rules):
+        active = ~rejected
+        if not active.any():
+            break
+        fires = br.fires(cols, active) & active
+        if br.rule.action == "reject":
+            first_reject[fires] = index
+            rejected |= fires
+        else:
+            flagged.append((index, fires))
+
+    # One tuple per distinct combination of flags, shared by the rows that have it.
+    flags = np.empty(n, dtype=object)
+    flags.fill(())
+    if flagged and n:
+        tripped = np.column_stack([fires & ~rejected for _, fires in flagged])
+        any_flag = tripped.any(axis=1)
+        combos, which = np.unique(tripped[any_flag], axis=0, return_inverse=True)
+        flag_names = [rules[index].rule.name for index, _ in flagged]
+        named = np.empty(len(combos), dtype=object)
+        for j, combo in enumerate(combos):  # item by item: a list of tuples would broadcast
+            named[j] = tuple(name for name, on in zip(flag_names, combo) if on)
+        flags[any_flag] = named[which.reshape(-1)]
+    names = np.array([br.rule.name for br in rules] + [None], dtype=object)
+    descriptions = np.array([br.rule.description for br in rules] + [None], dtype=object)
+    return {
+        "status": np.where(rejected, "reject", "ok").astype(object),
+        "rule": names[first_reject],
+        "description": descriptions[first_reject],
+        "flags": flags,
+        "per_row_rules": [br.rule.name for br in rules if not br.vectorised],
+    }
+
+
+def evaluate_rules_batch(data: Any, ruleset: Optional[CompiledRuleset] = None) -> List[Dict[str, Any]]:
+    """:func:`screen_batch` as one ``evaluate_rules``-shaped dict per row."""
+    ruleset = ruleset or load_ruleset()
+    screened = screen_batch(data, ruleset)
+    descriptions = {br.rule.name: br.rule.description for br in _batch_rules(ruleset)}
+    out: List[Dict[str, Any]] = []
+    for status, rule, description, flags in zip(screened["status"], screened["rule"],
+                                                screened["description"], screened["flags"]):
+        if status == "reject":
+            out.append({"status": "reject", "rule": rule, "description": description})
+        else:
+            out.append({"status": "ok",
+                        "flags": [{"rule": f, "description": descriptions[f]} for f in flags]})
+    return out
@@ -3,23 +3,39 @@
 The `/score` endpoint runs the full agent loop (retrieve -> reason -> explain ->
 write-back). The response stays backward compatible with the original API and
 adds the new agentic fields: `band`, `similar_cases`, `policies_cited`, and
-`meta` (which backends are actually in play).
+`meta` (which backends are actually in play). `/score/batch` scores many
+applicants per request through the batched agent path, and `/score/stream`
+sends the deterministic result at once and streams the rationale as SSE.
 """
+import asyncio
+import json
 import os
 import sys
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 # Make the project root importable whether launched from repo root or backend/
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from backend.bulk_screening import evaluate_rules_batch  # noqa: E402
 from backend.validators import evaluate_rules  # noqa: E402
+from backend.velocity import SQLiteVelocityStore, get_velocity, submission_counts  # noqa: E402
+from src import metrics  # noqa: E402
 from src.agent.credit_agent import get_agent  # noqa: E402
-from src.recommendations.service import recommend_products  # noqa: E402
+from src.llm.guard import get_guarded_llm  # noqa: E402
+from src.memory.embedding_cache import get_embedding_cache  # noqa: E402
+from src.memory.embeddings import warm_embeddings  # noqa: E402
+from src.memory.mongo import aclose_clients, close_clients, pool_stats  # noqa: E402
+from src.memory.provider_clients import client_stats  # noqa: E402
+from src.recommendations.service import init_recommendations, recommend_products  # noqa: E402
 
 _ROOT = Path(__file__).resolve().parent.parent
 load_dotenv(_ROOT / ".env")
@@ -28,7 +44,69 @@ load_dotenv(_ROOT / "backend" / ".env", override=True)
 if os.getenv("AWS_PROFILE") == "":
     os.environ.pop("AWS_PROFILE", None)
 
-app = FastAPI(title="AI Credit Scoring API", version="2.0.0")
+
+def _warm_agent() -> None:
+    get_agent().memory.warm()
+
+
+def _warm_explanations() -> None:
+    get_agent().explanations  # starts the workers, which resume spooled jobs
+
+
+# Built lazily on first use; the warm-up builds them in parallel at startup.
+_WARMUP_STEPS = {
+    "agent": _warm_agent,                      # MongoDB pool, session backend, policy table
+    "embeddings": warm_embeddings,             # provider clients + embedding cache
+    "recommendations": init_recommendations,   # product catalog + TF-IDF fit
+    "llm": lambda: get_guarded_llm().warm(),   # langchain + ChatBedrock client
+}
+if os.getenv("EXPLAIN_SPOOL_PATH", "").strip():
+    # Jobs spooled by the previous run must not wait for the next deferred request.
+    _WARMUP_STEPS["explanations"] = _warm_explanations
+_WARMUP: Dict[str, Dict[str, Any]] = {}
+
+
+async def _warm_up() -> None:
+    async def step(name: str) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(_WARMUP_STEPS[name])
+            _WARMUP[name] = {"status": "ok"}
+        except Exception as exc:  # built (or falls back) on first use instead
+            print(f"[warmup] {name} failed ({exc}); will initialise on first use")
+            _WARMUP[name] = {"status": "failed", "error": str(exc)}
+        _WARMUP[name]["ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    for name in _WARMUP_STEPS:
+        _WARMUP[name] = {"status": "pending"}
+    await asyncio.gather(*(step(name) for name in _WARMUP_STEPS))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve (and answer /ready with 503) while the warm-up runs in the background.
+    warming = None
+    if os.getenv("WARMUP", "on").strip().lower() not in ("off", "0", "false", "no"):
+        warming = asyncio.create_task(_warm_up())
+    elif "explanations" in _WARMUP_STEPS:
+        warming = asyncio.create_task(asyncio.to_thread(_warm_explanations))
+    yield
+    if warming is not None:
+        await warming
+    # Stop explanation workers (they patch decisions), ship buffered AgentCore
+    # session events, then drain write-behind decisions before the shared
+    # MongoDB pool goes away.
+    get_agent().close()
+    get_agent().session.flush()
+    get_agent().memory.close()
+    velocity = get_velocity()
+    if velocity is not None:
+        velocity.close()
+    close_clients()
+    await aclose_clients()
+
+
+app = FastAPI(title="AI Credit Scoring API", version="2.0.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -50,9 +128,63 @@ def health():
         "status": "ok",
         "memory_backend": agent.memory.backend,
         "session_backend": agent.session.backend,
+        "session": agent.session.stats(),
+        "mongo_pool": pool_stats(),
+        "embedding_clients": client_stats(),
+        "rationale_cache": agent.rationale_cache.stats() if agent.rationale_cache else None,
+        "explanations": agent.explanation_stats(),
+        "llm": get_guarded_llm().stats(),
     }
 
 
+@app.get("/ready")
+def ready():
+    """200 once the startup warm-up has finished (failed steps initialise on
+    first use), 503 while it is still running."""
+    pending = [name for name, step in _WARMUP.items() if step["status"] == "pending"]
+    body = {"ready": not pending, "warmup": _WARMUP or "off"}
+    return JSONResponse(body, status_code=503 if pending else 200)
+
+
+def _llm_metrics() -> Dict[str, Any]:
+    stats = get_guarded_llm().stats()
+    return dict(stats, breaker_open=stats["breaker"] != "closed")
+
+
+def _embedding_cache_metrics() -> Optional[Dict[str, Any]]:
+    cache = get_embedding_cache()
+    return cache.stats() if cache is not None else None
+
+
+def _rationale_cache_metrics() -> Optional[Dict[str, Any]]:
+    cache = get_agent().rationale_cache
+    return cache.stats() if cache is not None else None
+
+
+def _velocity_metrics() -> Optional[Dict[str, Any]]:
+    store = get_velocity()
+    return store.stats() if store is not None else None
+
+
+# Component counters, exported as gauges alongside the stage histograms.
+metrics.register_collector("mongo_pool", pool_stats)
+metrics.register_collector("embedding_clients", client_stats)
+metrics.register_collector("embedding_cache", _embedding_cache_metrics)
+metrics.register_collector("session", lambda: get_agent().session.stats())
+metrics.register_collector("write_behind", lambda: get_agent().memory.writer_stats())
+metrics.register_collector("rationale_cache", _rationale_cache_metrics)
+metrics.register_collector("explanations", lambda: get_agent().explanation_stats())
+metrics.register_collector("llm", _llm_metrics)
+metrics.register_collector("velocity", _velocity_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Stage latency histograms, fallback counters and component stats
+    (Prometheus text format, this worker only)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 class CreditInput(BaseModel):
     Name: str
     ssn: str
@@ -78,30 +210,152 @@ class QueryDescription(BaseModel):
     description: str
 
 
-@app.post("/score")
-def score_credit(payload: CreditInput):
-    profile = payload.dict()
+class CreditBatch(BaseModel):
+    # Validated per item, so one malformed applicant does not reject the batch.
+    applicants: List[Dict[str, Any]]
+
+
+def _screen_form(profile: Dict[str, Any], extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """The form the screening rules see: the profile plus ``missing_fields``
+    and any computed fields (``extra``)."""
+    return dict(profile, missing_fields=[k for k, v in profile.items() if v in (None, "")], **(extra or {}))
+
 
-    # Rule-based screening gate (unchanged) — hard rejects and flags short-circuit.
-    profile["missing_fields"] = [k for k, v in profile.items() if v in (None, "")]
-    screening = evaluate_rules(profile)
-    profile.pop("missing_fields", None)
+def _screen_outcome(screening: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """``evaluate_rules`` output as the short-circuit response, or None to score."""
     if screening["status"] == "reject":
+        metrics.inc("screening_total", {"outcome": "rejected"})
         return {
             "status": "rejected",
             "reason": screening["rule"],
             "description": screening["description"],
         }
     if screening["flags"]:
+        metrics.inc("screening_total", {"outcome": "flagged"})
         return {"status": "flagged", "flags": screening["flags"]}
+    metrics.inc("screening_total", {"outcome": "passed"})
+    return None
+
+
+def _screen(profile: Dict[str, Any], timings: Optional[Dict[str, float]] = None,
+            extra: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Rule-based screening gate: the short-circuit response, or None to score."""
+    with metrics.stage("screening", timings):
+        screening = evaluate_rules(_screen_form(profile, extra))
+    return _screen_outcome(screening)
+
+
+async def _velocity(profile: Dict[str, Any], request: Request,
+                    timings: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+    """Count this submission by SSN, client IP and ``X-Device-Id``; the
+    ``*submission_count_24h`` fields for the screening rules."""
+    keys = {
+        "ssn": profile.get("ssn"),
+        "ip": request.client.host if request.client else None,
+        "device": request.headers.get("x-device-id"),
+    }
+    with metrics.stage("velocity", timings):
+        if isinstance(get_velocity(), SQLiteVelocityStore):  # file I/O off the event loop
+            return await asyncio.to_thread(submission_counts, **keys)
+        return submission_counts(**keys)
+
+
+@app.post("/score")
+async def score_credit(payload: CreditInput, request: Request, defer: bool = False):
+    """Score one applicant. ``?defer=true`` returns without waiting for the LLM;
+    poll ``GET /explanations/{job_id}`` for the rationale."""
+    profile = payload.dict()
+
+    # Rule-based screening gate — hard rejects and flags short-circuit. The
+    # velocity counters feed submission_count_24h and friends.
+    timings: Dict[str, float] = {}
+    screened = _screen(profile, timings, await _velocity(profile, request, timings))
+    if screened is not None:
+        return screened
 
     # Full agent loop: retrieve -> reason -> explain -> write-back.
     try:
-        return get_agent().evaluate(profile)
+        return await get_agent().aevaluate(profile, defer_explanation=defer, timings=timings)
     except Exception as exc:  # pragma: no cover - defensive
         return {"error": f"Something went wrong: {exc}"}
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.get("/explanations/{job_id}")
+def explanation_status(job_id: str):
+    """Status of a deferred explanation; ``summary`` once it is done."""
+    job = get_agent().explanations.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown explanation job")
+    return job
+
+
+@app.post("/score/stream")
+async def score_credit_stream(payload: CreditInput, request: Request):
+    """``/score`` as server-sent events: ``result`` (score, band, similar cases,
+    policies) as soon as it is known, then ``token`` events with the rationale,
+    then ``done`` with the full summary and ``decision_id`` after write-back."""
+    profile = payload.dict()
+    timings: Dict[str, float] = {}
+    screened = _screen(profile, timings, await _velocity(profile, request, timings))
+
+    async def events():
+        if screened is not None:
+            yield _sse("result", screened)
+            yield _sse("done", {})
+            return
+        try:
+            async for event, data in get_agent().astream_evaluate(profile, timings=timings):
+                yield _sse(event, data)
+        except Exception as exc:  # pragma: no cover - defensive
+            yield _sse("error", {"error": f"Something went wrong: {exc}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/score/batch")
+def score_batch(payload: CreditBatch):
+    """Score many applicants in one call; ``results[i]`` answers ``applicants[i]``.
+
+    All valid rows are screened together, column-wise (``screen_batch``); the
+    rows that pass go through ``CreditAgent.evaluate_many`` (batched embedding,
+    one kNN pass, one bulk write-back). Invalid or failing rows get
+    ``{"status": "error", ...}``.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(payload.applicants)
+    valid: List[int] = []
+    forms: List[Dict[str, Any]] = []
+    for i, item in enumerate(payload.applicants):
+        try:
+            forms.append(_screen_form(CreditInput(**item).dict()))
+            valid.append(i)
+        except Exception as exc:
+            results[i] = {"status": "error", "error": f"Invalid applicant: {exc}"}
+    to_score: List[int] = []
+    profiles: List[Dict[str, Any]] = []
+    if forms:
+        with metrics.stage("screening_batch"):
+            screenings = evaluate_rules_batch(forms)
+        for i, form, screening in zip(valid, forms, screenings):
+            results[i] = _screen_outcome(screening)
+            if results[i] is None:
+                form.pop("missing_fields", None)
+                to_score.append(i)
+                profiles.append(form)
+    if profiles:
+        try:
+            for i, result in zip(to_score, get_agent().evaluate_many(profiles)):
+                results[i] = result
+        except Exception as exc:  # pragma: no cover - defensive
+            for i in to_score:
+                results[i] = {"status": "error", "error": f"Something went wrong: {exc}"}
+    return {"results": results}
+
+
 @app.post("/similar_products")
 def similar_products(query: QueryDescription):
     """Credit-card recommendations for a free-text description (vector search)."""
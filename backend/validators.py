@@ -3,7 +3,6 @@ import re
 import ast
 from pathlib import Path
 from functools import lru_cache
-from collections import defaultdict
 
 # Helper functions allowed inside rule expressions
 SAFE_GLOBALS = {
@@ -18,6 +17,85 @@ def load_rules(rule_path: str = "rule_based_screening_rules.json"):
     data = json.loads(path.read_text())
     return data.get("RuleBasedScreeningRules", [])
 
+class CompiledRule:
+    """One rule condition, parsed and compiled once.
+
+    ``names`` are the identifiers the condition reads; ``inputs`` are those that
+    come from the form (everything except ``SAFE_GLOBALS``). Absent inputs read
+    as ``None``, as they always have, so the outcome with *all* inputs absent is
+    a constant: it is computed here and the condition is not evaluated then.
+    """
+
+    __slots__ = ("name", "description", "action", "condition", "code", "names", "inputs", "when_absent")
+
+    def __init__(self, rule: dict):
+        self.name = rule.get("name")
+        self.description = rule.get("description")
+        self.action = rule.get("action")
+        self.condition = rule["condition"]
+        expr = ast.parse(self.condition, mode="eval")
+        self.code = compile(expr, "<condition>", "eval")
+        self.names = tuple(sorted({n.id for n in ast.walk(expr) if isinstance(n, ast.Name)}))
+        self.inputs = tuple(n for n in self.names if n not in SAFE_GLOBALS)
+        self.when_absent = self._evaluate({n: SAFE_GLOBALS.get(n) for n in self.names})
+
+    def _evaluate(self, env: dict) -> bool:
+        try:
+            return bool(eval(self.code, {}, env))
+        except Exception:
+            # Ignore malformed conditions or missing data
+            return False
+
+    def fires(self, lookup: dict) -> bool:
+        """Whether the rule fires for a form already mapped by ``CompiledRuleset.lookup``."""
+        if not any(n in lookup for n in self.inputs):
+            return self.when_absent
+        return self._evaluate({n: lookup[n] if n in lookup else SAFE_GLOBALS.get(n) for n in self.names})
+
+class CompiledRuleset:
+    """All screening rules, in file order, compiled once per rules file."""
+
+    def __init__(self, categories: list):
+        self.rules = []
+        for category in categories:
+            for rule in category.get("rules", []):
+                try:
+                    self.rules.append(CompiledRule(rule))
+                except Exception as exc:
+                    # Malformed conditions never fire; drop them up front.
+                    print(f"[validators] skipping rule {rule.get('name')!r} ({exc})")
+
+    @staticmethod
+    def lookup(form_data: dict) -> dict:
+        """Form fields by name, with lower-cased keys taking precedence (as in
+        the original environment, where they were applied last)."""
+        lookup = dict(form_data)
+        lookup.update({k.lower(): v for k, v in form_data.items()})
+        return lookup
+
+    def evaluate(self, form_data: dict):
+        flags = []
+        lookup = self.lookup(form_data)
+        for rule in self.rules:
+            if not rule.fires(lookup):
+                continue
+            if rule.action == "reject":
+                return {
+                    "status": "reject",
+                    "rule": rule.name,
+                    "description": rule.description,
+                }
+            flags.append({
+                "rule": rule.name,
+                "description": rule.description,
+            })
+        return {"status": "ok", "flags": flags}
+
+@lru_cache
+def load_ruleset(rule_path: str = "rule_based_screening_rules.json") -> CompiledRuleset:
+    """The rules from ``load_rules``, compiled once and cached."""
+    return CompiledRuleset(load_rules(rule_path))
+
 def evaluate_rules(form_data: dict):
     """Evaluate form data against configured rules.
 
@@ -26,29 +104,4 @@ def evaluate_rules(form_data: dict):
         - rule, description: present if status is "reject"
         - flags: list of flag dicts when status is "ok"
     """
-    flags = []
-    # allow lookup of missing variables as None
-    env = defaultdict(lambda: None, SAFE_GLOBALS)
-    # add both original and lower-case keys for matching
-    env.update(form_data)
-    env.update({k.lower(): v for k, v in form_data.items()})
-
-    for category in load_rules():
-        for rule in category.get("rules", []):
-            try:
-                expr = ast.parse(rule["condition"], mode="eval")
-                if eval(compile(expr, "<condition>", "eval"), {}, env):
-                    if rule.get("action") == "reject":
-                        return {
-                            "status": "reject",
-                            "rule": rule.get("name"),
-                            "description": rule.get("description"),
-                        }
-                    flags.append({
-                        "rule": rule.get("name"),
-                        "description": rule.get("description"),
-                    })
-            except Exception:
-                # Ignore malformed conditions or missing data
-                continue
-    return {"status": "ok", "flags": flags}
+    return load_ruleset().evaluate(form_data)
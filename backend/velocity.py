@@ -0,0 +1,236 @@
+"""Sliding-window submission counters for the screening rules.
+
+``submission_count_24h`` and friends count how often an SSN, IP address or
+device was seen in the last window. Each key owns a ring of time buckets
+(24 x 1 h by default): a hit bumps the current bucket, resetting it first if
+it still holds an older period, and a count sums the buckets of the current
+window. Both cost the same however long a key has been around.
+
+Backends:
+
+* ``memory`` - per process, an LRU of at most ``VELOCITY_MAX_KEYS`` keys
+  (the least recently seen key is forgotten first);
+* ``sqlite`` - one row per (key, bucket) in a local file shared by every
+  worker on the host; stale rows are swept as it is written.
+
+Keys are stored as ``sha256(kind:value)`` so no SSN lands on disk.
+
+Configuration:
+
+    VELOCITY=memory | sqlite | off     (default memory)
+    VELOCITY_PATH=.cache/velocity.sqlite
+    VELOCITY_WINDOW_S=86400
+    VELOCITY_BUCKETS=24
+    VELOCITY_MAX_KEYS=100000           memory backend only
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _env(name: str, default: str = "") -> str:
+    return (os.getenv(name) or default).strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _digest(kind: str, value: str) -> str:
+    return hashlib.sha256(f"{kind}:{value}".encode("utf-8")).hexdigest()
+
+
+class VelocityStore:
+    """Per-key hit counts over the last ``window_s`` seconds, in ``buckets`` slots."""
+
+    def __init__(self, window_s: int = 86400, buckets: int = 24, max_keys: int = 100_000) -> None:
+        self.window_s = max(1, window_s)
+        self.buckets = max(1, buckets)
+        self.width = self.window_s / self.buckets
+        self.max_keys = max(1, max_keys)
+        self._lock = threading.Lock()
+        # key -> (bucket period per slot, count per slot)
+        self._rings: "OrderedDict[str, Tuple[List[int], List[int]]]" = OrderedDict()
+        self._stats = {"hits": 0, "evicted": 0}
+
+    def _period(self, now: Optional[float]) -> int:
+        return int((time.time() if now is None else now) // self.width)
+
+    def hit(self, kind: str, value: str, now: Optional[float] = None) -> int:
+        """Record one submission for ``kind:value``; its count including this one."""
+        return self.hit_many({kind: value}, now)[kind]
+
+    def hit_many(self, keys: Dict[str, str], now: Optional[float] = None) -> Dict[str, int]:
+        """:meth:`hit` for several ``{kind: value}`` keys of one submission."""
+        period = self._period(now)
+        slot = period % self.buckets
+        out: Dict[str, int] = {}
+        with self._lock:
+            for kind, value in keys.items():
+                digest = _digest(kind, value)
+                ring = self._rings.get(digest)
+                if ring is None:
+                    ring = self._rings[digest] = ([-1] * self.buckets, [0] * self.buckets)
+                    while len(self._rings) > self.max_keys:
+                        self._rings.popitem(last=False)
+                        self._stats["evicted"] += 1
+                else:
+                    self._rings.move_to_end(digest)
+                periods, counts = ring
+                if periods[slot] != period:
+                    periods[slot], counts[slot] = period, 0
+                counts[slot] += 1
+                out[kind] = self._sum(ring, period)
+            self._stats["hits"] += len(keys)
+        return out
+
+    def count(self, kind: str, value: str, now: Optional[float] = None) -> int:
+        """Submissions for ``kind:value`` in the current window, without recording one."""
+        with self._lock:
+            ring = self._rings.get(_digest(kind, value))
+            return 0 if ring is None else self._sum(ring, self._period(now))
+
+    def _sum(self, ring: Tuple[List[int], List[int]], period: int) -> int:
+        oldest = period - self.buckets
+        return sum(c for p, c in zip(*ring) if p > oldest)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, keys=len(self._rings))
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteVelocityStore(VelocityStore):
+    """:class:`VelocityStore` in a SQLite file, so every worker sees every hit."""
+
+    def __init__(self, path: str, window_s: int = 86400, buckets: int = 24) -> None:
+        super().__init__(window_s, buckets)
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._writes_since_sweep = 0
+        self._db()  # fail at construction, not on the first request
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():  # reopen after fork
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS velocity ("
+                " digest TEXT, slot INTEGER, period INTEGER, count INTEGER,"
+                " PRIMARY KEY (digest, slot)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS velocity_period ON velocity (period)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def hit_many(self, keys: Dict[str, str], now: Optional[float] = None) -> Dict[str, int]:
+        period = self._period(now)
+        slot = period % self.buckets
+        out: Dict[str, int] = {}
+        with self._lock:
+            conn = self._db()
+            with conn:  # one transaction: other workers see both statements or neither
+                for kind, value in keys.items():
+                    digest = _digest(kind, value)
+                    conn.execute(
+                        "INSERT INTO velocity VALUES (?, ?, ?, 1) ON CONFLICT (digest, slot) DO UPDATE"
+                        " SET count = CASE WHEN period = excluded.period THEN count + 1 ELSE 1 END,"
+                        " period = excluded.period",
+                        (digest, slot, period),
+                    )
+                    out[kind] = self._select(conn, digest, period)
+            self._stats["hits"] += len(keys)
+            self._writes_since_sweep += len(keys)
+            if self._writes_since_sweep >= 1000:
+                self._sweep(conn, period)
+        return out
+
+    def count(self, kind: str, value: str, now: Optional[float] = None) -> int:
+        with self._lock:
+            return self._select(self._db(), _digest(kind, value), self._period(now))
+
+    def _select(self, conn: sqlite3.Connection, digest: str, period: int) -> int:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(count), 0) FROM velocity WHERE digest = ? AND period > ?",
+            (digest, period - self.buckets),
+        ).fetchone()
+        return int(row[0])
+
+    def _sweep(self, conn: sqlite3.Connection, period: int) -> None:
+        """Drop buckets that left the window, so the file holds live keys only."""
+        self._writes_since_sweep = 0
+        with conn:
+            removed = conn.execute("DELETE FROM velocity WHERE period <= ?", (period - self.buckets,)).rowcount
+        self._stats["evicted"] += max(removed, 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            keys = self._db().execute("SELECT COUNT(DISTINCT digest) FROM velocity").fetchone()[0]
+            return dict(self._stats, keys=int(keys))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_DEFAULT: Optional[VelocityStore] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_velocity() -> Optional[VelocityStore]:
+    """Process-wide store built from the environment, or ``None`` when off."""
+    global _DEFAULT
+    mode = _env("VELOCITY", "memory").lower()
+    if mode in ("off", "0", "false", "no"):
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            window_s = _env_int("VELOCITY_WINDOW_S", 86400)
+            buckets = _env_int("VELOCITY_BUCKETS", 24)
+            if mode == "sqlite":
+                path = _env("VELOCITY_PATH", str(_ROOT / ".cache" / "velocity.sqlite"))
+                try:
+                    _DEFAULT = SQLiteVelocityStore(path, window_s, buckets)
+                except sqlite3.Error as exc:
+                    print(f"[velocity] sqlite store unavailable ({exc}); using fallback")
+            if _DEFAULT is None:
+                _DEFAULT = VelocityStore(window_s, buckets, _env_int("VELOCITY_MAX_KEYS", 100_000))
+        return _DEFAULT
+
+
+def submission_counts(ssn: Optional[str] = None, ip: Optional[str] = None,
+                      device: Optional[str] = None) -> Dict[str, int]:
+    """Record one submission and return the velocity fields for the rules:
+    ``submission_count_24h`` (per SSN) plus ``ip_submission_count_24h`` and
+    ``device_submission_count_24h`` for the identifiers that were given."""
+    store = get_velocity()
+    keys = {kind: str(value) for kind, value in (("ssn", ssn), ("ip", ip), ("device", device)) if value}
+    if store is None or not keys:
+        return {}
+    try:
+        counts = store.hit_many(keys)
+    except sqlite3.Error as exc:  # pragma: no cover - disk dependent
+        print(f"[velocity] hit failed ({exc}); velocity rules skipped")
+        return {}
+    fields = {"ssn": "submission_count_24h", "ip": "ip_submission_count_24h",
+              "device": "device_submission_count_24h"}
+    return {fields[kind]: count for kind, count in counts.items()}
@@ -0,0 +1,86 @@
+"""Recall@k vs latency benchmark: IVF approximate search against exact search.
+
+Builds synthetic, clustered "decision" embeddings (unit-normalised, like the
+real ones) at each requested size, then for a sweep of ``nprobe`` values reports
+recall@k against the exact ``VectorIndex`` scan and per-query latency.
+
+Usage:
+    python scripts/bench_ann.py                          # 10k, 100k, 1M at dim 256
+    python scripts/bench_ann.py --sizes 10000 --dim 1024 --nprobe 4 16 64
+
+A 1M x 1024 float32 matrix is ~4 GB; the default dim keeps the 1M run laptop
+sized while preserving the relative costs.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.memory.ann import IVFIndex  # noqa: E402
+from src.memory.vector_index import VectorIndex  # noqa: E402
+
+
+def _synthetic(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    out = np.empty((n, dim), dtype=np.float32)
+    for lo in range(0, n, 100_000):
+        hi = min(n, lo + 100_000)
+        out[lo:hi] = centres[rng.integers(0, clusters, hi - lo)]
+        out[lo:hi] += 0.6 * rng.normal(size=(hi - lo, dim)).astype(np.float32)
+    return out
+
+
+def _timed(fn, queries):
+    results, times = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append(fn(q))
+        times.append((time.perf_counter() - t0) * 1000)
+    return results, np.percentile(times, 50), np.percentile(times, 95)
+
+
+def bench(size: int, dim: int, k: int, nprobes, n_queries: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    data = _synthetic(size, dim, clusters=max(16, size // 2000), rng=rng)
+    queries = data[rng.integers(0, size, n_queries)] + 0.3 * rng.normal(size=(n_queries, dim))
+
+    index = IVFIndex(min_train_size=size + 1)
+    index.extend_matrix(data)
+    del data
+    t0 = time.perf_counter()
+    index.train()
+    train_s = time.perf_counter() - t0
+
+    exact, p50, p95 = _timed(lambda q: VectorIndex.search(index, q, k), queries)
+    truth = [{pos for pos, _ in hits} for hits in exact]
+    print(f"\n== {size:,} decisions, dim {dim}, k={k}, nlist={len(index._lists)} "
+          f"(train {train_s:.1f}s) ==")
+    print(f"{'method':<14}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print(f"{'exact':<14}{1.0:>10.3f}{p50:>10.2f}{p95:>10.2f}")
+    for nprobe in nprobes:
+        approx, p50, p95 = _timed(lambda q: index.search(q, k, nprobe=nprobe), queries)
+        recall = np.mean([len(t & {pos for pos, _ in a}) / k for t, a in zip(truth, approx)])
+        print(f"{'ivf nprobe=' + str(nprobe):<14}{recall:>10.3f}{p50:>10.2f}{p95:>10.2f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--dim", type=int, default=256)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+    for size in args.sizes:
+        bench(size, args.dim, args.k, args.nprobe, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
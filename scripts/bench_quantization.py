@@ -0,0 +1,76 @@
+"""Storage precision benchmark: memory, latency and recall against float32.
+
+Builds synthetic, clustered "decision" embeddings (as in ``bench_ann.py``) and
+indexes them once per ``EMBED_STORAGE_PRECISION`` option. For each it reports
+the vector memory scaled to 100k decisions, the per-query latency of an exact
+scan (binary: Hamming pre-filter + rescore) and recall@k against float32.
+
+Usage:
+    python scripts/bench_quantization.py                      # 100k x 1024
+    python scripts/bench_quantization.py --size 20000 --rescore 4 10 20
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.memory.vector_index import VectorIndex  # noqa: E402
+
+
+def _synthetic(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    out = centres[rng.integers(0, clusters, n)]
+    out += 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    return out
+
+
+def _timed(index: VectorIndex, queries, k: int):
+    results, times = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append({pos for pos, _ in index.search(q, k)})
+        times.append((time.perf_counter() - t0) * 1000)
+    return results, np.percentile(times, 50), np.percentile(times, 95)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--rescore", type=int, nargs="+", default=[10],
+                    help="rescore_factor values to try for binary")
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    data = _synthetic(args.size, args.dim, max(16, args.size // 2000), rng)
+    queries = data[rng.integers(0, args.size, args.queries)] + 0.3 * rng.normal(size=(args.queries, args.dim))
+
+    configs = [("float32", 1), ("float16", 1), ("int8", 1)]
+    configs += [("binary", r) for r in args.rescore]
+    print(f"== {args.size:,} decisions, dim {args.dim}, k={args.k} ==")
+    print(f"{'precision':<18}{'MB/100k':>10}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    truth = None
+    for precision, rescore in configs:
+        index = VectorIndex(precision=precision, rescore_factor=rescore)
+        index.extend_matrix(data)
+        hits, p50, p95 = _timed(index, queries, args.k)
+        if truth is None:
+            truth = hits
+        recall = np.mean([len(t & h) / args.k for t, h in zip(truth, hits)])
+        mb = index.memory_bytes() / len(index) * 100_000 / (1 << 20)
+        label = precision if precision != "binary" else f"binary x{rescore}"
+        print(f"{label:<18}{mb:>10.1f}{recall:>10.3f}{p50:>10.2f}{p95:>10.2f}")
+        del index
+
+
+if __name__ == "__main__":
+    main()
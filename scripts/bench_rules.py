@@ -0,0 +1,179 @@
+"""Screening-rule throughput: compiled ruleset vs. per-request parse + compile,
+and per-form vs. column-wise batch screening.
+
+``evaluate_rules`` used to ``ast.parse`` and ``compile`` every condition on
+every request, over a ``defaultdict`` holding every form field twice. It now
+runs a ``CompiledRuleset`` built once per rules file. This replays the old
+evaluator (``legacy_evaluate`` below) and the compiled one over the same
+payloads, checks that every reject/flag outcome is identical, and reports
+rules evaluated per second.
+
+``--batch-rows`` then screens that many forms (the payloads repeated) with
+``evaluate_rules`` in a loop and with ``screen_batch`` - once from a list of
+dicts (including the transposition into columns) and once from ready-made
+columns, as a DataFrame or column store would hand them over.
+
+Payloads: a valid ``/score`` applicant as ``_screen`` passes it (with
+``missing_fields``), variants that trip each rule, and random forms mixing
+present, absent, ``None`` and wrongly-typed fields.
+
+Usage:
+    python scripts/bench_rules.py                    # 2000 random payloads, 3 s per side
+    python scripts/bench_rules.py --payloads 20000 --seconds 5
+    python scripts/bench_rules.py --batch-rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.bulk_screening import evaluate_rules_batch, screen_batch  # noqa: E402
+from backend.validators import SAFE_GLOBALS, CompiledRuleset, evaluate_rules, load_rules, load_ruleset  # noqa: E402
+
+SAMPLE = {
+    "Name": "Jane Doe", "ssn": "123-45-6789", "Age": "34", "Occupation": "Engineer",
+    "Annual_Income": "85000", "Monthly_Inhand_Salary": "6500", "Num_Bank_Accounts": "3",
+    "Num_Credit_Card": "2", "Interest_Rate": "11", "Num_of_Loan": "1",
+    "Type_of_Loan": "Auto Loan", "Delay_from_due_date": "3", "Num_of_Delayed_Payment": "1",
+    "Credit_Mix": "Good", "Outstanding_Debt": "1200", "Credit_Utilization_Ratio": "24",
+    "Credit_History_Age": "8 Years", "Total_EMI_per_month": "300", "missing_fields": [],
+}
+
+VARIANTS = [
+    {"ssn": "123456789"},
+    {"ssn": None},
+    {"age": 16},
+    {"income": 9000},
+    {"income": 9000, "is_student_or_dependent": True},
+    {"job_title": "Intern", "income": 150000},
+    {"active_loans": 7},
+    {"debt_to_income_ratio": 0.6},
+    {"zip_code": "10001", "high_risk_zip_codes": ["10001"]},
+    {"ip_location": "US-NY"},
+    {"ip_location": "US-NY", "declared_address_location": "US-NY"},
+    {"submission_count_24h": 3},
+    {"missing_fields": ["Occupation"]},
+    {"employment_status": "unemployed", "income": 9000},
+    {"name_dob_mismatch": True},
+]
+
+_RANDOM_FIELDS = {
+    "age": [16, 17, 30, "30", None], "income": [5000, 20000, 150000, "x", None],
+    "is_student_or_dependent": [True, False, None], "job_title": ["Intern", "Manager", None],
+    "active_loans": [0, 6, None], "debt_to_income_ratio": [0.2, 0.5, None],
+    "employment_duration_months": [3, 24, None], "bank_account_age_months": [1, 12, None],
+    "form_completion_time_seconds": [10, 120, None], "submission_count_24h": [0, 1, 4, None],
+    "ip_location": ["A", "B", None], "declared_address_location": ["A", "B", None],
+    "employment_status": ["unemployed", "employed", None], "ssn": ["123-45-6789", "bad", None],
+    "missing_fields": [[], ["Age"], None], "name_dob_mismatch": [True, False, None],
+}
+
+
+def legacy_evaluate(form_data: dict):
+    """``evaluate_rules`` before the compiled ruleset (reference implementation)."""
+    flags = []
+    env = defaultdict(lambda: None, SAFE_GLOBALS)
+    env.update(form_data)
+    env.update({k.lower(): v for k, v in form_data.items()})
+    for category in load_rules():
+        for rule in category.get("rules", []):
+            try:
+                expr = ast.parse(rule["condition"], mode="eval")
+                if eval(compile(expr, "<condition>", "eval"), {}, env):
+                    if rule.get("action") == "reject":
+                        return {"status": "reject", "rule": rule.get("name"),
+                                "description": rule.get("description")}
+                    flags.append({"rule": rule.get("name"), "description": rule.get("description")})
+            except Exception:
+                continue
+    return {"status": "ok", "flags": flags}
+
+
+def payloads(n: int, seed: int):
+    rng = random.Random(seed)
+    out = [dict(SAMPLE)] + [dict(SAMPLE, **v) for v in VARIANTS]
+    for _ in range(n):
+        form = dict(SAMPLE) if rng.random() < 0.5 else {}
+        for field, choices in _RANDOM_FIELDS.items():
+            if rng.random() < 0.4:
+                form[field] = rng.choice(choices)
+        out.append(form)
+    return out
+
+
+def throughput(fn, forms, seconds: float) -> float:
+    """Rules evaluated per second (payloads/s x rules per payload)."""
+    rules = sum(len(c.get("rules", [])) for c in load_rules())
+    done, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for form in forms:
+            fn(form)
+        done += len(forms)
+    return done * rules / (time.perf_counter() - start)
+
+
+def batch_timings(forms, rows: int):
+    """Seconds to screen ``rows`` forms: per form, batched records, batched columns."""
+    records = (forms * (rows // len(forms) + 1))[:rows]
+    keys = list(dict.fromkeys(k for f in forms for k in f))
+    if any(k.lower() != k and k.lower() in keys for k in keys):
+        # columns cannot hold "Age" and "age" for one row: keep the lower-cased value
+        records = [CompiledRuleset.lookup(f) for f in records]
+        keys = list(dict.fromkeys(k for f in records for k in f))
+    marker = object()
+    columns = {k: [f.get(k, marker) for f in records] for k in keys}
+    columns = {k: [None if v is marker else v for v in col] for k, col in columns.items()}
+
+    start = time.perf_counter()
+    per_form = [evaluate_rules(f) for f in records]
+    loop = time.perf_counter() - start
+    start = time.perf_counter()
+    screen_batch(records)
+    batched = time.perf_counter() - start
+    start = time.perf_counter()
+    screen_batch(columns)
+    columnar = time.perf_counter() - start
+    if evaluate_rules_batch(records) != per_form:
+        raise SystemExit("batch screening disagrees with evaluate_rules")
+    return loop, batched, columnar
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", type=int, default=2000, help="random payloads besides the samples")
+    parser.add_argument("--seconds", type=float, default=3.0, help="time budget per implementation")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--batch-rows", type=int, default=200_000, help="forms per batch run (0 to skip)")
+    args = parser.parse_args()
+
+    forms = payloads(args.payloads, args.seed)
+    compiled = load_ruleset().evaluate
+    mismatches = [f for f in forms if legacy_evaluate(dict(f)) != compiled(dict(f))]
+    print(f"outcomes: {len(forms) - len(mismatches)}/{len(forms)} identical "
+          f"(sample payload: {compiled(dict(SAMPLE))['status']})")
+    if mismatches:
+        print("first mismatch:", mismatches[0])
+        sys.exit(1)
+
+    legacy = throughput(legacy_evaluate, forms, args.seconds)
+    fast = throughput(compiled, forms, args.seconds)
+    print(f"  legacy: {legacy:12,.0f} rules/s")
+    print(f"compiled: {fast:12,.0f} rules/s  ({fast / legacy:.1f}x)")
+
+    if args.batch_rows:
+        loop, batched, columnar = batch_timings(forms, args.batch_rows)
+        print(f"\n{args.batch_rows:,} forms (outcomes identical):")
+        print(f"  evaluate_rules loop: {loop:7.2f} s")
+        print(f"  screen_batch(dicts): {batched:7.2f} s  ({loop / batched:.1f}x)")
+        print(f"screen_batch(columns): {columnar:7.2f} s  ({loop / columnar:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Cold-start benchmark for the API process.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+
+* ``import``   - ``import backend.main`` (what worker boot and test collection
+  pay; the catalog, TF-IDF model, Bedrock client and agent are now lazy);
+* ``eager``    - the import plus building every component one after another,
+  i.e. what importing used to cost before the first request could be served;
+* ``warm-up``  - the import plus the lifespan warm-up, which builds the same
+  components in parallel (``/ready`` turns 200 when it finishes).
+
+Usage:
+    python scripts/bench_startup.py                 # 5 runs each
+    python scripts/bench_startup.py --runs 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBES = {
+    "import": """
+import time
+t0 = time.perf_counter()
+import backend.main
+print(time.perf_counter() - t0)
+""",
+    "eager": """
+import time
+t0 = time.perf_counter()
+import backend.main
+for step in backend.main._WARMUP_STEPS.values():
+    step()
+print(time.perf_counter() - t0)
+""",
+    "warm-up": """
+import asyncio, time
+t0 = time.perf_counter()
+import backend.main
+asyncio.run(backend.main._warm_up())
+print(time.perf_counter() - t0)
+""",
+}
+
+
+def _run(code: str) -> float:
+    out = subprocess.run([sys.executable, "-c", code], cwd=_ROOT, capture_output=True,
+                         text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the medians as JSON")
+    args = parser.parse_args()
+
+    medians = {}
+    for name, code in _PROBES.items():
+        times = [_run(code) for _ in range(args.runs)]
+        medians[name] = round(statistics.median(times) * 1000, 1)
+        if not args.json:
+            print(f"{name:>8}: median {medians[name]:8.1f} ms  "
+                  f"(min {min(times) * 1000:.1f}, max {max(times) * 1000:.1f}, n={args.runs})")
+    if args.json:
+        print(json.dumps(medians))
+
+
+if __name__ == "__main__":
+    main()
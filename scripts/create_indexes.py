@@ -3,10 +3,15 @@
 Requires an Atlas cluster (M10+ or a Search-enabled tier) and a MONGODB_URI.
 Creates vector indexes on:
 
-    decisions.embedding    (long-term memory retrieval)
+    decisions.embedding    (long-term memory retrieval; plus filter fields
+                            band, age_bucket, Occupation, applicant_id, decided_at)
     policies.embedding     (RAG grounding)
     cc_products.embedding  (product recommendations)
 
+``EMBED_STORAGE_PRECISION=int8`` or ``binary`` adds Atlas automatic
+quantisation ("scalar" / "binary") to the definitions; Atlas then keeps the
+quantised vectors in the index and rescores binary matches at full fidelity.
+
 If your driver/cluster does not support programmatic search-index creation,
 the script prints the JSON definitions so you can paste them into the Atlas UI
 (Atlas Search -> Create Index -> JSON editor).
@@ -20,22 +25,26 @@ from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.memory.filters import INDEXED_FIELDS  # noqa: E402
+
 
 def _env(name: str, default: str = "") -> str:
     return (os.getenv(name) or default).strip()
 
 
-def _definition(dim: int) -> dict:
-    return {
-        "fields": [
-            {
-                "type": "vector",
-                "path": "embedding",
-                "numDimensions": dim,
-                "similarity": "cosine",
-            }
-        ]
+_QUANTIZATION = {"int8": "scalar", "binary": "binary"}
+
+
+def _definition(dim: int, precision: str = "float32", filters=()) -> dict:
+    field = {
+        "type": "vector",
+        "path": "embedding",
+        "numDimensions": dim,
+        "similarity": "cosine",
     }
+    if precision in _QUANTIZATION:
+        field["quantization"] = _QUANTIZATION[precision]
+    return {"fields": [field] + [{"type": "filter", "path": f} for f in filters]}
 
 
 def main() -> None:
@@ -46,28 +55,31 @@ def main() -> None:
     load_dotenv(root / "backend" / ".env", override=True)
 
     dim = int(_env("EMBED_DIM", "1024"))
+    precision = _env("EMBED_STORAGE_PRECISION", "float32").lower()
     targets = [
-        ("decisions", _env("DECISIONS_VECTOR_INDEX", "decisions_vector_index")),
-        ("policies", _env("POLICIES_VECTOR_INDEX", "policies_vector_index")),
-        ("cc_products", _env("PRODUCTS_VECTOR_INDEX", "products_vector_index")),
+        ("decisions", _env("DECISIONS_VECTOR_INDEX", "decisions_vector_index"),
+         _definition(dim, precision, INDEXED_FIELDS)),
+        ("policies", _env("POLICIES_VECTOR_INDEX", "policies_vector_index"),
+         _definition(dim, precision)),
+        ("cc_products", _env("PRODUCTS_VECTOR_INDEX", "products_vector_index"),
+         _definition(dim, precision)),
     ]
-    definition = _definition(dim)
 
     uri = _env("MONGODB_URI")
     if not uri:
         print("No MONGODB_URI set. Paste these definitions into the Atlas UI:\n")
-        for coll, name in targets:
+        for coll, name, definition in targets:
             print(f"# collection: {coll}   index name: {name}")
             print(json.dumps(definition, indent=2))
             print()
         return
 
-    from pymongo import MongoClient
     from pymongo.operations import SearchIndexModel
 
-    client = MongoClient(uri)
-    db = client[_env("MONGODB_DB", "bfsi-genai")]
-    for coll, name in targets:
+    from src.memory.mongo import get_database
+
+    db = get_database(uri)
+    for coll, name, definition in targets:
         try:
             model = SearchIndexModel(definition=definition, name=name, type="vectorSearch")
             db[coll].create_search_index(model=model)
@@ -3,7 +3,8 @@
 This is the "MongoDB MCP server exposed to the agent / Quick Desktop" piece of
 the workshop architecture. It exposes three read tools over the credit memory:
 
-    find_similar_applicants(description, k)  -> nearest past decisions
+    find_similar_applicants(description, k, band, occupation, age_bucket)
+                                             -> nearest past decisions
     search_policies(query, k)                -> relevant lending policies
     get_decision(applicant_id)               -> a specific stored decision
 
@@ -33,12 +34,15 @@ mcp = FastMCP("credit-memory")
 
 
 @mcp.tool()
-def find_similar_applicants(description: str, k: int = 3) -> list:
+def find_similar_applicants(description: str, k: int = 3, band: str = "",
+                            occupation: str = "", age_bucket: str = "") -> list:
     """Find the most similar past credit decisions to a free-text applicant
-    description, using vector search over long-term memory."""
+    description, using vector search over long-term memory. Optionally restrict
+    to a decision band, occupation or age bucket (e.g. "25-34")."""
     mem = get_memory()
     vec = embed_text(description)
-    return mem.similar_decisions(vec, k=k)
+    filters = {"band": band or None, "occupation": occupation or None, "age_bucket": age_bucket or None}
+    return mem.similar_decisions(vec, k=k, filters=filters)
 
 
 @mcp.tool()
@@ -0,0 +1,174 @@
+"""Score a whole applicant portfolio CSV (e.g. ``credit-training.csv``) offline.
+
+Streams the input in fixed-size chunks, maps its lowercase columns
+(``num_of_delayed_payment``, ...) onto the ``compute_features`` inputs, scores
+each chunk with the vectorised feature math (``compute_features_batch``) in a
+process pool and appends ``row,applicant_id,credit_score,band,...`` to the
+output CSV in input order. At most ``2 * workers`` chunks are in flight, so
+memory stays bounded whatever the file size.
+
+After every written chunk a checkpoint (``<output>.ckpt``) records how many
+chunks and output bytes are durable; ``--resume`` truncates any torn tail and
+continues from the next chunk.
+
+Usage:
+    python generate_credit_data.py
+    python scripts/score_portfolio.py credit-training.csv scores.csv --chunk-size 20000 --workers 4
+    python scripts/score_portfolio.py credit-training.csv scores.csv --resume
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.credit_agent import bands_for, compute_features_batch  # noqa: E402
+
+# Columns read by compute_features, as spelled in the API / agent profiles.
+FEATURE_FIELDS = ("Num_of_Delayed_Payment", "Delay_from_due_date", "Credit_Utilization_Ratio",
+                  "Outstanding_Debt", "Num_Credit_Card")
+# Applicant id column, in order of preference (generate_credit_data.py writes ENTITY_ID).
+ID_COLUMNS = ("ssn", "entity_id", "name")
+OUTPUT_HEADER = ["row", "applicant_id", "credit_score", "band",
+                 "repayment", "utilization", "outstanding", "inquiries", "error"]
+
+
+def _column_map(header: List[str]) -> Tuple[Dict[str, int], Optional[int]]:
+    """Positions of the feature columns (matched case-insensitively) and the id column."""
+    lower = {name.strip().lower(): i for i, name in enumerate(header)}
+    missing = [f for f in FEATURE_FIELDS if f.lower() not in lower]
+    if missing:
+        raise SystemExit(f"input is missing columns: {', '.join(m.lower() for m in missing)}")
+    id_col = next((lower[c] for c in ID_COLUMNS if c in lower), None)
+    return {f: lower[f.lower()] for f in FEATURE_FIELDS}, id_col
+
+
+def _score_chunk(task: Tuple[int, Dict[str, int], Optional[int], List[List[str]]]) -> Tuple[int, str]:
+    """Score one chunk; returns (number of rows, CSV text)."""
+    first_row, columns, id_col, rows = task
+    profiles = [{f: (r[i] if i < len(r) else None) for f, i in columns.items()} for r in rows]
+    features = compute_features_batch(profiles)
+    bands = bands_for(features["credit_score"])
+    invalid = features["invalid"]
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for j, row in enumerate(rows):
+        applicant = row[id_col] if id_col is not None and id_col < len(row) else ""
+        if invalid[j]:
+            writer.writerow([first_row + j, applicant, "", "", "", "", "", "", "non-finite input"])
+            continue
+        writer.writerow([first_row + j, applicant, features["credit_score"][j], bands[j],
+                         features["repayment"][j], features["utilization"][j],
+                         features["outstanding"][j], features["inquiries"][j], ""])
+    return len(rows), out.getvalue()
+
+
+def _chunks(reader: Iterator[List[str]], size: int) -> Iterator[List[List[str]]]:
+    while True:
+        chunk = list(itertools.islice(reader, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _load_checkpoint(path: str, source: str, chunk_size: int) -> Dict[str, Any]:
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("input") != os.path.abspath(source) or state.get("chunk_size") != chunk_size:
+        raise SystemExit(f"checkpoint {path} was written for a different input or --chunk-size")
+    return state
+
+
+def _save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)  # atomic: a crash leaves the old or the new checkpoint
+
+
+def score_portfolio(source: str, output: str, chunk_size: int = 20000, workers: int = 0,
+                    resume: bool = False, report_every: float = 5.0) -> Dict[str, Any]:
+    workers = workers or os.cpu_count() or 1
+    ckpt = output + ".ckpt"
+    state = {"input": os.path.abspath(source), "chunk_size": chunk_size,
+             "chunks_done": 0, "rows_done": 0, "output_bytes": 0}
+    if resume and os.path.exists(ckpt):
+        state = _load_checkpoint(ckpt, source, chunk_size)
+        print(f"Resuming after chunk {state['chunks_done']} ({state['rows_done']} rows)")
+
+    with open(source, newline="") as src, open(output, "r+b" if state["output_bytes"] else "wb") as dst:
+        reader = csv.reader(src)
+        header = next(reader, None)  # None: empty file, scored as zero rows
+        columns, id_col = _column_map(header) if header is not None else ({}, None)
+        if state["output_bytes"]:
+            dst.truncate(state["output_bytes"])  # drop rows written after the last checkpoint
+            dst.seek(state["output_bytes"])
+            for _ in itertools.islice(reader, state["rows_done"]):
+                pass
+        else:
+            dst.write((",".join(OUTPUT_HEADER) + "\r\n").encode())
+
+        base = state["rows_done"]
+        tasks = ((base + n * chunk_size, columns, id_col, rows)
+                 for n, rows in enumerate(_chunks(reader, chunk_size)))
+        started = last_report = time.perf_counter()
+        scored = 0
+
+        def commit(count: int, text: str) -> None:
+            nonlocal scored, last_report
+            dst.write(text.encode())
+            dst.flush()
+            os.fsync(dst.fileno())
+            scored += count
+            state["chunks_done"] += 1
+            state["rows_done"] += count
+            state["output_bytes"] = dst.tell()
+            _save_checkpoint(ckpt, state)
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                last_report = now
+                print(f"  {state['rows_done']:,} rows  {scored / (now - started):,.0f} rows/s")
+
+        if workers == 1:
+            for task in tasks:
+                commit(*_score_chunk(task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                window: deque = deque()
+                for task in tasks:
+                    window.append(pool.submit(_score_chunk, task))
+                    if len(window) >= 2 * workers:  # bounded read-ahead
+                        commit(*window.popleft().result())
+                while window:
+                    commit(*window.popleft().result())
+
+    elapsed = time.perf_counter() - started
+    rate = scored / elapsed if elapsed else 0.0
+    print(f"Scored {scored:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s); "
+          f"{state['rows_done']:,} rows in {output}")
+    if os.path.exists(ckpt):  # no chunk, no checkpoint (header-only input)
+        os.remove(ckpt)
+    return {"rows": scored, "total_rows": state["rows_done"], "seconds": elapsed, "rows_per_s": rate}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("input", help="portfolio CSV (lowercase feature columns)")
+    ap.add_argument("output", help="scores CSV to write")
+    ap.add_argument("--chunk-size", type=int, default=20000)
+    ap.add_argument("--workers", type=int, default=0, help="processes (default: CPU count)")
+    ap.add_argument("--resume", action="store_true", help="continue from <output>.ckpt")
+    args = ap.parse_args()
+    score_portfolio(args.input, args.output, args.chunk_size, args.workers, args.resume)
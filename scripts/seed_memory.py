@@ -28,7 +28,7 @@ load_dotenv(_ROOT / ".env")
 load_dotenv(_ROOT / "backend" / ".env", override=True)
 
 from src.agent.credit_agent import applicant_narrative, band_for, compute_features  # noqa: E402
-from src.memory.embeddings import active_provider, embed_text  # noqa: E402
+from src.memory.embeddings import active_provider, embed_many  # noqa: E402
 from src.memory.long_term import LongTermMemory  # noqa: E402
 
 OCCUPATIONS = ["Teacher", "Engineer", "Nurse", "Analyst", "Driver", "Designer",
@@ -84,9 +84,10 @@ def seed(count: int) -> None:
     n_pol = mem.upsert_policies(policies)
     print(f"Upserted {n_pol} policies.")
 
-    # Applicants -> decisions (write-back)
-    for i in range(count):
-        profile = _make_applicant(faker, i)
+    # Applicants -> decisions (write-back), embedded in provider-sized batches
+    profiles = [_make_applicant(faker, i) for i in range(count)]
+    embeddings = embed_many([applicant_narrative(p) for p in profiles])
+    for profile, emb in zip(profiles, embeddings):
         features = compute_features(profile)
         band = band_for(features["credit_score"])
         record = dict(profile)
@@ -97,13 +98,13 @@ def seed(count: int) -> None:
             "summary": f"Seed decision for {profile['Name']}: band {band}.",
             **{k: features[k] for k in ("repayment", "utilization", "outstanding", "inquiries")},
         })
-        emb = embed_text(applicant_narrative(profile))
         mem.store_decision(record, embedding=emb)
 
     print(f"Seeded {count} decisions into '{mem.backend}' backend.")
-    if mem.backend == "in-memory":
+    if mem.backend == "in-memory" and not os.getenv("MEMORY_STORE_PATH"):
         print("NOTE: no MONGODB_URI set — data lived only for this process. "
-              "Set MONGODB_URI to persist into Atlas.")
+              "Set MONGODB_URI to persist into Atlas, or MEMORY_STORE_PATH to keep "
+              "decisions on local disk.")
 
 
 if __name__ == "__main__":
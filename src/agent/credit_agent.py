@@ -18,12 +18,20 @@ for rehearsal and tests.
 """
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from src.memory.embeddings import active_provider, embed_text
+import numpy as np
+
+from src import metrics
+from src.memory.embeddings import active_provider, aembed_text, embed_many, embed_text
+from src.llm.guard import get_guarded_llm
 from src.memory.long_term import LongTermMemory, get_memory
 
+from .explanations import ExplanationQueue, explanation_queue_from_env
+from .rationale_cache import Key, RationaleCache, get_rationale_cache
 from .session import SessionMemory, get_session_memory
 
 
@@ -69,6 +77,62 @@ def band_for(score: int) -> str:
     return "Decline"
 
 
+def _column(profiles: List[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.array([_to_float(p.get(key)) for p in profiles], dtype=np.float64)
+
+
+def _int_column(profiles: List[Dict[str, Any]], key: str) -> np.ndarray:
+    # _to_int semantics: truncate toward zero, NaN -> 0 (infinities are left
+    # for the caller: int() raises on them).
+    col = _column(profiles, key)
+    return np.where(np.isnan(col), 0.0, np.trunc(col))
+
+
+def _py_floordiv(col: np.ndarray, d: int) -> np.ndarray:
+    # Python's float // gives NaN for infinite operands; NumPy gives +-inf.
+    with np.errstate(invalid="ignore"):
+        return np.where(np.isfinite(col), np.floor_divide(col, d), np.nan)
+
+
+def compute_features_batch(profiles: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """:func:`compute_features` over NumPy columns (same values, row for row).
+
+    ``invalid`` flags rows :func:`compute_features` would reject (infinite
+    inputs that survive to ``int()``); their feature values are zero.
+    """
+    delays = _int_column(profiles, "Num_of_Delayed_Payment")
+    days = _int_column(profiles, "Delay_from_due_date")
+    cards = _int_column(profiles, "Num_Credit_Card")
+    ratio = _column(profiles, "Credit_Utilization_Ratio")
+    debt = _column(profiles, "Outstanding_Debt")
+    invalid = np.isinf(delays) | np.isinf(days) | np.isinf(cards)
+    with np.errstate(invalid="ignore"):
+        # fmax drops NaN like Python's max(0, nan) -> 0.
+        repayment = np.fmax(0, 30 - delays - _py_floordiv(days, 10))
+        utilization = np.fmax(0, 30 - _py_floordiv(ratio, 3))
+        outstanding = np.fmax(0, 30 - debt / 1000)
+        inquiries = np.fmax(0, 30 - cards)
+        credit_score = np.minimum(850, 500 + repayment + utilization + outstanding + inquiries)
+    out = {
+        "repayment": repayment,
+        "utilization": utilization,
+        "outstanding": outstanding,
+        "inquiries": inquiries,
+        "credit_score": np.round(credit_score),
+    }
+    for col in out.values():
+        invalid |= ~np.isfinite(col)
+    for key, col in out.items():
+        out[key] = np.where(invalid, 0, np.trunc(col)).astype(np.int64)
+    out["invalid"] = invalid
+    return out
+
+
+def bands_for(scores: np.ndarray) -> np.ndarray:
+    """:func:`band_for` over an array of scores."""
+    return np.where(scores >= 720, "Approve", np.where(scores >= 640, "Review", "Decline"))
+
+
 def applicant_narrative(profile: Dict[str, Any]) -> str:
     return (
         f"{profile.get('Name', 'Applicant')} is a {profile.get('Age', '?')}-year-old "
@@ -109,14 +173,8 @@ def _deterministic_rationale(profile: Dict[str, Any], features: Dict[str, int],
     )
 
 
-def _llm_rationale(profile: Dict[str, Any], features: Dict[str, int], band: str,
-                   similar: List[Dict[str, Any]], policies: List[Dict[str, Any]]) -> Optional[str]:
-    """Try the Bedrock LLM with retrieved context; return None on any failure."""
-    try:
-        from src.llm.service import summarize_credit_profile
-    except Exception:
-        return None
-
+def _rationale_prompt(profile: Dict[str, Any], features: Dict[str, int], band: str,
+                      similar: List[Dict[str, Any]], policies: List[Dict[str, Any]]) -> str:
     similar_txt = "\n".join(
         f"- {s.get('applicant_id', s.get('_id'))}: band {s.get('band')}, "
         f"score {s.get('credit_score')}" for s in similar[:3]
@@ -147,21 +205,81 @@ Write a concise markdown risk assessment with headings Summary, Key Strengths,
 Areas of Concern, and Recommendations. Explicitly reference the comparable cases
 and the policy you were given. Do not ask the user any questions.
 """
-    try:
-        return summarize_credit_profile(prompt)
-    except Exception as exc:  # pragma: no cover - network dependent
-        print(f"[agent] LLM rationale failed ({exc}); using deterministic fallback")
-        return None
+    return prompt
+
+
+def _llm_rationale(profile: Dict[str, Any], features: Dict[str, int], band: str,
+                   similar: List[Dict[str, Any]], policies: List[Dict[str, Any]]) -> Optional[str]:
+    """The LLM rationale via the guarded client (in-flight cap, deadline,
+    circuit breaker); ``None`` whenever the LLM is skipped or fails."""
+    return get_guarded_llm().summarize(_rationale_prompt(profile, features, band, similar, policies))
+
+
+async def _allm_rationale(profile: Dict[str, Any], features: Dict[str, int], band: str,
+                          similar: List[Dict[str, Any]], policies: List[Dict[str, Any]]) -> Optional[str]:
+    """Async :func:`_llm_rationale`."""
+    return await get_guarded_llm().asummarize(_rationale_prompt(profile, features, band, similar, policies))
+
+
+async def _astream_rationale(profile: Dict[str, Any], features: Dict[str, int], band: str,
+                             similar: List[Dict[str, Any]],
+                             policies: List[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Rationale text chunks as the LLM produces them; empty when the LLM is
+    skipped or fails first, raises if it fails mid-stream."""
+    async for chunk in get_guarded_llm().astream(_rationale_prompt(profile, features, band, similar, policies)):
+        yield chunk
+
+
+def _applicant_id(profile: Dict[str, Any]) -> str:
+    return str(profile.get("ssn") or profile.get("Name"))
 
 
 class CreditAgent:
     def __init__(self, memory: Optional[LongTermMemory] = None,
-                 session: Optional[SessionMemory] = None) -> None:
+                 session: Optional[SessionMemory] = None,
+                 rationale_cache: Optional[RationaleCache] = None) -> None:
         self.memory = memory or get_memory()
         self.session = session or get_session_memory()
-
-    def evaluate(self, profile: Dict[str, Any], top_k: int = 3,
-                 store: bool = True) -> Dict[str, Any]:
+        self.rationale_cache = rationale_cache or get_rationale_cache()
+        self._explanations: Optional[ExplanationQueue] = None
+        self._explanations_lock = threading.Lock()
+        # Per-stage latencies in every result's meta.timings_ms (always in /metrics).
+        self.meta_timings = os.getenv("META_TIMINGS", "").strip().lower() in ("1", "on", "true", "yes")
+
+    @property
+    def explanations(self) -> ExplanationQueue:
+        """Deferred-explanation job queue (started on first use, or at API
+        startup when ``EXPLAIN_SPOOL_PATH`` is set so spooled jobs resume)."""
+        with self._explanations_lock:
+            if self._explanations is None:
+                self._explanations = explanation_queue_from_env(self._explain_job)
+            return self._explanations
+
+    def explanation_stats(self) -> Optional[Dict[str, Any]]:
+        """Queue depth and job counters, or ``None`` until the queue is started."""
+        queue = self._explanations
+        return queue.stats() if queue is not None else None
+
+    def close(self) -> None:
+        """Stop explanation workers (pending jobs stay spooled); call before
+        closing the memory they patch."""
+        with self._explanations_lock:
+            if self._explanations is not None:
+                self._explanations.close()
+
+    def evaluate(self, profile: Dict[str, Any], top_k: int = 3, store: bool = True,
+                 filters: Optional[Dict[str, Any]] = None,
+                 defer_explanation: bool = False,
+                 timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Run the loop for one applicant.
+
+        With ``defer_explanation`` the LLM is not awaited: the result carries
+        the deterministic rationale and ``explanation.job_id``, and a background
+        worker patches the stored decision once the LLM rationale is ready.
+        Stage latencies are added to ``timings`` (which may already hold the
+        caller's own, e.g. ``screening``).
+        """
+        timings = {} if timings is None else timings
         sid = self.session.create_session()
         try:
             # 1. Reason: deterministic features
@@ -171,72 +289,382 @@ class CreditAgent:
 
             # 2. Retrieve (RAG): embed + vector search over memory + policies
             narrative = applicant_narrative(profile)
-            query_vec = embed_text(narrative)
-            similar = self.memory.similar_decisions(
-                query_vec, k=top_k, exclude_applicant=str(profile.get("ssn") or profile.get("Name"))
-            )
-            policies = self.memory.similar_policies(query_vec, k=2)
+            with metrics.stage("embed", timings):
+                query_vec = embed_text(narrative)
+            with metrics.stage("similar_decisions", timings):
+                similar = self.memory.similar_decisions(
+                    query_vec, k=top_k, exclude_applicant=str(profile.get("ssn") or profile.get("Name")),
+                    filters=filters,
+                )
+            with metrics.stage("similar_policies", timings):
+                policies = self.memory.similar_policies(query_vec, k=2)
             self.session.remember(sid, "retrieved", {"similar": len(similar), "policies": len(policies)})
 
-            # 3. Explain: cited rationale (LLM, deterministic fallback)
-            rationale = _llm_rationale(profile, features, band, similar, policies)
+            # 3. Explain: cited rationale (cache, LLM, deterministic fallback)
+            key, rationale, stamp = self._cached_rationale(profile, band, features, similar, policies, query_vec)
+            deferred = defer_explanation and rationale is None
+            if rationale is None and not deferred:
+                with metrics.stage("llm", timings):
+                    rationale = _llm_rationale(profile, features, band, similar, policies)
+                stamp = self._cache_rationale(key, rationale, query_vec)
             used_llm = rationale is not None
             if rationale is None:
                 rationale = _deterministic_rationale(profile, features, band, similar, policies)
 
             recommendations = self._recommendations(profile)
-
-            result = {
-                "status": "ok",
-                "applicant_id": str(profile.get("ssn") or profile.get("Name")),
-                "credit_score_estimate": features["credit_score"],
-                "band": band,
-                "repayment": features["repayment"],
-                "utilization": features["utilization"],
-                "outstanding": features["outstanding"],
-                "inquiries": features["inquiries"],
-                "summary": rationale,
-                "recommendations": recommendations
-                or ["Maintain current credit habits for gradual improvement."],
-                "similar_cases": [
-                    {
-                        "id": s.get("_id"),
-                        "applicant_id": s.get("applicant_id"),
-                        "band": s.get("band"),
-                        "credit_score": s.get("credit_score"),
-                        "score": s.get("score"),
-                    }
-                    for s in similar
-                ],
-                "policies_cited": [
-                    {"policy_id": p.get("policy_id"), "title": p.get("title")} for p in policies
-                ],
-                "meta": {
-                    "embedding_provider": active_provider(),
-                    "memory_backend": self.memory.backend,
-                    "session_backend": self.session.backend,
-                    "reasoning": "bedrock-llm" if used_llm else "deterministic-fallback",
-                },
-            }
+            result = self._result(profile, features, band, rationale, recommendations,
+                                  similar, policies, used_llm, stamp)
 
             # 4. Write-back: persist decision + embedding for next time
             if store:
-                record = dict(profile)
-                record.update({
-                    "applicant_id": result["applicant_id"],
-                    "credit_score": features["credit_score"],
-                    "band": band,
-                    "summary": rationale,
-                    "recommendations": recommendations,
-                    **{k: features[k] for k in ("repayment", "utilization", "outstanding", "inquiries")},
-                })
-                decision_id = self.memory.store_decision(record, embedding=query_vec)
+                record = self._record(profile, result["applicant_id"], features, band,
+                                      rationale, recommendations, stamp)
+                with metrics.stage("store", timings):
+                    decision_id = self.memory.store_decision(record, embedding=query_vec)
                 result["decision_id"] = decision_id
 
-            return result
+            if deferred:
+                self._defer(result, profile, features, band, similar, policies, query_vec)
+            return self._finish(result, timings)
+        finally:
+            self.session.close(sid)
+
+    async def aevaluate(self, profile: Dict[str, Any], top_k: int = 3, store: bool = True,
+                        filters: Optional[Dict[str, Any]] = None,
+                        defer_explanation: bool = False,
+                        timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Async :meth:`evaluate` for the ``async def`` API route.
+
+        Same loop and result, but nothing blocks the event loop: the decision
+        and policy searches run concurrently once the query is embedded, and the
+        write-back and recommendations overlap the LLM explanation. The decision
+        is stored with the deterministic rationale and patched with the LLM one
+        when it arrives (``update_decision``). Overlapping stages are timed
+        individually, so ``timings`` can add up to more than the wall time.
+        """
+        timings = {} if timings is None else timings
+        sid = self.session.create_session()  # session calls only buffer; safe on the loop
+        try:
+            features = compute_features(profile)
+            band = band_for(features["credit_score"])
+            applicant_id = str(profile.get("ssn") or profile.get("Name"))
+            self.session.remember(sid, "features", features)
+
+            with metrics.stage("embed", timings):
+                query_vec = await aembed_text(applicant_narrative(profile))
+            similar, policies = await asyncio.gather(
+                metrics.timed_stage("similar_decisions", self.memory.asimilar_decisions(
+                    query_vec, k=top_k, exclude_applicant=applicant_id, filters=filters), timings),
+                metrics.timed_stage("similar_policies", self.memory.asimilar_policies(query_vec, k=2), timings),
+            )
+            self.session.remember(sid, "retrieved", {"similar": len(similar), "policies": len(policies)})
+
+            key, cached, stamp = self._cached_rationale(profile, band, features, similar, policies, query_vec)
+            explanation = None
+            deferred = defer_explanation and cached is None
+            if cached is None and not deferred:
+                explanation = asyncio.create_task(metrics.timed_stage(
+                    "llm", _allm_rationale(profile, features, band, similar, policies), timings))
+            fallback = cached or _deterministic_rationale(profile, features, band, similar, policies)
+            recommendations = self._recommendations(profile)
+            stored = None
+            if store:
+                record = self._record(profile, applicant_id, features, band, fallback, recommendations, stamp)
+                stored = asyncio.create_task(metrics.timed_stage(
+                    "store", self.memory.astore_decision(record, embedding=query_vec), timings))
+
+            rationale = cached
+            if explanation is not None:
+                rationale = await explanation
+                stamp = self._cache_rationale(key, rationale, query_vec)
+            used_llm = rationale is not None
+            result = self._result(profile, features, band, rationale or fallback, recommendations,
+                                  similar, policies, used_llm, stamp)
+            if stored is not None:
+                result["decision_id"] = await stored
+                if explanation is not None and used_llm:
+                    patch: Dict[str, Any] = {"summary": rationale}
+                    if stamp:
+                        patch["rationale_cache"] = stamp
+                    await self.memory.aupdate_decision(result["decision_id"], patch)
+            if deferred:
+                await asyncio.to_thread(self._defer, result, profile, features, band,
+                                        similar, policies, query_vec)
+            return self._finish(result, timings)
+        finally:
+            self.session.close(sid)
+
+    async def astream_evaluate(self, profile: Dict[str, Any], top_k: int = 3, store: bool = True,
+                               filters: Optional[Dict[str, Any]] = None,
+                               timings: Optional[Dict[str, float]] = None
+                               ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """:meth:`aevaluate` as a stream of ``(event, data)`` pairs.
+
+        * ``result`` - score, band, similar cases and policies, sent as soon as
+          retrieval finishes (``summary`` is omitted, it is still being written);
+        * ``token``  - ``{"text": ...}`` rationale chunks as the LLM streams them
+          (one chunk for a cached or deterministic rationale);
+        * ``done``   - the complete ``summary``, ``meta`` and, after the
+          write-back, ``decision_id``. If the LLM fails mid-stream, ``summary``
+          is the deterministic rationale and replaces the streamed text.
+        """
+        timings = {} if timings is None else timings
+        sid = self.session.create_session()
+        try:
+            features = compute_features(profile)
+            band = band_for(features["credit_score"])
+            applicant_id = _applicant_id(profile)
+            with metrics.stage("embed", timings):
+                query_vec = await aembed_text(applicant_narrative(profile))
+            similar, policies = await asyncio.gather(
+                metrics.timed_stage("similar_decisions", self.memory.asimilar_decisions(
+                    query_vec, k=top_k, exclude_applicant=applicant_id, filters=filters), timings),
+                metrics.timed_stage("similar_policies", self.memory.asimilar_policies(query_vec, k=2), timings),
+            )
+            self.session.remember(sid, "retrieved", {"similar": len(similar), "policies": len(policies)})
+            key, cached, stamp = self._cached_rationale(profile, band, features, similar, policies, query_vec)
+            fallback = cached or _deterministic_rationale(profile, features, band, similar, policies)
+            recommendations = self._recommendations(profile)
+            stored = None
+            if store:
+                record = self._record(profile, applicant_id, features, band, fallback, recommendations, stamp)
+                stored = asyncio.create_task(metrics.timed_stage(
+                    "store", self.memory.astore_decision(record, embedding=query_vec), timings))
+
+            result = self._result(profile, features, band, fallback, recommendations,
+                                  similar, policies, cached is not None, stamp)
+            yield "result", {k: v for k, v in result.items() if k not in ("summary", "meta")}
+
+            rationale = cached
+            if cached is not None:
+                yield "token", {"text": cached}
+            else:
+                parts: List[str] = []
+                try:
+                    with metrics.stage("llm", timings):
+                        async for chunk in _astream_rationale(profile, features, band, similar, policies):
+                            parts.append(chunk)
+                            yield "token", {"text": chunk}
+                        rationale = "".join(parts) or None
+                except Exception as exc:  # pragma: no cover - network dependent
+                    print(f"[agent] LLM stream failed ({exc}); using deterministic fallback")
+                if rationale is None and not parts:
+                    yield "token", {"text": fallback}
+                stamp = self._cache_rationale(key, rationale, query_vec)
+
+            used_llm = rationale is not None
+            result = self._result(profile, features, band, rationale or fallback, recommendations,
+                                  similar, policies, used_llm, stamp)
+            done: Dict[str, Any] = {"summary": result["summary"], "meta": result["meta"]}
+            if stored is not None:
+                done["decision_id"] = await stored
+                if cached is None and used_llm:
+                    patch: Dict[str, Any] = {"summary": rationale}
+                    if stamp:
+                        patch["rationale_cache"] = stamp
+                    await self.memory.aupdate_decision(done["decision_id"], patch)
+            self._finish(result, timings)
+            yield "done", done
         finally:
             self.session.close(sid)
 
+    def evaluate_many(self, profiles: List[Dict[str, Any]], top_k: int = 3, store: bool = True,
+                      filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Score a batch of applicants; results keep the input order.
+
+        Features are computed over NumPy columns, narratives are embedded in
+        batched provider calls, decision retrieval runs as one matrix product
+        (or pipelined Atlas queries) and the write-back is a single bulk insert.
+        Rationales are deterministic - no per-row LLM call. Applicants in the
+        batch are not retrieved as neighbours of each other. A row that fails
+        yields ``{"status": "error", ...}`` instead of failing the batch.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(profiles)
+        if not profiles:
+            return []
+
+        def fail(i: int, exc: Exception) -> None:
+            results[i] = {"status": "error", "applicant_id": _applicant_id(profiles[i]),
+                          "error": f"{type(exc).__name__}: {exc}"}
+
+        sid = self.session.create_session()
+        try:
+            features = compute_features_batch(profiles)
+            invalid = features.pop("invalid")
+            bands = bands_for(features["credit_score"])
+            narratives = []
+            for i, profile in enumerate(profiles):
+                try:
+                    if invalid[i]:
+                        raise OverflowError("cannot convert float infinity to integer")
+                    narratives.append(applicant_narrative(profile))
+                except Exception as exc:
+                    fail(i, exc)
+                    narratives.append("")
+            live = [i for i in range(len(profiles)) if results[i] is None]
+            with metrics.stage("embed_batch"):
+                vectors = embed_many([narratives[i] for i in live])
+            with metrics.stage("similar_decisions_batch"):
+                similar = self.memory.similar_decisions_many(
+                    vectors, k=top_k, exclude_applicants=[_applicant_id(profiles[i]) for i in live],
+                    filters=filters)
+            self.session.remember(sid, "batch", {"applicants": len(profiles), "scored": len(live)})
+
+            records, stored = [], []
+            for slot, i in enumerate(live):
+                try:
+                    profile = profiles[i]
+                    row = {k: int(v[i]) for k, v in features.items()}
+                    band = str(bands[i])
+                    policies = self.memory.similar_policies(vectors[slot], k=2)
+                    rationale = _deterministic_rationale(profile, row, band, similar[slot], policies)
+                    recommendations = self._recommendations(profile)
+                    results[i] = self._result(profile, row, band, rationale, recommendations,
+                                              similar[slot], policies, False)
+                    if store:
+                        records.append(self._record(profile, results[i]["applicant_id"], row, band,
+                                                    rationale, recommendations))
+                        stored.append((i, vectors[slot]))
+                except Exception as exc:
+                    fail(i, exc)
+            if records:
+                try:
+                    with metrics.stage("store_batch"):
+                        ids = self.memory.store_decisions(records, embeddings=[v for _, v in stored])
+                    for (i, _), decision_id in zip(stored, ids):
+                        results[i]["decision_id"] = decision_id
+                except Exception as exc:  # pragma: no cover - defensive
+                    print(f"[agent] batch write-back failed ({exc})")
+                    for i, _ in stored:
+                        results[i]["write_back_error"] = str(exc)
+            scored = sum(1 for r in results if r is not None and r["status"] == "ok")
+            metrics.inc("rationales_total", {"source": "deterministic-fallback"}, scored)
+            return results  # type: ignore[return-value]
+        finally:
+            self.session.close(sid)
+
+    def _defer(self, result: Dict[str, Any], profile: Dict[str, Any], features: Dict[str, int],
+               band: str, similar: List[Dict[str, Any]], policies: List[Dict[str, Any]],
+               query_vec: List[float]) -> None:
+        """Queue the LLM explanation for ``result`` and record the job on it."""
+        payload: Dict[str, Any] = {
+            "profile": profile, "features": features, "band": band,
+            "similar": similar, "policies": policies, "decision_id": result.get("decision_id"),
+        }
+        if self.rationale_cache is not None and self.rationale_cache.min_similarity > 0:
+            payload["query"] = list(query_vec)
+        job_id = self.explanations.submit(payload)
+        if job_id is None:
+            result["explanation"] = {"status": "skipped", "reason": "explanation queue full"}
+            return
+        result["explanation"] = {"job_id": job_id, "status": "queued"}
+        result["meta"]["reasoning"] = "deferred"
+
+    def _explain_job(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Worker body for a deferred explanation: LLM rationale, then patch the decision."""
+        profile, features, band = payload["profile"], payload["features"], payload["band"]
+        similar, policies = payload["similar"], payload["policies"]
+        rationale = _llm_rationale(profile, features, band, similar, policies)
+        if rationale is None:
+            # The stored decision already carries the deterministic rationale.
+            return {"summary": _deterministic_rationale(profile, features, band, similar, policies),
+                    "reasoning": "deterministic-fallback", "decision_id": payload.get("decision_id")}
+        stamp = None
+        if self.rationale_cache is not None:
+            key = self.rationale_cache.key(profile, band, features, policies, similar)
+            stamp = self._cache_rationale(key, rationale, payload.get("query") or [])
+        if payload.get("decision_id"):
+            patch: Dict[str, Any] = {"summary": rationale}
+            if stamp:
+                patch["rationale_cache"] = stamp
+            self.memory.update_decision(payload["decision_id"], patch)
+        return {"summary": rationale, "reasoning": "bedrock-llm", "decision_id": payload.get("decision_id")}
+
+    def _finish(self, result: Dict[str, Any], timings: Dict[str, float]) -> Dict[str, Any]:
+        """Count the rationale source and, with ``META_TIMINGS``, report the stage timings."""
+        stamp = result["meta"].get("rationale_cache")
+        source = "cache" if stamp and stamp.get("hit") else result["meta"]["reasoning"]
+        metrics.inc("rationales_total", {"source": source})
+        if self.meta_timings:
+            result["meta"]["timings_ms"] = {k: round(v, 3) for k, v in timings.items()}
+        return result
+
+    def _cached_rationale(self, profile: Dict[str, Any], band: str, features: Dict[str, int],
+                          similar: List[Dict[str, Any]], policies: List[Dict[str, Any]],
+                          query_vec: List[float]) -> Tuple[Optional[Key], Optional[str], Optional[Dict[str, Any]]]:
+        """``(cache key, cached rationale, audit stamp)``; all ``None`` with the cache off."""
+        if self.rationale_cache is None:
+            return None, None, None
+        key = self.rationale_cache.key(profile, band, features, policies, similar)
+        hit = self.rationale_cache.get(key, query_vec)
+        if hit is None:
+            return key, None, None
+        return key, hit[0], hit[1]
+
+    def _cache_rationale(self, key: Optional[Key], rationale: Optional[str],
+                         query_vec: List[float]) -> Optional[Dict[str, Any]]:
+        """Cache a fresh LLM rationale; the stamp lets auditors match later reuses."""
+        if key is None or rationale is None or self.rationale_cache is None:
+            return None
+        return {"hit": False, "entry": self.rationale_cache.put(key, rationale, query_vec)}
+
+    def _result(self, profile: Dict[str, Any], features: Dict[str, int], band: str,
+                rationale: str, recommendations: List[str], similar: List[Dict[str, Any]],
+                policies: List[Dict[str, Any]], used_llm: bool,
+                cache_stamp: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        result = {
+            "status": "ok",
+            "applicant_id": _applicant_id(profile),
+            "credit_score_estimate": features["credit_score"],
+            "band": band,
+            "repayment": features["repayment"],
+            "utilization": features["utilization"],
+            "outstanding": features["outstanding"],
+            "inquiries": features["inquiries"],
+            "summary": rationale,
+            "recommendations": recommendations
+            or ["Maintain current credit habits for gradual improvement."],
+            "similar_cases": [
+                {
+                    "id": s.get("_id"),
+                    "applicant_id": s.get("applicant_id"),
+                    "band": s.get("band"),
+                    "credit_score": s.get("credit_score"),
+                    "score": s.get("score"),
+                }
+                for s in similar
+            ],
+            "policies_cited": [
+                {"policy_id": p.get("policy_id"), "title": p.get("title")} for p in policies
+            ],
+            "meta": {
+                "embedding_provider": active_provider(),
+                "memory_backend": self.memory.backend,
+                "session_backend": self.session.backend,
+                "reasoning": "bedrock-llm" if used_llm else "deterministic-fallback",
+            },
+        }
+        if cache_stamp:
+            result["meta"]["rationale_cache"] = cache_stamp
+        return result
+
+    @staticmethod
+    def _record(profile: Dict[str, Any], applicant_id: str, features: Dict[str, int], band: str,
+                rationale: str, recommendations: List[str],
+                cache_stamp: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        record = dict(profile)
+        record.update({
+            "applicant_id": applicant_id,
+            "credit_score": features["credit_score"],
+            "band": band,
+            "summary": rationale,
+            "recommendations": recommendations,
+            **{k: features[k] for k in ("repayment", "utilization", "outstanding", "inquiries")},
+        })
+        if cache_stamp:
+            record["rationale_cache"] = cache_stamp
+        return record
+
     @staticmethod
     def _recommendations(profile: Dict[str, Any]) -> List[str]:
         recs = []
@@ -250,10 +678,13 @@ class CreditAgent:
 
 
 _DEFAULT: Optional[CreditAgent] = None
+_DEFAULT_LOCK = threading.Lock()
 
 
 def get_agent() -> CreditAgent:
+    """Process-wide agent; built (MongoDB pool, session backend) on first call."""
     global _DEFAULT
-    if _DEFAULT is None:
-        _DEFAULT = CreditAgent()
-    return _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = CreditAgent()
+        return _DEFAULT
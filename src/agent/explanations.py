@@ -0,0 +1,251 @@
+"""Deferred explanation jobs: the decision now, the narrative later.
+
+``CreditAgent.evaluate(..., defer_explanation=True)`` returns the score, band
+and retrieval results straight away with the deterministic rationale and an
+explanation job ID. A bounded pool of worker threads then asks the LLM for the
+rationale and patches the stored decision (``update_decision``).
+
+* **Bounded** - at most ``EXPLAIN_QUEUE_MAX`` jobs wait; ``submit`` returns
+  ``None`` when full and the caller keeps the deterministic rationale.
+* **Spool** - with ``EXPLAIN_SPOOL_PATH`` set, jobs are written to a local
+  SQLite file on submit and re-queued on the next start if they had not
+  finished, so a restart does not lose pending explanations.
+* **Polling** - :meth:`ExplanationQueue.status` (``GET /explanations/{job_id}``)
+  reports ``queued`` / ``running`` / ``done`` / ``failed`` and, when done, the
+  rationale. :meth:`ExplanationQueue.stats` gives the queue depth.
+
+Configuration:
+
+    EXPLAIN_WORKERS=4
+    EXPLAIN_QUEUE_MAX=10000
+    EXPLAIN_SPOOL_PATH=               e.g. .cache/explanations.sqlite; blank = in-process only
+    EXPLAIN_JOBS_KEEP=10000           finished jobs kept for polling (oldest dropped)
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+_STOP = object()
+
+
+def _env(name: str, default: str = "") -> str:
+    return (os.getenv(name) or default).strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+class ExplanationQueue:
+    def __init__(self, handler: Callable[[Dict[str, Any]], Dict[str, Any]], workers: int = 4,
+                 max_queue: int = 10000, spool_path: Optional[str] = None,
+                 keep_finished: int = 10000) -> None:
+        self._handler = handler
+        self.spool_path = spool_path or None
+        self.keep_finished = max(1, keep_finished)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._closed = False
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "recovered": 0}
+        self._recover()
+        self._threads = [threading.Thread(target=self._run, name=f"explain-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+        for thread in self._threads:
+            thread.start()
+
+    # ------------------------------------------------------------------ #
+    def submit(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Queue a job; returns its ID, or ``None`` when the queue is full or closed."""
+        if self._closed:
+            return None
+        job_id = uuid.uuid4().hex
+        job = {"job_id": job_id, "status": "queued", "created": time.time(),
+               "decision_id": payload.get("decision_id")}
+        with self._lock:
+            self._jobs[job_id] = job
+            self._spool_put(job_id, payload)
+        try:
+            self._queue.put_nowait((job_id, payload))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self._spool_delete(job_id)
+                self._stats["rejected"] += 1
+            return None
+        with self._lock:
+            self._stats["submitted"] += 1
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._spool_status(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            queued = [j["created"] for j in self._jobs.values() if j["status"] == "queued"]
+            running = sum(1 for j in self._jobs.values() if j["status"] == "running")
+            return dict(self._stats, depth=self._queue.qsize(), running=running,
+                        workers=len(self._threads),
+                        oldest_queued_s=round(now - min(queued), 3) if queued else 0.0,
+                        spool=bool(self.spool_path))
+
+    def drain(self) -> None:
+        """Block until every queued job has finished."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Stop the workers after their current job; queued jobs stay spooled."""
+        if self._closed:
+            return
+        self._closed = True
+        while True:  # unqueued jobs are recovered from the spool on next start
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+            except queue.Empty:
+                break
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    # ------------------------------------------------------------------ #
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            job_id, payload = item
+            with self._lock:
+                job = self._jobs.setdefault(job_id, {"job_id": job_id, "created": time.time()})
+                job.update(status="running", started=time.time())
+            try:
+                outcome = self._handler(payload)
+                update = {"status": "done", **outcome}
+                stat = "completed"
+            except Exception as exc:
+                update = {"status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+                stat = "failed"
+            with self._lock:
+                job.update(update, finished=time.time())
+                self._stats[stat] += 1
+                self._spool_finish(job)
+                self._forget_finished()
+            self._queue.task_done()
+
+    def _forget_finished(self) -> None:
+        finished = [k for k, j in self._jobs.items() if j["status"] in ("done", "failed")]
+        for key in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[key]
+
+    # ------------------------------------------------------------------ #
+    # SQLite spool (lock held by callers)
+    # ------------------------------------------------------------------ #
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.spool_path:
+            return None
+        if self._conn is None or self._pid != os.getpid():  # reopen after fork
+            try:
+                Path(self.spool_path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.spool_path, check_same_thread=False, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    " job_id TEXT PRIMARY KEY, status TEXT, created REAL, payload TEXT, result TEXT)"
+                )
+                self._conn, self._pid = conn, os.getpid()
+            except sqlite3.Error as exc:
+                print(f"[explanations] spool unavailable ({exc}); jobs are in-process only")
+                self.spool_path = None
+                return None
+        return self._conn
+
+    def _spool_put(self, job_id: str, payload: Dict[str, Any]) -> None:
+        conn = self._db()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO jobs VALUES (?, 'queued', ?, ?, NULL)",
+                             (job_id, time.time(), json.dumps(payload, default=str)))
+        except sqlite3.Error as exc:  # pragma: no cover - disk dependent
+            print(f"[explanations] spool write failed ({exc})")
+
+    def _spool_delete(self, job_id: str) -> None:
+        conn = self._db()
+        if conn is not None:
+            with conn:
+                conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def _spool_finish(self, job: Dict[str, Any]) -> None:
+        conn = self._db()
+        if conn is None:
+            return
+        result = {k: v for k, v in job.items() if k not in ("job_id", "status")}
+        try:
+            with conn:  # keep the outcome for polling after a restart, drop the payload
+                conn.execute("UPDATE jobs SET status = ?, payload = NULL, result = ? WHERE job_id = ?",
+                             (job["status"], json.dumps(result, default=str), job["job_id"]))
+                conn.execute(
+                    "DELETE FROM jobs WHERE payload IS NULL AND rowid NOT IN "
+                    "(SELECT rowid FROM jobs WHERE payload IS NULL ORDER BY created DESC LIMIT ?)",
+                    (self.keep_finished,),
+                )
+        except sqlite3.Error as exc:  # pragma: no cover - disk dependent
+            print(f"[explanations] spool update failed ({exc})")
+
+    def _spool_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._db()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT status, result FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {"job_id": job_id, "status": row[0], **(json.loads(row[1]) if row[1] else {})}
+
+    def _recover(self) -> None:
+        """Re-queue spooled jobs that never finished (e.g. the process restarted)."""
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return
+            rows: List[Any] = conn.execute(
+                "SELECT job_id, created, payload FROM jobs WHERE payload IS NOT NULL ORDER BY created"
+            ).fetchall()
+            for job_id, created, payload in rows:
+                try:
+                    self._queue.put_nowait((job_id, json.loads(payload)))
+                except queue.Full:  # left in the spool for the next start
+                    break
+                self._jobs[job_id] = {"job_id": job_id, "status": "queued", "created": created}
+                self._stats["recovered"] += 1
+
+
+def explanation_queue_from_env(handler: Callable[[Dict[str, Any]], Dict[str, Any]]) -> ExplanationQueue:
+    return ExplanationQueue(
+        handler,
+        workers=_env_int("EXPLAIN_WORKERS", 4),
+        max_queue=_env_int("EXPLAIN_QUEUE_MAX", 10000),
+        spool_path=_env("EXPLAIN_SPOOL_PATH") or None,
+        keep_finished=_env_int("EXPLAIN_JOBS_KEEP", 10000),
+    )
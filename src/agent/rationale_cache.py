@@ -0,0 +1,189 @@
+"""Reuse LLM rationales across repeated evaluations.
+
+The Bedrock explanation is the slowest and most expensive stage of the loop.
+The prompt quotes the applicant (name, age, occupation, income, utilisation,
+delayed payments, debt) and the exact score, so a rationale is only ever
+reused for the *same* applicant inputs - typically a resubmission or a
+re-score - never for another applicant who merely lands in the same band.
+Rationales are cached under
+
+    (model, band, score, digest of the quoted applicant fields,
+     cited policy IDs, neighbour-set signature)
+
+with LRU eviction and a TTL. Keys carry a SHA-256 of the applicant fields,
+not the fields themselves. With ``RATIONALE_CACHE_MIN_SIMILARITY`` set, a hit
+additionally requires the applicant's query embedding to be at least that
+cosine-similar to the one the rationale was written for.
+
+Hits are stamped in the result's ``meta.rationale_cache`` (and on the stored
+decision) so auditors can see which rationales were reused.
+
+Configuration:
+
+    RATIONALE_CACHE=on | off            (default off)
+    RATIONALE_CACHE_SIZE=2048           entries (LRU)
+    RATIONALE_CACHE_TTL_S=3600
+    RATIONALE_CACHE_MIN_SIMILARITY=0    e.g. 0.97; 0 disables the embedding check
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Key = Tuple[Any, ...]
+_VARIANTS_PER_KEY = 4  # distinct query embeddings kept per key when similarity is checked
+# Profile fields quoted by credit_agent._rationale_prompt; all of them are keyed.
+APPLICANT_FIELDS = ("Name", "Age", "Occupation", "Annual_Income", "Credit_Utilization_Ratio",
+                    "Num_of_Delayed_Payment", "Outstanding_Debt")
+
+
+def _env(name: str, default: str = "") -> str:
+    return (os.getenv(name) or default).strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+class _Entry:
+    __slots__ = ("rationale", "query", "created", "digest")
+
+    def __init__(self, rationale: str, query: Optional[np.ndarray], digest: str) -> None:
+        self.rationale = rationale
+        self.query = query
+        self.created = time.time()
+        self.digest = digest
+
+
+class RationaleCache:
+    def __init__(self, max_entries: int = 2048, ttl_s: float = 3600.0,
+                 min_similarity: float = 0.0) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.min_similarity = min_similarity
+        self._entries: "OrderedDict[Key, List[_Entry]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "writes": 0}
+
+    def key(self, profile: Dict[str, Any], band: str, features: Dict[str, int],
+            policies: Sequence[Dict[str, Any]], similar: Sequence[Dict[str, Any]]) -> Key:
+        """Cache key for one evaluation's explanation inputs."""
+        applicant = hashlib.sha256(
+            "\x1f".join(str(profile.get(f)) for f in APPLICANT_FIELDS).encode()
+        ).hexdigest()
+        score = int(features["credit_score"])
+        policy_ids = tuple(str(p.get("policy_id")) for p in policies)
+        neighbours = hashlib.sha1(
+            "|".join(sorted(str(s.get("_id") or s.get("applicant_id")) for s in similar)).encode()
+        ).hexdigest()
+        model = _env("BEDROCK_MODEL_ID")
+        return (model, band, score, applicant, policy_ids, neighbours)
+
+    def get(self, key: Key, query: Optional[Sequence[float]] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """``(rationale, audit stamp)`` for a live entry matching ``key``, else ``None``."""
+        q = self._unit(query) if self.min_similarity > 0 else None
+        now = time.time()
+        with self._lock:
+            variants = self._entries.get(key)
+            if variants:
+                live = [e for e in variants if now - e.created <= self.ttl_s]
+                self._stats["expired"] += len(variants) - len(live)
+                self._size -= len(variants) - len(live)
+                if live:
+                    self._entries[key] = live
+                else:
+                    del self._entries[key]
+                for entry in live:
+                    similarity = None
+                    if q is not None:
+                        if entry.query is None or entry.query.shape != q.shape:
+                            continue
+                        similarity = float(entry.query @ q)
+                        if similarity < self.min_similarity:
+                            continue
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    stamp = {
+                        "hit": True,
+                        "entry": entry.digest,
+                        "cached_at": datetime.fromtimestamp(entry.created, timezone.utc).isoformat(),
+                        "age_s": round(now - entry.created, 1),
+                    }
+                    if similarity is not None:
+                        stamp["similarity"] = round(similarity, 4)
+                    return entry.rationale, stamp
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: Key, rationale: str, query: Optional[Sequence[float]] = None) -> str:
+        """Cache ``rationale``; returns the entry digest recorded in audit stamps."""
+        digest = hashlib.sha1(repr(key).encode() + rationale.encode()).hexdigest()[:16]
+        q = self._unit(query) if self.min_similarity > 0 else None
+        entry = _Entry(rationale, q, digest)
+        with self._lock:
+            variants = self._entries.pop(key, [])
+            self._size -= len(variants)
+            keep = _VARIANTS_PER_KEY if q is not None else 1
+            variants = ([entry] + variants)[:keep]
+            self._entries[key] = variants
+            self._size += len(variants)
+            self._stats["writes"] += 1
+            while self._size > self.max_entries and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self._stats["evictions"] += len(evicted)
+        return digest
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, entries=self._size)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @staticmethod
+    def _unit(query: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+        if query is None:
+            return None
+        q = np.asarray(query, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        return q / norm if norm else q
+
+
+_DEFAULT: Optional[RationaleCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_rationale_cache() -> Optional[RationaleCache]:
+    """Process-wide cache built from the environment, or ``None`` when off."""
+    global _DEFAULT
+    if _env("RATIONALE_CACHE", "off").lower() in ("off", "0", "false", "no"):
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = RationaleCache(
+                max_entries=_env_int("RATIONALE_CACHE_SIZE", 2048),
+                ttl_s=_env_float("RATIONALE_CACHE_TTL_S", 3600),
+                min_similarity=_env_float("RATIONALE_CACHE_MIN_SIMILARITY", 0.0),
+            )
+        return _DEFAULT
@@ -10,104 +10,267 @@ local in-process fallback:
 
 The interface is intentionally tiny: create a session, remember key/value facts
 during an evaluation, recall them, and close it.
+
+Nothing here waits on the network. ``remember`` writes the local mirror and, with
+AgentCore, buffers the event; the buffered events of a session are shipped in
+one ``create_event`` call by a background thread when the session closes, is
+expired or is evicted (or every ``SESSION_FLUSH_INTERVAL_S`` for sessions still
+open). The local store expires sessions idle for ``SESSION_TTL_S`` and keeps at
+most ``SESSION_MAX_LIVE``, so sessions that are never closed cannot pile up.
+
+Configuration:
+
+    SESSION_FLUSH_INTERVAL_S=2      ship events of still-open sessions this often
+    SESSION_QUEUE_MAX=10000         pending batches; beyond this events stay local only
+    SESSION_TTL_S=900               local sessions idle this long are swept
+    SESSION_MAX_LIVE=10000          oldest local sessions are evicted beyond this
 """
 from __future__ import annotations
 
 import os
+import queue
+import threading
+import time
 import uuid
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_FLUSH = object()
 
 
 def _env(name: str, default: str = "") -> str:
     return (os.getenv(name) or default).strip()
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
 class _LocalSessionStore:
-    def __init__(self) -> None:
-        self._sessions: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, ttl_s: float = 900.0, max_sessions: int = 10000,
+                 on_drop: Optional[Callable[[str], None]] = None) -> None:
+        self.ttl_s = ttl_s
+        self.max_sessions = max(1, max_sessions)
+        self._on_drop = on_drop  # called (lock held) for each expired or evicted session
+        # sid -> (last touched, actor, facts); least recently touched first
+        self._sessions: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._stats = {"expired": 0, "evicted": 0}
 
-    def create(self) -> str:
+    def create(self, actor_id: str = "credit-officer") -> str:
         sid = uuid.uuid4().hex
-        self._sessions[sid] = {}
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= min(self.ttl_s, 60.0):
+                self._sweep(now)
+            while len(self._sessions) >= self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                self._stats["evicted"] += 1
+                self._dropped(evicted)
+            self._sessions[sid] = (now, actor_id, {})
         return sid
 
-    def remember(self, sid: str, key: str, value: Any) -> None:
-        self._sessions.setdefault(sid, {})[key] = value
+    def remember(self, sid: str, key: str, value: Any) -> str:
+        """Store a fact; returns the session's actor."""
+        with self._lock:
+            _, actor, facts = self._sessions.pop(sid, (0.0, "credit-officer", {}))
+            facts[key] = value
+            self._sessions[sid] = (time.monotonic(), actor, facts)
+            return actor
 
     def recall(self, sid: str) -> Dict[str, Any]:
-        return dict(self._sessions.get(sid, {}))
+        with self._lock:
+            entry = self._sessions.get(sid)
+            return dict(entry[2]) if entry is not None else {}
 
     def close(self, sid: str) -> None:
-        self._sessions.pop(sid, None)
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, live=len(self._sessions))
+
+    def _sweep(self, now: float) -> None:
+        """Drop sessions idle for ``ttl_s`` (lock held)."""
+        self._last_sweep = now
+        while self._sessions:
+            sid, (touched, _, _) = next(iter(self._sessions.items()))
+            if now - touched < self.ttl_s:
+                break
+            del self._sessions[sid]
+            self._stats["expired"] += 1
+            self._dropped(sid)
+
+    def _dropped(self, sid: str) -> None:
+        if self._on_drop is not None:
+            self._on_drop(sid)
 
 
 class SessionMemory:
     """Short-term memory facade. Uses AgentCore when configured, else local."""
 
-    def __init__(self) -> None:
+    def __init__(self, client: Optional[Any] = None) -> None:
         self.backend = "local"
-        self._agentcore = None
-        self._local = _LocalSessionStore()
+        self._agentcore = client
+        self._local = _LocalSessionStore(ttl_s=_env_float("SESSION_TTL_S", 900),
+                                         max_sessions=_env_int("SESSION_MAX_LIVE", 10000),
+                                         on_drop=self._release)
         self._memory_id = _env("AGENTCORE_MEMORY_ID")
+        self.flush_interval_s = _env_float("SESSION_FLUSH_INTERVAL_S", 2.0)
+        # sid -> (actor, buffered messages) awaiting the background sender
+        self._buffers: Dict[str, Tuple[str, List[Tuple[str, str]]]] = {}
+        self._lock = threading.Lock()
+        self._outbox: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, _env_int("SESSION_QUEUE_MAX", 10000)))
+        self._sender: Optional[threading.Thread] = None
+        self._stats = {"events": 0, "batches": 0, "failed": 0, "dropped": 0}
         backend_pref = _env("AGENT_SESSION_BACKEND", "auto").lower()
 
-        wants_agentcore = backend_pref == "agentcore" or (
+        wants_agentcore = client is None and (backend_pref == "agentcore" or (
             backend_pref == "auto" and self._memory_id
-        )
+        ))
         if wants_agentcore:
             try:
                 # bedrock-agentcore SDK (optional dependency)
                 from bedrock_agentcore.memory import MemoryClient  # type: ignore
 
                 self._agentcore = MemoryClient(region_name=_env("AWS_REGION", "us-east-1"))
-                self.backend = "agentcore"
             except Exception as exc:  # pragma: no cover - optional/network
                 print(f"[session] AgentCore unavailable ({exc}); using local session memory")
                 self._agentcore = None
-                self.backend = "local"
+        if self._agentcore is not None:
+            self.backend = "agentcore"
 
     # ------------------------------------------------------------------ #
     def create_session(self, actor_id: str = "credit-officer") -> str:
-        if self._agentcore is not None:
-            try:  # pragma: no cover - network dependent
-                sid = uuid.uuid4().hex
-                self._active_actor = actor_id
-                return sid
-            except Exception as exc:
-                print(f"[session] AgentCore create failed ({exc}); using local")
-                self._agentcore = None
-                self.backend = "local"
-        return self._local.create()
+        return self._local.create(actor_id)
 
     def remember(self, sid: str, key: str, value: Any) -> None:
-        if self._agentcore is not None:
-            try:  # pragma: no cover - network dependent
-                self._agentcore.create_event(
-                    memory_id=self._memory_id,
-                    actor_id=getattr(self, "_active_actor", "credit-officer"),
-                    session_id=sid,
-                    messages=[(f"{key}: {value}", "ASSISTANT")],
-                )
-                return
-            except Exception as exc:
-                print(f"[session] AgentCore remember failed ({exc}); using local")
-                self._agentcore = None
-                self.backend = "local"
-        self._local.remember(sid, key, value)
+        # The local mirror is always written; AgentCore gets the event later.
+        actor = self._local.remember(sid, key, value)
+        if self._agentcore is None:
+            return
+        with self._lock:
+            self._buffers.setdefault(sid, (actor, []))[1].append((f"{key}: {value}", "ASSISTANT"))
+        self._ensure_sender()
 
     def recall(self, sid: str) -> Dict[str, Any]:
         # Local mirror is always kept; AgentCore is the durable session of record.
         return self._local.recall(sid)
 
     def close(self, sid: str) -> None:
+        """End the session; its buffered events are shipped in the background."""
         self._local.close(sid)
+        if self._agentcore is None:
+            return
+        self._release(sid)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Ship every buffered event and wait (up to ``timeout``) for the sender;
+        called on shutdown."""
+        if self._sender is None:
+            return
+        try:
+            self._outbox.put(_FLUSH, timeout=timeout)
+        except queue.Full:  # pragma: no cover - sender stuck
+            return
+        deadline = time.monotonic() + timeout
+        while self._outbox.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stats(self) -> Dict[str, Any]:
+        local = self._local.stats()  # not under self._lock: the store calls back into it
+        with self._lock:
+            buffered = sum(len(messages) for _, messages in self._buffers.values())
+            return dict(self._stats, buffered=buffered, queued=self._outbox.qsize(), local=local)
+
+    # ------------------------------------------------------------------ #
+    # Background sender
+    # ------------------------------------------------------------------ #
+    def _ensure_sender(self) -> None:
+        if self._sender is not None and self._sender.is_alive():
+            return
+        with self._lock:
+            if self._sender is None or not self._sender.is_alive():
+                self._sender = threading.Thread(target=self._run, name="session-events", daemon=True)
+                self._sender.start()
+
+    def _release(self, sid: str) -> None:
+        """Hand a finished (closed, expired or evicted) session's buffer to the sender."""
+        with self._lock:
+            buffered = self._buffers.pop(sid, None)
+        if buffered is not None:
+            self._ship(sid, *buffered)
+
+    def _ship(self, sid: str, actor: str, messages: List[Tuple[str, str]]) -> None:
+        try:
+            self._outbox.put_nowait((sid, actor, messages))
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += len(messages)
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval_s
+        while True:
+            try:
+                item = self._outbox.get(timeout=max(0.001, next_flush - time.monotonic()))
+            except queue.Empty:
+                item = None
+            try:
+                if item is not None and item is not _FLUSH:
+                    self._send(*item)
+                # Timer on a deadline, so steady traffic cannot starve open sessions.
+                if item is _FLUSH or time.monotonic() >= next_flush:
+                    next_flush = time.monotonic() + self.flush_interval_s
+                    self._send_buffered()
+            finally:
+                if item is not None:
+                    self._outbox.task_done()
+
+    def _send_buffered(self) -> None:
+        """Ship what open sessions have buffered so far."""
+        with self._lock:
+            pending = [(sid, actor, messages) for sid, (actor, messages) in self._buffers.items()]
+            self._buffers.clear()
+        for batch in pending:
+            self._send(*batch)
+
+    def _send(self, sid: str, actor: str, messages: List[Tuple[str, str]]) -> None:
+        client = self._agentcore
+        if client is None or not messages:
+            return
+        try:  # one round trip for the whole batch
+            client.create_event(memory_id=self._memory_id, actor_id=actor,
+                                session_id=sid, messages=messages)
+            with self._lock:
+                self._stats["events"] += len(messages)
+                self._stats["batches"] += 1
+        except Exception as exc:  # pragma: no cover - network dependent
+            print(f"[session] AgentCore create_event failed ({exc}); using local")
+            with self._lock:
+                self._stats["failed"] += len(messages)
+            self._agentcore = None
+            self.backend = "local"
 
 
 _DEFAULT: Optional[SessionMemory] = None
+_DEFAULT_LOCK = threading.Lock()
 
 
 def get_session_memory() -> SessionMemory:
     global _DEFAULT
-    if _DEFAULT is None:
-        _DEFAULT = SessionMemory()
-    return _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = SessionMemory()
+        return _DEFAULT
@@ -0,0 +1,404 @@
+"""Concurrency limit, deadline and circuit breaker around the rationale LLM.
+
+When Bedrock throttles or slows down, every ``/score`` used to block in
+``llm.invoke`` until boto3 gave up. :class:`GuardedLLM` bounds that:
+
+* **Max in flight** - at most ``LLM_MAX_IN_FLIGHT`` calls run at once; a call
+  that cannot get a slot within ``LLM_DEADLINE_S`` is skipped (``busy``).
+  Async callers wait on the event loop, not in an executor thread.
+* **Deadline** - a call that has not answered within ``LLM_DEADLINE_S`` of
+  getting its slot is abandoned (``timeout``) and the caller uses the
+  deterministic rationale. The budget starts at the slot, so contention alone
+  never produces timeouts that count toward the breaker.
+* **Circuit breaker** - after ``LLM_BREAKER_FAILURES`` consecutive failures or
+  timeouts the LLM is skipped entirely (``short_circuit``) for
+  ``LLM_BREAKER_COOLDOWN_S``; then one trial call decides whether to close the
+  breaker again. A trial that is cancelled (or a stream the caller closes)
+  before its verdict leaves the next call to be the trial.
+
+``summarize``/``asummarize`` return ``None`` instead of raising, so callers
+keep their fallback (``astream`` yields nothing). :meth:`GuardedLLM.stats`
+counts each path. :class:`FakeLLM` stands in for Bedrock in tests and load
+experiments (latency and failure rate are injectable).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+
+def _env(name: str, default: str = "") -> str:
+    return (os.getenv(name) or default).strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+class FakeLLM:
+    """Offline stand-in for ``summarize_credit_profile`` with injectable
+    latency (seconds, or a ``(low, high)`` range) and failure rate."""
+
+    def __init__(self, latency_s: Any = 0.0, failure_rate: float = 0.0,
+                 text: str = "### Summary\nFake rationale.", seed: Optional[int] = None) -> None:
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.text = text
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> tuple:
+        with self._lock:
+            self.calls += 1
+            low, high = self.latency_s if isinstance(self.latency_s, tuple) else (self.latency_s,) * 2
+            return self._rng.uniform(low, high), self._rng.random() < self.failure_rate
+
+    def __call__(self, prompt: str) -> str:
+        delay, fail = self._draw()
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError("fake LLM failure")
+        return self.text
+
+    async def acall(self, prompt: str) -> str:
+        delay, fail = self._draw()
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("fake LLM failure")
+        return self.text
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        yield await self.acall(prompt)
+
+
+class GuardedLLM:
+    def __init__(self, call: Optional[Callable[[str], str]] = None,
+                 acall: Optional[Callable[[str], Awaitable[str]]] = None,
+                 astream: Optional[Callable[[str], AsyncIterator[str]]] = None,
+                 max_in_flight: int = 8, deadline_s: float = 8.0,
+                 failure_threshold: int = 5, cooldown_s: float = 30.0) -> None:
+        self._call = call
+        self._acall = acall
+        self._astream = astream
+        self.max_in_flight = max(1, max_in_flight)
+        self.deadline_s = deadline_s
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_s = cooldown_s
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        # Calls run here so the caller can stop waiting at the deadline; the
+        # slot is only released when the abandoned call actually returns.
+        self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        # Coroutines waiting for a slot; each release wakes the oldest one.
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[bool]"]] = deque()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._in_flight = 0
+        self._stats = {"calls": 0, "ok": 0, "errors": 0, "timeouts": 0, "busy": 0,
+                       "short_circuit": 0, "breaker_opened": 0, "latency_ms_total": 0.0,
+                       "latency_ms_max": 0.0}
+
+    # ------------------------------------------------------------------ #
+    def summarize(self, prompt: str) -> Optional[str]:
+        """The LLM summary, or ``None`` if skipped, too slow or failed."""
+        if self._admit() is None:
+            return None
+        if not self._slots.acquire(timeout=self.deadline_s):
+            return self._skip_busy()
+        start = time.monotonic()  # the call's own budget starts at its slot
+        self._enter()
+        try:
+            future = self._pool.submit(self._resolve_call(), prompt)
+        except Exception as exc:
+            self._leave()
+            return self._failed(exc)
+        future.add_done_callback(lambda _: self._leave())
+        try:
+            text = future.result(timeout=self.deadline_s)
+        except FutureTimeout:
+            return self._timed_out()
+        except Exception as exc:
+            return self._failed(exc)
+        return self._succeeded(text, start)
+
+    async def asummarize(self, prompt: str) -> Optional[str]:
+        """Async :meth:`summarize` (the call is cancelled at the deadline)."""
+        trial = self._admit()
+        if trial is None:
+            return None
+        try:
+            if not await self._aacquire():
+                return self._skip_busy()
+            start = time.monotonic()
+            self._enter()
+            try:
+                text = await asyncio.wait_for(self._resolve_acall()(prompt), timeout=self.deadline_s)
+            finally:
+                self._leave()
+        except asyncio.TimeoutError:
+            return self._timed_out()
+        except asyncio.CancelledError:
+            self._abandon(trial)
+            raise
+        except Exception as exc:
+            return self._failed(exc)
+        return self._succeeded(text, start)
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream chunks; the deadline applies to the first chunk. Yields
+        nothing when the call is skipped or fails before its first chunk;
+        raises if it fails mid-stream (the caller replaces the partial text)."""
+        trial = self._admit()
+        if trial is None:
+            return
+        try:
+            if not await self._aacquire():
+                self._skip_busy()
+                return
+        except asyncio.CancelledError:
+            self._abandon(trial)
+            raise
+        start = time.monotonic()
+        self._enter()
+        try:
+            try:
+                stream = self._resolve_astream()(prompt).__aiter__()
+                first = await asyncio.wait_for(stream.__anext__(), timeout=self.deadline_s)
+            except StopAsyncIteration:
+                self._succeeded("", start)
+                return
+            except asyncio.TimeoutError:
+                self._timed_out()
+                return
+            except Exception as exc:
+                self._failed(exc)
+                return
+            yield first
+            try:
+                async for chunk in stream:
+                    yield chunk
+            except Exception as exc:
+                self._failed(exc)
+                raise
+            self._succeeded(first, start)
+        except (asyncio.CancelledError, GeneratorExit):  # cancelled, or closed by the consumer
+            self._abandon(trial)
+            raise
+        finally:
+            self._leave()
+
+    def warm(self) -> None:
+        """Resolve the call targets ahead of the first request (for Bedrock this
+        imports langchain and builds the client)."""
+        bedrock = self._call is None
+        self._resolve_call()
+        self._resolve_acall()
+        self._resolve_astream()
+        if bedrock:
+            from src.llm.service import get_llm
+            get_llm()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self._stats["ok"]
+            return dict(
+                self._stats,
+                latency_ms_total=round(self._stats["latency_ms_total"], 3),
+                latency_ms_avg=round(self._stats["latency_ms_total"] / calls, 3) if calls else 0.0,
+                in_flight=self._in_flight,
+                breaker=self._state(),
+                consecutive_failures=self._failures,
+            )
+
+    # ------------------------------------------------------------------ #
+    # Breaker (lock held by _state callers)
+    # ------------------------------------------------------------------ #
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.cooldown_s:
+            return "open"
+        return "half-open"
+
+    def _admit(self) -> Optional[bool]:
+        """``None`` when short-circuited, else whether this call is the half-open trial."""
+        with self._lock:
+            state = self._state()
+            if state == "open" or (state == "half-open" and self._trial):
+                self._stats["short_circuit"] += 1
+                return None
+            if state == "half-open":
+                self._trial = True  # one trial call at a time
+            self._stats["calls"] += 1
+            return state == "half-open"
+
+    def _abandon(self, trial: bool) -> None:
+        """A call cancelled before its verdict: let the next caller be the trial."""
+        if trial:
+            with self._lock:
+                self._trial = False
+
+    async def _aacquire(self) -> bool:
+        """Wait up to ``deadline_s`` for a slot on the event loop; no executor
+        thread is held, so other ``to_thread`` work is not starved."""
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + self.deadline_s
+        while not self._slots.acquire(blocking=False):
+            remaining = give_up - loop.time()
+            if remaining <= 0:
+                return False
+            waiter = loop.create_future()
+            with self._lock:
+                self._waiters.append((loop, waiter))
+            try:
+                if self._slots.acquire(blocking=False):  # released before we queued
+                    return True
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_waiter()  # woken, but leaving without the slot: pass it on
+                raise
+            finally:
+                self._forget_waiter(loop, waiter)
+        return True
+
+    def _forget_waiter(self, loop: asyncio.AbstractEventLoop, waiter: "asyncio.Future[bool]") -> None:
+        with self._lock:
+            try:
+                self._waiters.remove((loop, waiter))
+            except ValueError:  # already popped by a release
+                pass
+
+    def _wake_waiter(self) -> None:
+        """Let the longest-waiting coroutine retry for a released slot."""
+        with self._lock:
+            if not self._waiters:
+                return
+            loop, waiter = self._waiters.popleft()
+        try:
+            loop.call_soon_threadsafe(self._resolve_waiter, waiter)
+        except RuntimeError:  # its loop is closed
+            self._wake_waiter()
+
+    def _resolve_waiter(self, waiter: "asyncio.Future[bool]") -> None:
+        if waiter.done():  # gave up meanwhile: the wake-up goes to the next one
+            self._wake_waiter()
+        else:
+            waiter.set_result(True)
+
+    def _enter(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def _leave(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+        self._wake_waiter()
+
+    def _skip_busy(self) -> None:
+        with self._lock:
+            self._stats["busy"] += 1
+            self._trial = False
+        return None
+
+    def _succeeded(self, text: str, start: float) -> str:
+        ms = (time.monotonic() - start) * 1000
+        with self._lock:
+            self._stats["ok"] += 1
+            self._stats["latency_ms_total"] += ms
+            self._stats["latency_ms_max"] = max(self._stats["latency_ms_max"], ms)
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+        return text
+
+    def _timed_out(self) -> None:
+        print(f"[llm] no answer within {self.deadline_s}s; using deterministic fallback")
+        self._failure("timeouts")
+        return None
+
+    def _failed(self, exc: Exception) -> None:
+        print(f"[llm] call failed ({exc}); using deterministic fallback")
+        self._failure("errors")
+        return None
+
+    def _failure(self, kind: str) -> None:
+        with self._lock:
+            self._stats[kind] += 1
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                if self._state() != "open":
+                    self._stats["breaker_opened"] += 1
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    # ------------------------------------------------------------------ #
+    # Bedrock by default (imported lazily: langchain is heavy)
+    # ------------------------------------------------------------------ #
+    def _resolve_call(self) -> Callable[[str], str]:
+        if self._call is None:
+            from src.llm.service import summarize_credit_profile
+            self._call = summarize_credit_profile
+        return self._call
+
+    def _resolve_acall(self) -> Callable[[str], Awaitable[str]]:
+        if self._acall is None:
+            from src.llm.service import asummarize_credit_profile
+            self._acall = asummarize_credit_profile
+        return self._acall
+
+    def _resolve_astream(self) -> Callable[[str], AsyncIterator[str]]:
+        if self._astream is None:
+            from src.llm.service import astream_credit_profile
+            self._astream = astream_credit_profile
+        return self._astream
+
+
+_DEFAULT: Optional[GuardedLLM] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_guarded_llm() -> GuardedLLM:
+    """Process-wide guard around the Bedrock rationale calls, from the environment.
+
+    ``LLM_FAKE=1`` (optionally ``LLM_FAKE_LATENCY_S``, ``LLM_FAKE_FAILURE_RATE``)
+    swaps Bedrock for :class:`FakeLLM`.
+    """
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            kwargs: Dict[str, Any] = {}
+            if _env("LLM_FAKE").lower() in ("1", "on", "true", "yes"):
+                fake = FakeLLM(latency_s=_env_float("LLM_FAKE_LATENCY_S", 0.5),
+                               failure_rate=_env_float("LLM_FAKE_FAILURE_RATE", 0.0))
+                kwargs = {"call": fake, "acall": fake.acall, "astream": fake.astream}
+            _DEFAULT = GuardedLLM(
+                max_in_flight=_env_int("LLM_MAX_IN_FLIGHT", 8),
+                deadline_s=_env_float("LLM_DEADLINE_S", 8.0),
+                failure_threshold=_env_int("LLM_BREAKER_FAILURES", 5),
+                cooldown_s=_env_float("LLM_BREAKER_COOLDOWN_S", 30.0),
+                **kwargs,
+            )
+        return _DEFAULT
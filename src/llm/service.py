@@ -1,9 +1,15 @@
+"""Bedrock Claude wrapper for the credit rationale.
+
+The ``ChatBedrock`` client (and langchain itself) is created on first use by
+:func:`get_llm`, not at import; ``from src.llm.service import llm`` still works
+and triggers it.
+"""
 import os
+import threading
 from pathlib import Path
+from typing import Any, AsyncIterator, Optional
 
 from dotenv import load_dotenv
-from langchain_aws import ChatBedrock
-from langchain_core.messages import HumanMessage, SystemMessage
 
 _ROOT = Path(__file__).resolve().parents[2]
 load_dotenv(_ROOT / ".env")
@@ -12,21 +18,43 @@ load_dotenv(_ROOT / "backend" / ".env", override=True)
 if os.getenv("AWS_PROFILE") == "":
     os.environ.pop("AWS_PROFILE", None)
 
-llm = ChatBedrock(
-    model=os.getenv(
-        "BEDROCK_MODEL_ID", "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
-    ),
-    temperature=0.7,
-    max_tokens=2048,
-    streaming=False,
-    region_name=os.getenv("AWS_REGION", "us-east-1"),
-)
+_LLM: Optional[Any] = None
+_LLM_LOCK = threading.Lock()
 
 
-def summarize_credit_profile(prompt: str) -> str:
-    """Generate a short LLM summary for a credit profile using Bedrock."""
+def get_llm() -> Any:
+    """The process-wide ``ChatBedrock`` client (built once)."""
+    global _LLM
+    with _LLM_LOCK:
+        if _LLM is None:
+            from langchain_aws import ChatBedrock
+
+            _LLM = ChatBedrock(
+                model=os.getenv(
+                    "BEDROCK_MODEL_ID", "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+                ),
+                temperature=0.7,
+                max_tokens=2048,
+                streaming=False,
+                region_name=os.getenv("AWS_REGION", "us-east-1"),
+            )
+        return _LLM
+
+
+def llm_ready() -> bool:
+    return _LLM is not None
+
+
+def __getattr__(name: str) -> Any:  # PEP 562: keep ``service.llm`` importable
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-    messages = [
+def _messages(prompt: str) -> list:
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return [
         SystemMessage(
             content=(
                 "You are a credit analyst helping users understand their credit risk "
@@ -38,5 +66,25 @@ def summarize_credit_profile(prompt: str) -> str:
         ),
         HumanMessage(content=prompt),
     ]
-    response = llm.invoke(messages)
+
+
+def summarize_credit_profile(prompt: str) -> str:
+    """Generate a short LLM summary for a credit profile using Bedrock."""
+    response = get_llm().invoke(_messages(prompt))
+    return response.content
+
+
+async def astream_credit_profile(prompt: str) -> AsyncIterator[str]:
+    """Yield the summary as Bedrock streams it (text chunks, in order)."""
+    async for chunk in get_llm().astream(_messages(prompt)):
+        content = chunk.content
+        if isinstance(content, list):  # content blocks
+            content = "".join(b.get("text", "") if isinstance(b, dict) else str(b) for b in content)
+        if content:
+            yield content
+
+
+async def asummarize_credit_profile(prompt: str) -> str:
+    """Async :func:`summarize_credit_profile` (does not block the event loop)."""
+    response = await get_llm().ainvoke(_messages(prompt))
     return response.content
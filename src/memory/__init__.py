@@ -1,7 +1,8 @@
-from .embeddings import embed_text, embed_many, cosine_similarity, active_provider, embed_dim
+from .embeddings import aembed_text, embed_text, embed_many, cosine_similarity, active_provider, embed_dim
 from .long_term import LongTermMemory, get_memory
+from .vector_index import VectorIndex
 
 __all__ = [
-    "embed_text", "embed_many", "cosine_similarity", "active_provider", "embed_dim",
-    "LongTermMemory", "get_memory",
+    "aembed_text", "embed_text", "embed_many", "cosine_similarity", "active_provider", "embed_dim",
+    "LongTermMemory", "get_memory", "VectorIndex",
 ]
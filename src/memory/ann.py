@@ -0,0 +1,165 @@
+"""Approximate nearest-neighbour (IVF-flat) index for decision memory.
+
+Used when Atlas ``$vectorSearch`` is not available, instead of capping recall at
+an arbitrary ``find().limit(500)`` and scanning every vector per query.
+
+The index is an inverted file over spherical k-means centroids:
+
+* below ``min_train_size`` vectors it simply answers with the exact scan it
+  inherits from :class:`VectorIndex`;
+* once enough vectors exist it trains ``nlist`` centroids on a sample, assigns
+  every row to its nearest centroid and, per query, scores only the rows in the
+  ``nprobe`` closest lists (the configurable search breadth);
+* inserts (e.g. from ``store_decision``) are assigned incrementally, and the
+  centroids are retrained when the index has grown ``retrain_factor``-fold.
+
+Reduced-precision storage is inherited: rows are decoded to float32 only for
+the sample, the assignment chunks and the probed candidates.
+"""
+from __future__ import annotations
+
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from .vector_index import VectorIndex, _normalise_rows
+
+
+class IVFIndex(VectorIndex):
+    def __init__(self, nlist: int = 0, nprobe: int = 8, min_train_size: int = 20000,
+                 retrain_factor: float = 4.0, dim: Optional[int] = None,
+                 capacity: int = 1024, seed: int = 0, precision: str = "float32",
+                 rescore_factor: int = 10) -> None:
+        super().__init__(dim=dim, capacity=capacity, precision=precision,
+                         rescore_factor=rescore_factor)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self._seed = seed
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._arrays: List[Optional[np.ndarray]] = []
+        self._trained_size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    # ------------------------------------------------------------------ #
+    # Training / assignment
+    # ------------------------------------------------------------------ #
+    def train(self, nlist: Optional[int] = None, iters: int = 10,
+              sample_size: int = 100_000) -> None:
+        """(Re)build centroids and inverted lists from the current rows."""
+        with self._lock:
+            n = len(self._docs)
+            matrix, scales = self._matrix, self._scales
+            valid = np.flatnonzero(self._valid[:n])
+        if matrix is None or len(valid) == 0:
+            return
+        nlist = nlist or self.nlist or max(1, int(np.sqrt(len(valid))))
+        nlist = min(nlist, len(valid))
+        rng = np.random.default_rng(self._seed)
+        sample_size = min(sample_size, 64 * nlist, len(valid))
+        sample = self._decode(matrix, scales, rng.choice(valid, size=sample_size, replace=False))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iters):
+            assign = self._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=nlist) == 0
+            sums[empty] = centroids[empty]
+            centroids = _normalise_rows(sums)
+
+        # Assign the existing rows outside the lock so searches keep running on
+        # the previous lists; only rows inserted meanwhile are assigned inside.
+        lists: List[List[int]] = [[] for _ in range(nlist)]
+        self._fill_lists(lists, centroids, 0, n, matrix, scales)
+        with self._lock:
+            size = len(self._docs)
+            if size > n:
+                self._fill_lists(lists, centroids, n, size, self._matrix, self._scales)
+            self._centroids = centroids
+            self._lists = lists
+            self._arrays = [None] * nlist
+            self._trained_size = size
+
+    def _on_rows_added(self, start: int, rows: np.ndarray, valid: np.ndarray) -> None:
+        # Called with the lock held.
+        if self._centroids is not None:
+            self._assign_rows(start, rows, valid)
+
+    def extend_matrix(self, vectors, docs=None) -> List[int]:
+        positions = super().extend_matrix(vectors, docs)
+        size = len(self)
+        if not self.trained:
+            if size >= self.min_train_size:
+                self.train()
+        elif size >= self._trained_size * self.retrain_factor:
+            self.train()
+        return positions
+
+    def _assign_rows(self, start: int, rows: np.ndarray, valid: np.ndarray) -> None:
+        touched = self._assign_block(self._lists, self._centroids, start, rows, valid)
+        for c in touched:
+            self._arrays[c] = None
+
+    def _fill_lists(self, lists: List[List[int]], centroids: np.ndarray, start: int, end: int,
+                    matrix: np.ndarray, scales: Any, chunk: int = 65536) -> None:
+        for lo in range(start, end, chunk):
+            hi = min(end, lo + chunk)
+            self._assign_block(lists, centroids, lo, self._decode(matrix, scales, slice(lo, hi)),
+                               self._valid[lo:hi])
+
+    def _assign_block(self, lists: List[List[int]], centroids: np.ndarray, start: int,
+                      rows: np.ndarray, valid: np.ndarray) -> set:
+        touched = set()
+        assign = self._nearest(rows, centroids)
+        for offset in np.flatnonzero(valid):
+            c = int(assign[offset])
+            lists[c].append(start + int(offset))
+            touched.add(c)
+        return touched
+
+    @staticmethod
+    def _nearest(rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        return np.argmax(rows @ centroids.T, axis=1)
+
+    # ------------------------------------------------------------------ #
+    # Search
+    # ------------------------------------------------------------------ #
+    def search(self, query: List[float], k: int, mask: Optional[np.ndarray] = None,
+               nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        if not self.trained and len(self) >= self.min_train_size:
+            self.train()  # e.g. a reopened persistent index
+        if not self.trained:
+            return super().search(query, k, mask=mask)
+        if k <= 0:
+            return []
+        q = self._unit_query(query)
+        if q is None:
+            return []
+        with self._lock:
+            centroids = self._centroids
+            matrix, scales = self._matrix, self._scales
+            nprobe = min(nprobe or self.nprobe, len(centroids))
+            closest = np.argpartition(-(centroids @ q), nprobe - 1)[:nprobe]
+            cand = np.concatenate([self._list_array(int(c)) for c in closest])
+        if mask is not None and len(cand):
+            cand = cand[cand < len(mask)]
+            cand = cand[mask[cand]]
+        if mask is not None and len(cand) < k:
+            # A selective filter can empty the probed lists; scan the survivors
+            # exactly so the caller still gets k results whenever k exist.
+            return VectorIndex.search(self, query, k, mask=mask)
+        if len(cand) == 0:
+            return []
+        return self._top_k(cand, self._scores(matrix, scales, cand, q), k)
+
+    def _list_array(self, c: int) -> np.ndarray:
+        arr = self._arrays[c]
+        if arr is None:
+            arr = np.asarray(self._lists[c], dtype=np.int64)
+            self._arrays[c] = arr
+        return arr
@@ -0,0 +1,239 @@
+"""Two-tier cache in front of the paid embedding providers.
+
+    in-process LRU (byte budget)  ->  on-disk SQLite store  ->  provider call
+
+Entries are keyed by ``(provider, model, dim, sha256(text))`` so a vector from
+one provider or model is never served for another, and the SQLite file survives
+restarts so a warm deployment skips repeat embedding calls (e.g. the same
+applicant resubmitting, or the same MCP query). Vectors are stored as float64
+bytes, i.e. exactly what the provider returned.
+
+Configuration:
+
+    EMBED_CACHE=on | memory | off      (default on; "memory" skips the disk tier)
+    EMBED_CACHE_PATH=.cache/embeddings.sqlite
+    EMBED_CACHE_MAX_MB=64              in-process budget
+    EMBED_CACHE_DISK_MAX_MB=1024       oldest entries are evicted past this
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_ROOT = Path(__file__).resolve().parents[2]
+
+Key = Tuple[str, str, int, str]
+
+
+def _env(name: str, default: str = "") -> str:
+    return (os.getenv(name) or default).strip()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _encode(vector: Sequence[float]) -> bytes:
+    return array("d", vector).tobytes()
+
+
+def _decode(blob: bytes) -> List[float]:
+    return array("d", blob).tolist()
+
+
+class EmbeddingCache:
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 64 << 20,
+                 disk_max_bytes: int = 1 << 30) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._lru: "OrderedDict[Key, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._writes_since_trim = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def key(provider: str, model: str, dim: int, text: str) -> Key:
+        return (provider, model, dim, hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+    # ------------------------------------------------------------------ #
+    def get(self, key: Key) -> Optional[List[float]]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[Key]) -> List[Optional[List[float]]]:
+        out: List[Optional[List[float]]] = [None] * len(keys)
+        missing: Dict[Key, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                blob = self._lru.get(key)
+                if blob is not None:
+                    self._lru.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    out[i] = _decode(blob)
+                else:
+                    missing.setdefault(key, []).append(i)
+            if missing:
+                for key, blob in self._disk_get(list(missing)).items():
+                    self._remember(key, blob)
+                    for i in missing.pop(key):
+                        self._stats["disk_hits"] += 1
+                        out[i] = _decode(blob)
+            self._stats["misses"] += sum(len(v) for v in missing.values())
+        return out
+
+    def get_memory(self, key: Key) -> Optional[List[float]]:
+        """The in-process tier only, without waiting: ``None`` on a miss or while
+        another thread holds the cache (e.g. for SQLite I/O)."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            blob = self._lru.get(key)
+            if blob is None:
+                return None
+            self._lru.move_to_end(key)
+            self._stats["memory_hits"] += 1
+        finally:
+            self._lock.release()
+        return _decode(blob)
+
+    def put(self, key: Key, vector: Sequence[float]) -> None:
+        self.put_many([(key, vector)])
+
+    def put_many(self, items: List[Tuple[Key, Sequence[float]]]) -> None:
+        if not items:
+            return
+        encoded = [(key, _encode(vec)) for key, vec in items]
+        with self._lock:
+            for key, blob in encoded:
+                self._remember(key, blob)
+            self._disk_put(encoded)
+            self._stats["writes"] += len(encoded)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, memory_entries=len(self._lru), memory_bytes=self._bytes)
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._bytes = 0
+
+    # ------------------------------------------------------------------ #
+    # In-process LRU
+    # ------------------------------------------------------------------ #
+    def _remember(self, key: Key, blob: bytes) -> None:
+        old = self._lru.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        if len(blob) > self.max_bytes:
+            return
+        self._lru[key] = blob
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._lru.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    # ------------------------------------------------------------------ #
+    # SQLite tier (lock held by callers)
+    # ------------------------------------------------------------------ #
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None or self._pid != os.getpid():  # reopen after fork
+            try:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " provider TEXT, model TEXT, dim INTEGER, digest TEXT, vector BLOB,"
+                    " PRIMARY KEY (provider, model, dim, digest))"
+                )
+                self._conn, self._pid = conn, os.getpid()
+            except sqlite3.Error as exc:
+                print(f"[embedding_cache] disk cache unavailable ({exc}); memory only")
+                self.path = None
+                return None
+        return self._conn
+
+    def _disk_get(self, keys: List[Key]) -> Dict[Key, bytes]:
+        conn = self._db()
+        found: Dict[Key, bytes] = {}
+        if conn is None:
+            return found
+        try:
+            for key in keys:
+                row = conn.execute(
+                    "SELECT vector FROM embeddings WHERE provider=? AND model=? AND dim=? AND digest=?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    found[key] = row[0]
+        except sqlite3.Error as exc:  # pragma: no cover - disk dependent
+            print(f"[embedding_cache] disk read failed ({exc})")
+        return found
+
+    def _disk_put(self, encoded: List[Tuple[Key, bytes]]) -> None:
+        conn = self._db()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                    [(*key, blob) for key, blob in encoded],
+                )
+            self._writes_since_trim += len(encoded)
+            if self._writes_since_trim >= 1000:
+                self._trim_disk(conn)
+        except sqlite3.Error as exc:  # pragma: no cover - disk dependent
+            print(f"[embedding_cache] disk write failed ({exc})")
+
+    def _trim_disk(self, conn: sqlite3.Connection) -> None:
+        self._writes_since_trim = 0
+        total, rows = conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0), COUNT(*) FROM embeddings").fetchone()
+        if total <= self.disk_max_bytes or not rows:
+            return
+        excess = int(rows * (1 - self.disk_max_bytes / total)) + 1
+        with conn:  # oldest rows first
+            conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)", (excess,)
+            )
+        self._stats["evictions"] += excess
+
+
+_DEFAULT: Optional[EmbeddingCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache built from the environment, or ``None`` when off."""
+    global _DEFAULT
+    mode = _env("EMBED_CACHE", "on").lower()
+    if mode in ("off", "0", "false", "no"):
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            path = None
+            if mode != "memory":
+                path = _env("EMBED_CACHE_PATH", str(_ROOT / ".cache" / "embeddings.sqlite"))
+            _DEFAULT = EmbeddingCache(
+                path=path,
+                max_bytes=int(_env_float("EMBED_CACHE_MAX_MB", 64) * (1 << 20)),
+                disk_max_bytes=int(_env_float("EMBED_CACHE_DISK_MAX_MB", 1024) * (1 << 20)),
+            )
+        return _DEFAULT
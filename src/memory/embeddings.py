@@ -13,12 +13,21 @@ on stage without a network connection.
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import math
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src import metrics
+
+from .embedding_cache import EmbeddingCache, Key, get_embedding_cache
+from .provider_clients import async_voyage_client, bedrock_runtime, timed, voyage_client
 
 _TOKEN_RE = re.compile(r"[a-z0-9]+")
 
@@ -27,45 +36,81 @@ def _env(name: str, default: str = "") -> str:
     return (os.getenv(name) or default).strip()
 
 
-def embed_dim() -> int:
+def _env_int(name: str, default: int) -> int:
     try:
-        return int(_env("EMBED_DIM", "1024"))
+        return int(_env(name, str(default)))
     except ValueError:
-        return 1024
+        return default
 
 
-def _l2_normalise(vec: List[float]) -> List[float]:
-    norm = math.sqrt(sum(v * v for v in vec))
-    if norm == 0:
-        return vec
-    return [v / norm for v in vec]
+def embed_dim() -> int:
+    return _env_int("EMBED_DIM", 1024)
 
 
 # --------------------------------------------------------------------------- #
 # Offline deterministic fallback
 # --------------------------------------------------------------------------- #
+_SLOT_MEMO_MAX = 1 << 18
+_SLOT_MEMO: Dict[int, Dict[str, Tuple[int, float]]] = {}
+
+
+def _token_slots(tokens: List[str], dim: int) -> Tuple[List[int], List[float]]:
+    """Map tokens to their ``(index, sign)`` bucket, memoised per dimension."""
+    memo = _SLOT_MEMO.setdefault(dim, {})
+    idxs, signs = [], []
+    for tok in tokens:
+        slot = memo.get(tok)
+        if slot is None:
+            h = int.from_bytes(hashlib.md5(tok.encode("utf-8")).digest(), "big")
+            slot = (h % dim, 1.0 if (h >> 8) & 1 else -1.0)
+            if len(memo) >= _SLOT_MEMO_MAX:
+                memo.clear()
+            memo[tok] = slot
+        idxs.append(slot[0])
+        signs.append(slot[1])
+    return idxs, signs
+
+
+def _local_embedding_matrix(texts: List[str], dim: int) -> np.ndarray:
+    """Embed many texts into one ``(len(texts), dim)`` float64 array.
+
+    Token counts are accumulated in float32 (exact for any realistic text) and
+    normalised in float64, so each row is bit-identical to the original
+    pure-Python implementation and previously stored vectors stay valid.
+    """
+    rows, cols, signs = [], [], []
+    for r, text in enumerate(texts):
+        idxs, sgn = _token_slots(_TOKEN_RE.findall((text or "").lower()), dim)
+        rows.extend([r] * len(idxs))
+        cols.extend(idxs)
+        signs.extend(sgn)
+    counts = np.zeros((len(texts), dim), dtype=np.float32)
+    np.add.at(counts, (rows, cols), np.asarray(signs, dtype=np.float32))
+    out = counts.astype(np.float64)
+    norms = np.sqrt(np.einsum("ij,ij->i", out, out))
+    nonzero = norms > 0
+    out[nonzero] /= norms[nonzero, None]
+    return out
+
+
 def _local_embedding(text: str, dim: int) -> List[float]:
     """Deterministic hashed bag-of-words embedding (no network required)."""
-    vec = [0.0] * dim
-    tokens = _TOKEN_RE.findall((text or "").lower())
-    for tok in tokens:
-        h = int(hashlib.md5(tok.encode("utf-8")).hexdigest(), 16)
-        idx = h % dim
-        sign = 1.0 if (h >> 8) & 1 else -1.0
-        vec[idx] += sign
-    return _l2_normalise(vec)
+    return _local_embedding_matrix([text], dim)[0].tolist()
 
 
 # --------------------------------------------------------------------------- #
 # Voyage AI
 # --------------------------------------------------------------------------- #
-def _voyage_embedding(text: str) -> List[float]:
-    import voyageai  # imported lazily so it is an optional dependency
-
-    client = voyageai.Client(api_key=_env("VOYAGE_API_KEY"))
+def _voyage_embeddings(texts: List[str]) -> List[List[float]]:
+    client = voyage_client()
     model = _env("VOYAGE_MODEL", "voyage-3")
-    result = client.embed([text], model=model, input_type="document")
-    return result.embeddings[0]
+    with timed("voyage"):
+        result = client.embed(texts, model=model, input_type="document")
+    return result.embeddings
+
+
+def _voyage_embedding(text: str) -> List[float]:
+    return _voyage_embeddings([text])[0]
 
 
 # --------------------------------------------------------------------------- #
@@ -74,16 +119,28 @@ def _voyage_embedding(text: str) -> List[float]:
 def _bedrock_embedding(text: str) -> List[float]:
     import json
 
-    import boto3
-
-    client = boto3.client("bedrock-runtime", region_name=_env("AWS_REGION", "us-east-1"))
+    client = bedrock_runtime()
     model_id = _env("BEDROCK_EMBED_MODEL_ID", "amazon.titan-embed-text-v2:0")
     body = json.dumps({"inputText": text})
-    resp = client.invoke_model(modelId=model_id, body=body)
-    payload = json.loads(resp["body"].read())
+    with timed("bedrock"):
+        resp = client.invoke_model(modelId=model_id, body=body)
+        payload = json.loads(resp["body"].read())
     return payload["embedding"]
 
 
+def _bedrock_embeddings(texts: List[str]) -> List[List[float]]:
+    # Titan has no multi-input request; a chunk is a single text and the
+    # worker pool in ``embed_many`` provides the parallelism.
+    return [_bedrock_embedding(t) for t in texts]
+
+
+# provider -> (batch function, default max texts per request, default max tokens per request)
+_BATCH_PROVIDERS: Dict[str, Tuple[Callable[[List[str]], List[List[float]]], int, int]] = {
+    "voyage": (_voyage_embeddings, 128, 100_000),
+    "bedrock": (_bedrock_embeddings, 1, 8_000),
+}
+
+
 @lru_cache(maxsize=1)
 def _resolve_provider() -> str:
     """Pick a provider once, based on config and what is actually reachable."""
@@ -102,26 +159,168 @@ def active_provider() -> str:
     return _resolve_provider()
 
 
+def warm_embeddings() -> str:
+    """Resolve the provider and build its clients and cache ahead of the first
+    request (no embedding call is made); returns the provider."""
+    provider = _resolve_provider()
+    get_embedding_cache()
+    if provider == "voyage":
+        voyage_client()
+        async_voyage_client()
+    elif provider == "bedrock":
+        bedrock_runtime()
+    return provider
+
+
+def _provider_model(provider: str) -> str:
+    if provider == "voyage":
+        return _env("VOYAGE_MODEL", "voyage-3")
+    if provider == "bedrock":
+        return _env("BEDROCK_EMBED_MODEL_ID", "amazon.titan-embed-text-v2:0")
+    return "local"
+
+
 def embed_text(text: str) -> List[float]:
     """Return an embedding for ``text`` using the best available provider.
 
-    Any provider error falls back to the offline local embedding so a live demo
-    never hard-fails on a transient cloud issue.
+    Provider results are served from / written to the embedding cache. Any
+    provider error falls back to the offline local embedding (never cached) so a
+    live demo never hard-fails on a transient cloud issue.
     """
     provider = _resolve_provider()
     dim = embed_dim()
-    try:
-        if provider == "voyage":
-            return _voyage_embedding(text)
-        if provider == "bedrock":
-            return _bedrock_embedding(text)
-    except Exception as exc:  # pragma: no cover - network dependent
-        print(f"[embeddings] provider '{provider}' failed ({exc}); using local fallback")
+    if provider in _BATCH_PROVIDERS:
+        cache = get_embedding_cache()
+        key = cache.key(provider, _provider_model(provider), dim, text or "") if cache else None
+        if cache is not None:
+            hit = cache.get(key)
+            if hit is not None:
+                return hit
+        try:
+            vector = _voyage_embedding(text) if provider == "voyage" else _bedrock_embedding(text)
+            if cache is not None:
+                cache.put(key, vector)
+            return vector
+        except Exception as exc:  # pragma: no cover - network dependent
+            print(f"[embeddings] provider '{provider}' failed ({exc}); using local fallback")
+            metrics.inc("embedding_fallbacks_total", {"provider": provider})
+    return _local_embedding(text, dim)
+
+
+async def _acache_get(cache: EmbeddingCache, key: Key) -> Optional[List[float]]:
+    """Hot keys from the memory tier on the loop; SQLite on a worker thread."""
+    if not cache.path:
+        return cache.get(key)
+    hit = cache.get_memory(key)
+    if hit is not None:
+        return hit
+    return await asyncio.to_thread(cache.get, key)
+
+
+async def _acache_put(cache: EmbeddingCache, key: Key, vector: List[float]) -> None:
+    if cache.path:
+        await asyncio.to_thread(cache.put, key, vector)  # commits a WAL transaction
+    else:
+        cache.put(key, vector)
+
+
+async def aembed_text(text: str) -> List[float]:
+    """Async :func:`embed_text`: Voyage is awaited on its async client; Bedrock
+    (boto3 has no async API) runs on a worker thread. Same cache and fallback."""
+    provider = _resolve_provider()
+    if provider == "bedrock":
+        return await asyncio.to_thread(embed_text, text)
+    dim = embed_dim()
+    if provider == "voyage":
+        cache = get_embedding_cache()
+        key = cache.key(provider, _provider_model(provider), dim, text or "") if cache else None
+        if cache is not None:
+            hit = await _acache_get(cache, key)
+            if hit is not None:
+                return hit
+        try:
+            client = async_voyage_client()
+            with timed("voyage"):
+                result = await client.embed([text], model=_provider_model(provider), input_type="document")
+            vector = result.embeddings[0]
+            if cache is not None:
+                await _acache_put(cache, key, vector)
+            return vector
+        except Exception as exc:  # pragma: no cover - network dependent
+            print(f"[embeddings] provider '{provider}' failed ({exc}); using local fallback")
+            metrics.inc("embedding_fallbacks_total", {"provider": provider})
     return _local_embedding(text, dim)
 
 
+def _approx_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _chunk_spans(texts: List[str], max_items: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """Split ``texts`` into ``(start, end)`` spans within the provider's limits."""
+    spans, start, tokens = [], 0, 0
+    for i, text in enumerate(texts):
+        cost = _approx_tokens(text)
+        if i > start and (i - start >= max_items or tokens + cost > max_tokens):
+            spans.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        spans.append((start, len(texts)))
+    return spans
+
+
 def embed_many(texts: List[str]) -> List[List[float]]:
-    return [embed_text(t) for t in texts]
+    """Embed ``texts`` in as few provider round trips as the limits allow.
+
+    Inputs are chunked to the provider's batch size (``EMBED_BATCH_SIZE``) and
+    token budget (``EMBED_BATCH_TOKENS``), chunks run concurrently on at most
+    ``EMBED_MAX_WORKERS`` threads, and the output keeps the input order. A
+    failing chunk falls back to local embeddings for that chunk only. Cached
+    texts are served without a provider call.
+    """
+    texts = list(texts)
+    provider = _resolve_provider()
+    dim = embed_dim()
+    if provider not in _BATCH_PROVIDERS:
+        return _local_embedding_matrix(texts, dim).tolist()
+
+    cache = get_embedding_cache()
+    model = _provider_model(provider)
+    keys = [cache.key(provider, model, dim, t or "") for t in texts] if cache else []
+    out: List[List[float]] = cache.get_many(keys) if cache else [None] * len(texts)
+    todo = [i for i, vec in enumerate(out) if vec is None]
+    pending = [texts[i] for i in todo]
+
+    embed_batch, max_items, max_tokens = _BATCH_PROVIDERS[provider]
+    if max_items > 1:  # single-input APIs cannot be batched further
+        max_items = max(1, _env_int("EMBED_BATCH_SIZE", max_items))
+    spans = _chunk_spans(pending, max_items, _env_int("EMBED_BATCH_TOKENS", max_tokens))
+
+    def run(span: Tuple[int, int]) -> None:
+        lo, hi = span
+        try:
+            vectors = embed_batch(pending[lo:hi])
+            if len(vectors) != hi - lo:
+                raise ValueError(f"expected {hi - lo} embeddings, got {len(vectors)}")
+            if cache is not None:
+                cache.put_many([(keys[i], vec) for i, vec in zip(todo[lo:hi], vectors)])
+        except Exception as exc:  # pragma: no cover - network dependent
+            print(f"[embeddings] provider '{provider}' failed on a batch of {hi - lo} "
+                  f"({exc}); using local fallback for it")
+            metrics.inc("embedding_fallbacks_total", {"provider": provider}, hi - lo)
+            vectors = _local_embedding_matrix(pending[lo:hi], dim).tolist()
+        for i, vec in zip(todo[lo:hi], vectors):
+            out[i] = vec
+
+    workers = min(max(1, _env_int("EMBED_MAX_WORKERS", 4)), len(spans))
+    if workers <= 1:
+        for span in spans:
+            run(span)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+            list(pool.map(run, spans))
+    return out
 
 
 def cosine_similarity(a: List[float], b: List[float]) -> float:
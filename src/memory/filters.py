@@ -0,0 +1,178 @@
+"""Metadata pre-filters for decision retrieval.
+
+``similar_decisions`` used to take the top-k and only then drop the applicant's
+own history in Python, so it often returned fewer than k neighbours and could
+not be restricted to a segment. Filters are now applied *before* scoring:
+
+* on Atlas, as the ``filter`` clause of ``$vectorSearch`` (the fields are
+  declared as ``filter`` paths by ``scripts/create_indexes.py``);
+* locally, as a boolean mask built from an inverted ID-set index over the
+  stored documents (see :class:`FilterIndex`).
+
+Supported filters (values may be a single value or a list):
+
+    band="Approve"          age_bucket="25-34"        occupation="Engineer"
+    since=<ISO timestamp | datetime | epoch seconds>   max_age_days=90
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# filter key -> stored document field
+EQUALITY_FIELDS = {
+    "band": "band",
+    "age_bucket": "age_bucket",
+    "occupation": "Occupation",
+    "applicant_id": "applicant_id",
+}
+RANGE_FIELD = "decided_at"  # epoch seconds, written by ``store_decision``
+INDEXED_FIELDS = tuple(EQUALITY_FIELDS.values()) + (RANGE_FIELD,)
+
+# (op, field, value) with op in "in" | "nin" | "gte"
+Clause = Tuple[str, str, Any]
+
+_AGE_BUCKETS = ((25, "18-24"), (35, "25-34"), (45, "35-44"), (55, "45-54"), (65, "55-64"))
+
+
+def age_bucket(age: Any) -> Optional[str]:
+    """Coarse age band used as a filterable field (``None`` if unparseable)."""
+    try:
+        years = int(float(str(age).strip().strip("_")))
+    except (TypeError, ValueError):
+        return None
+    if years < 18:
+        return None
+    for upper, label in _AGE_BUCKETS:
+        if years < upper:
+            return label
+    return "65+"
+
+
+def _epoch(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def _values(value: Any) -> List[Any]:
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def build_clauses(filters: Optional[Dict[str, Any]] = None,
+                  exclude_applicant: Optional[str] = None) -> List[Clause]:
+    """Normalise the public ``filters`` dict (plus an exclusion) into clauses."""
+    clauses: List[Clause] = []
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        if key in EQUALITY_FIELDS:
+            clauses.append(("in", EQUALITY_FIELDS[key], _values(value)))
+        elif key == "since":
+            clauses.append(("gte", RANGE_FIELD, _epoch(value)))
+        elif key == "max_age_days":
+            clauses.append(("gte", RANGE_FIELD, time.time() - float(value) * 86400))
+        else:
+            raise ValueError(f"unsupported decision filter '{key}'")
+    if exclude_applicant:
+        clauses.append(("nin", "applicant_id", [exclude_applicant]))
+    return clauses
+
+
+def to_mongo(clauses: Sequence[Clause]) -> Dict[str, Any]:
+    """The ``$vectorSearch`` ``filter`` document for ``clauses``."""
+    parts = []
+    for op, field, value in clauses:
+        if op == "gte":
+            parts.append({field: {"$gte": value}})
+        elif op == "in":
+            parts.append({field: {"$eq": value[0]}} if len(value) == 1 else {field: {"$in": value}})
+        else:
+            parts.append({field: {"$ne": value[0]}} if len(value) == 1 else {field: {"$nin": value}})
+    if not parts:
+        return {}
+    return parts[0] if len(parts) == 1 else {"$and": parts}
+
+
+class FilterIndex:
+    """Inverted index from field values to document positions.
+
+    Fields are indexed lazily the first time a clause uses them, then kept in
+    step with the document list on each query (appends only), so a reopened
+    persistent store pays for the fields it actually filters on, once.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[Any, List[int]]] = {}
+        self._arrays: Dict[Tuple[str, Any], np.ndarray] = {}
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._synced: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def mask(self, docs: Sequence[Dict[str, Any]], n: int, clauses: Sequence[Clause]) -> np.ndarray:
+        """Boolean mask over the first ``n`` documents satisfying every clause."""
+        out = np.ones(n, dtype=bool)
+        with self._lock:
+            for op, field, value in clauses:
+                if op == "gte":
+                    column = self._sync_numeric(docs, n, field)[:n]
+                    with np.errstate(invalid="ignore"):
+                        out &= column >= value
+                    continue
+                hit = np.zeros(n, dtype=bool)
+                for v in value:
+                    positions = self._positions(docs, n, field, v)
+                    hit[positions[positions < n]] = True
+                out &= hit if op == "in" else ~hit
+        return out
+
+    def preload(self, docs: Sequence[Dict[str, Any]], n: int) -> None:
+        """Index every filter field over the first ``n`` ``docs`` up front (a
+        reopened persistent store passes just those fields, read in one pass)."""
+        with self._lock:
+            for field in EQUALITY_FIELDS.values():
+                self._sync_postings(docs, n, field)
+            self._sync_numeric(docs, n, RANGE_FIELD)
+
+    # ------------------------------------------------------------------ #
+    def _positions(self, docs, n: int, field: str, value: Any) -> np.ndarray:
+        postings = self._sync_postings(docs, n, field)
+        arr = self._arrays.get((field, value))
+        if arr is None:
+            arr = np.asarray(postings.get(value, ()), dtype=np.int64)
+            self._arrays[(field, value)] = arr
+        return arr
+
+    def _sync_postings(self, docs, n: int, field: str) -> Dict[Any, List[int]]:
+        postings = self._postings.setdefault(field, {})
+        for pos in range(self._synced.get(("in", field), 0), n):
+            value = docs[pos].get(field)
+            try:
+                postings.setdefault(value, []).append(pos)
+            except TypeError:  # unhashable values are never matched
+                continue
+            self._arrays.pop((field, value), None)
+        self._synced[("in", field)] = max(n, self._synced.get(("in", field), 0))
+        return postings
+
+    def _sync_numeric(self, docs, n: int, field: str) -> np.ndarray:
+        column = self._numeric.get(field)
+        start = self._synced.get(("gte", field), 0)
+        if column is None or len(column) < n:
+            grown = np.full(max(n, 2 * (0 if column is None else len(column)), 1024), np.nan)
+            if column is not None:
+                grown[:start] = column[:start]
+            column = self._numeric[field] = grown
+        for pos in range(start, n):
+            try:
+                column[pos] = float(docs[pos].get(field))
+            except (TypeError, ValueError):
+                pass
+        self._synced[("gte", field)] = max(n, start)
+        return column
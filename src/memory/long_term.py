@@ -6,23 +6,49 @@ This is the durable memory layer from the workshop architecture:
     * ``policies``   - lending policy snippets used for RAG grounding
 
 Retrieval uses Atlas ``$vectorSearch`` when a vector index is available and
-falls back to an in-Python cosine scan otherwise, so the same code runs against
+falls back to a local vector index otherwise (exact while small, IVF
+approximate once large - see ``ann.py``), so the same code runs against
 a full Atlas cluster on stage or a plain local MongoDB (or no MongoDB at all)
-during development.
+during development. Policies are the exception: the corpus is a handful of
+snippets, so it is held as a resident matrix and searched in-process, reloaded
+only when ``upsert_policies`` changes it.
+
+``EMBED_STORAGE_PRECISION`` (float32 | float16 | int8 | binary) shrinks the
+local indexes (see ``vector_index.py``); for anything but float32, decisions
+and policies are written to MongoDB as a packed BinData float32 vector instead
+of a BSON array of doubles, and ``scripts/create_indexes.py`` asks Atlas to
+quantise the index to match.
 """
 from __future__ import annotations
 
+import asyncio
 import os
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src import metrics
 
-from .embeddings import cosine_similarity, embed_text
+from .ann import IVFIndex
+from .embeddings import embed_many, embed_text
+from .filters import INDEXED_FIELDS, Clause, age_bucket, build_clauses, to_mongo
+from .mongo import get_async_database, get_client
+from .persistence import PersistentIVFIndex
+from .vector_index import PRECISIONS, VectorIndex
+from .write_behind import WriteBehindQueue
 
 try:  # pymongo is optional for the pure-offline path
-    from pymongo import MongoClient
+    from bson import ObjectId
+    from bson.binary import Binary, BinaryVectorDtype
     from pymongo.errors import PyMongoError
 except Exception:  # pragma: no cover
-    MongoClient = None  # type: ignore
+    ObjectId = None  # type: ignore
+    Binary = None  # type: ignore
     PyMongoError = Exception  # type: ignore
 
 
@@ -30,12 +56,69 @@ def _env(name: str, default: str = "") -> str:
     return (os.getenv(name) or default).strip()
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _storage_precision() -> str:
+    precision = _env("EMBED_STORAGE_PRECISION", "float32").lower()
+    if precision not in PRECISIONS:
+        print(f"[long_term] unknown EMBED_STORAGE_PRECISION '{precision}'; using float32")
+        return "float32"
+    return precision
+
+
+def _to_storage(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of ``doc`` with its embedding packed as BinData for reduced precision."""
+    emb = doc.get("embedding")
+    if Binary is None or _storage_precision() == "float32" or not isinstance(emb, list):
+        return doc
+    return dict(doc, embedding=Binary.from_vector([float(x) for x in emb], BinaryVectorDtype.FLOAT32))
+
+
+def _from_storage(doc: Dict[str, Any]) -> Dict[str, Any]:
+    emb = doc.get("embedding")
+    if Binary is not None and isinstance(emb, Binary):
+        doc["embedding"] = emb.as_vector().data
+    return doc
+
+
+def _ann_index(persist_prefix: Optional[str] = None) -> IVFIndex:
+    """Decision index used whenever Atlas ``$vectorSearch`` is not in play."""
+    kwargs = dict(
+        nlist=_env_int("ANN_NLIST", 0),
+        nprobe=_env_int("ANN_NPROBE", 8),
+        min_train_size=_env_int("ANN_MIN_SIZE", 20000),
+        precision=_storage_precision(),
+        rescore_factor=_env_int("EMBED_RESCORE_FACTOR", 10),
+    )
+    if persist_prefix:
+        return PersistentIVFIndex(persist_prefix, **kwargs)
+    return IVFIndex(**kwargs)
+
+
 class _InMemoryStore:
-    """Minimal stand-in used when no MONGODB_URI is configured."""
+    """Minimal stand-in used when no MONGODB_URI is configured.
 
-    def __init__(self) -> None:
-        self.decisions: List[Dict[str, Any]] = []
-        self.policies: List[Dict[str, Any]] = []
+    With ``MEMORY_STORE_PATH`` set, decisions are persisted under that directory
+    (see ``persistence.py``) and survive restarts. Policies are re-seeded from
+    ``data/policies.json`` and stay process-local.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        path = path if path is not None else _env("MEMORY_STORE_PATH")
+        self.decisions = _ann_index(os.path.join(path, "decisions") if path else None)
+        self.policies = VectorIndex()
 
 
 class LongTermMemory:
@@ -43,16 +126,37 @@ class LongTermMemory:
         self.uri = uri if uri is not None else _env("MONGODB_URI")
         self.db_name = db_name or _env("MONGODB_DB", "bfsi-genai")
         self._mem = _InMemoryStore()
+        # Local ANN mirrors of MongoDB collections for when $vectorSearch is unavailable.
+        self._mirrors: Dict[str, IVFIndex] = {}
+        self._mirror_ids: Dict[str, set] = {}
+        self._mirror_high: Dict[str, Any] = {}  # highest _id read from MongoDB
+        self._mirror_loaded_at: Dict[str, float] = {}
+        self._mirror_lock = threading.Lock()
+        self._mirror_refresh_s = _env_float("MIRROR_REFRESH_S", 5.0)
+        self._mirror_lag_s = _env_float("MIRROR_REFRESH_LAG_S", 60.0)
+        # Resident policy table (small, static corpus) + memo of recent queries.
+        self._policy_table: Optional[VectorIndex] = None
+        self._policy_memo: "OrderedDict[Tuple[bytes, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._policy_memo_size = _env_int("POLICY_MEMO_SIZE", 1024)
+        self._policy_lock = threading.Lock()
         self.client = None
         self.db = None
-        if self.uri and MongoClient is not None:
+        self._writer: Optional[WriteBehindQueue] = None
+        if self.uri:
             try:
-                self.client = MongoClient(self.uri, serverSelectionTimeoutMS=4000)
-                self.db = self.client[self.db_name]
+                self.client = get_client(self.uri)  # shared, pooled (see mongo.py)
+                self.db = self.client[self.db_name] if self.client is not None else None
             except Exception as exc:  # pragma: no cover - network dependent
                 print(f"[long_term] MongoDB connection failed ({exc}); using in-memory store")
                 self.client = None
                 self.db = None
+        if self.db is not None and _env("DECISION_WRITE_BEHIND", "on").lower() not in ("off", "0", "false"):
+            self._writer = WriteBehindQueue(
+                self._insert_decisions,
+                batch_size=_env_int("DECISION_FLUSH_BATCH", 100),
+                flush_ms=_env_int("DECISION_FLUSH_MS", 200),
+                max_queue=_env_int("DECISION_QUEUE_MAX", 10000),
+            )
 
     @property
     def backend(self) -> str:
@@ -62,49 +166,225 @@ class LongTermMemory:
     # Write-back
     # ------------------------------------------------------------------ #
     def store_decision(self, record: Dict[str, Any], embedding: Optional[List[float]] = None) -> str:
-        doc = dict(record)
-        doc.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+        doc = self._decision_doc(record, datetime.now(timezone.utc))
         if embedding is None:
             embedding = embed_text(self._decision_text(doc))
         doc["embedding"] = embedding
         if self.db is not None:
+            doc.setdefault("_id", ObjectId())
+            self._mirror_append("decisions", doc)
+            if self._writer is not None and self._writer.submit(doc):
+                return str(doc["_id"])
             try:
-                res = self.db["decisions"].insert_one(doc)
-                return str(res.inserted_id)
+                self.db["decisions"].insert_one(_to_storage(doc))
+                return str(doc["_id"])
             except PyMongoError as exc:  # pragma: no cover
                 print(f"[long_term] insert failed ({exc}); using in-memory store")
         doc.setdefault("_id", f"mem-{len(self._mem.decisions) + 1}")
         self._mem.decisions.append(doc)
         return str(doc["_id"])
 
+    def store_decisions(self, records: List[Dict[str, Any]],
+                        embeddings: Optional[List[List[float]]] = None) -> List[str]:
+        """Bulk :meth:`store_decision`: one ``insert_many`` (bypassing the
+        write-behind queue) or one append to the local store."""
+        now = datetime.now(timezone.utc)
+        docs = [self._decision_doc(r, now) for r in records]
+        if embeddings is None:
+            embeddings = embed_many([self._decision_text(d) for d in docs])
+        for doc, emb in zip(docs, embeddings):
+            doc["embedding"] = emb
+        if self.db is not None:
+            for doc in docs:
+                doc.setdefault("_id", ObjectId())
+                self._mirror_append("decisions", doc)
+            if docs:
+                self._insert_decisions(docs)  # failures are kept in the in-memory store
+            return [str(d["_id"]) for d in docs]
+        start = len(self._mem.decisions)
+        for i, doc in enumerate(docs):
+            doc.setdefault("_id", f"mem-{start + i + 1}")
+        self._mem.decisions.extend(docs)
+        return [str(d["_id"]) for d in docs]
+
+    def update_decision(self, decision_id: str, fields: Dict[str, Any]) -> bool:
+        """Patch a stored decision (e.g. the rationale once the LLM returns).
+
+        ``fields`` must not include filter fields (band, age bucket, ...). A
+        decision still queued for write-behind is patched in the queue.
+        """
+        if self.db is not None and ObjectId is not None and ObjectId.is_valid(decision_id):
+            _id = ObjectId(decision_id)
+            if self._writer is not None and self._writer.update(_id, fields):
+                return True
+            try:
+                if self.db["decisions"].update_one({"_id": _id}, {"$set": fields}).matched_count:
+                    return True
+            except PyMongoError as exc:  # pragma: no cover
+                print(f"[long_term] decision update failed ({exc}); trying in-memory store")
+        index = self._mem.decisions
+        ids: List[Any] = [decision_id]
+        if ObjectId is not None and ObjectId.is_valid(decision_id):
+            ids.append(ObjectId(decision_id))  # write-behind docs that fell back to memory
+        # A plain id map: unique keys must not go through the filter value cache.
+        found = [pos for pos in map(index.position, ids) if pos is not None]
+        if not found:
+            return False
+        index.update_doc(max(found), fields)
+        return True
+
+    async def astore_decision(self, record: Dict[str, Any],
+                              embedding: Optional[List[float]] = None) -> str:
+        return await asyncio.to_thread(self.store_decision, record, embedding)
+
+    async def aupdate_decision(self, decision_id: str, fields: Dict[str, Any]) -> bool:
+        return await asyncio.to_thread(self.update_decision, decision_id, fields)
+
+    def flush(self) -> None:
+        """Wait until all write-behind decisions have reached MongoDB."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def warm(self) -> None:
+        """Load the resident policy table ahead of the first query."""
+        self._policies()
+
+    def writer_stats(self) -> Optional[Dict[str, int]]:
+        """Write-behind queue counters, or ``None`` when writes are synchronous."""
+        return self._writer.stats() if self._writer is not None else None
+
+    def close(self) -> None:
+        """Drain the write-behind queue and commit the local store's pending
+        group commit (called on shutdown)."""
+        if self._writer is not None:
+            self._writer.close()
+        if isinstance(self._mem.decisions, PersistentIVFIndex):
+            self._mem.decisions.sync()
+
+    def _insert_decisions(self, docs: List[Dict[str, Any]]) -> None:
+        try:
+            self.db["decisions"].insert_many([_to_storage(d) for d in docs], ordered=False)
+        except PyMongoError as exc:  # pragma: no cover - network dependent
+            # With ordered=False the rest of the batch is still attempted; keep
+            # whatever did not land (or all of it, if we cannot tell) locally.
+            written = set()
+            details = getattr(exc, "details", None) or {}
+            failed = {docs[e["index"]]["_id"] for e in details.get("writeErrors", [])}
+            if details:
+                written = {d["_id"] for d in docs} - failed
+            lost = [d for d in docs if d["_id"] not in written]
+            print(f"[long_term] insert_many failed for {len(lost)} decisions ({exc}); "
+                  f"keeping them in the in-memory store")
+            self._mem.decisions.extend(lost)
+
     # ------------------------------------------------------------------ #
     # Retrieval (RAG)
     # ------------------------------------------------------------------ #
     def similar_decisions(self, embedding: List[float], k: int = 3,
-                          exclude_applicant: Optional[str] = None) -> List[Dict[str, Any]]:
-        docs = self._vector_search("decisions", _env("DECISIONS_VECTOR_INDEX", "decisions_vector_index"),
-                                    embedding, k, self._mem.decisions)
-        if exclude_applicant:
-            docs = [d for d in docs if d.get("applicant_id") != exclude_applicant]
-        return docs[:k]
+                          exclude_applicant: Optional[str] = None,
+                          filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Top-k past decisions among those matching ``filters`` (see ``filters.py``).
+
+        Filters and the exclusion are applied before ranking, so k results come
+        back whenever k matching decisions exist.
+        """
+        clauses = build_clauses(filters, exclude_applicant)
+        recent = self._writer.pending_index() if self._writer is not None else None
+        return self._vector_search("decisions", _env("DECISIONS_VECTOR_INDEX", "decisions_vector_index"),
+                                   embedding, k, self._mem.decisions, recent=recent, clauses=clauses)
+
+    def similar_decisions_many(self, embeddings: List[List[float]], k: int = 3,
+                               exclude_applicants: Optional[List[Optional[str]]] = None,
+                               filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """:meth:`similar_decisions` for a batch of queries.
+
+        On MongoDB the ``$vectorSearch`` queries are pipelined over the shared
+        pool (``DECISION_SEARCH_WORKERS`` at a time); the local store scores
+        every query in one matrix product (``VectorIndex.search_many``).
+        """
+        excludes = list(exclude_applicants or [None] * len(embeddings))
+        if self.db is not None:
+            workers = max(1, min(len(embeddings), _env_int("DECISION_SEARCH_WORKERS", 8)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(lambda qe: self.similar_decisions(qe[0], k, qe[1], filters),
+                                     zip(embeddings, excludes)))
+        index = self._mem.decisions
+        shared = index.filter_mask(build_clauses(filters))
+        masks = []
+        for applicant in excludes:
+            mask = shared
+            if applicant:
+                own = index.filter_mask([("nin", "applicant_id", [applicant])])
+                mask = own if shared is None else own[:len(shared)] & shared[:len(own)]
+            masks.append(mask)
+        out = []
+        for hits in VectorIndex.search_many(index, embeddings, k, masks=masks):
+            ranked = []
+            for pos, score in hits:
+                item = self._clean(index[pos])
+                item["score"] = round(score, 4)
+                ranked.append(item)
+            out.append(ranked)
+        return out
+
+    async def asimilar_decisions(self, embedding: List[float], k: int = 3,
+                                 exclude_applicant: Optional[str] = None,
+                                 filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Async :meth:`similar_decisions` (``$vectorSearch`` via ``AsyncMongoClient``)."""
+        clauses = build_clauses(filters, exclude_applicant)
+        recent = self._writer.pending_index() if self._writer is not None else None
+        return await self._avector_search("decisions",
+                                          _env("DECISIONS_VECTOR_INDEX", "decisions_vector_index"),
+                                          embedding, k, self._mem.decisions, recent=recent,
+                                          clauses=clauses)
+
+    async def asimilar_policies(self, embedding: List[float], k: int = 3) -> List[Dict[str, Any]]:
+        if self._policy_table is None:  # first load may read MongoDB
+            return await asyncio.to_thread(self.similar_policies, embedding, k)
+        return self.similar_policies(embedding, k)
 
     def similar_policies(self, embedding: List[float], k: int = 3) -> List[Dict[str, Any]]:
-        return self._vector_search("policies", _env("POLICIES_VECTOR_INDEX", "policies_vector_index"),
-                                   embedding, k, self._mem.policies)
+        """Top-k policies from the resident policy table - no database hop.
+
+        Results are memoised by the query quantised to int8, so repeated (or
+        near-identical) applicant profiles skip even the dot product.
+        """
+        q = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        key = (np.rint(q / (norm or 1.0) * 127).astype(np.int8).tobytes(), k)
+        with self._policy_lock:
+            hit = self._policy_memo.get(key)
+            if hit is not None:
+                self._policy_memo.move_to_end(key)
+                return [dict(d) for d in hit]
+        result = self._cosine_rank(self._policies(), embedding, k)
+        with self._policy_lock:
+            self._policy_memo[key] = result
+            while len(self._policy_memo) > self._policy_memo_size:
+                self._policy_memo.popitem(last=False)
+        return [dict(d) for d in result]
+
+    def refresh_policies(self) -> None:
+        """Drop the policy table; the next lookup reloads it (e.g. after an
+        out-of-process reseed)."""
+        with self._policy_lock:
+            self._policy_table = None
+            self._policy_memo.clear()
 
     # ------------------------------------------------------------------ #
     # Policy loading (for seeding)
     # ------------------------------------------------------------------ #
     def upsert_policies(self, policies: List[Dict[str, Any]]) -> int:
+        docs = [dict(pol) for pol in policies]
+        missing = [d for d in docs if "embedding" not in d]
+        for doc, emb in zip(missing, embed_many([d.get("text", "") for d in missing])):
+            doc["embedding"] = emb
         count = 0
-        for pol in policies:
-            doc = dict(pol)
-            if "embedding" not in doc:
-                doc["embedding"] = embed_text(doc.get("text", ""))
+        for doc in docs:
             if self.db is not None:
                 try:
                     self.db["policies"].update_one(
-                        {"policy_id": doc.get("policy_id")}, {"$set": doc}, upsert=True
+                        {"policy_id": doc.get("policy_id")}, {"$set": _to_storage(doc)}, upsert=True
                     )
                     count += 1
                     continue
@@ -112,54 +392,236 @@ class LongTermMemory:
                     print(f"[long_term] policy upsert failed ({exc}); using in-memory store")
             self._mem.policies.append(doc)
             count += 1
+        self.refresh_policies()
         return count
 
     # ------------------------------------------------------------------ #
     # Internals
     # ------------------------------------------------------------------ #
     def _vector_search(self, collection: str, index_name: str, embedding: List[float],
-                       k: int, fallback_docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                       k: int, fallback_docs: VectorIndex,
+                       recent: Optional[VectorIndex] = None,
+                       clauses: Sequence[Clause] = ()) -> List[Dict[str, Any]]:
+        """Top-k from MongoDB (or the local fallback), merged with ``recent``
+        documents that are acknowledged but not yet flushed. ``clauses`` are
+        metadata pre-filters applied before ranking on every path."""
         if self.db is not None:
             try:
-                pipeline = [
-                    {
-                        "$vectorSearch": {
-                            "index": index_name,
-                            "path": "embedding",
-                            "queryVector": embedding,
-                            "numCandidates": max(50, k * 10),
-                            "limit": k,
-                        }
-                    },
-                    {"$addFields": {"score": {"$meta": "vectorSearchScore"}}},
-                ]
+                pipeline = self._atlas_pipeline(index_name, embedding, k, clauses)
                 results = list(self.db[collection].aggregate(pipeline))
                 if results:
-                    return [self._clean(d) for d in results]
+                    return self._merge_atlas(results, recent, embedding, k, clauses)
             except PyMongoError as exc:  # pragma: no cover
                 print(f"[long_term] $vectorSearch on '{collection}' unavailable "
                       f"({exc}); falling back to cosine scan")
-            # Fallback: pull docs and score in Python (works on any MongoDB)
+                metrics.inc("vector_search_fallbacks_total", {"collection": collection})
+        return self._local_search(collection, embedding, k, fallback_docs, recent, clauses)
+
+    async def _avector_search(self, collection: str, index_name: str, embedding: List[float],
+                              k: int, fallback_docs: VectorIndex,
+                              recent: Optional[VectorIndex] = None,
+                              clauses: Sequence[Clause] = ()) -> List[Dict[str, Any]]:
+        """:meth:`_vector_search` with ``$vectorSearch`` on the async driver."""
+        adb = get_async_database(self.uri, self.db_name) if self.db is not None else None
+        if adb is not None:
+            try:
+                pipeline = self._atlas_pipeline(index_name, embedding, k, clauses)
+                cursor = await adb[collection].aggregate(pipeline)
+                results = await cursor.to_list()
+                if results:
+                    return self._merge_atlas(results, recent, embedding, k, clauses)
+            except PyMongoError as exc:  # pragma: no cover
+                print(f"[long_term] $vectorSearch on '{collection}' unavailable "
+                      f"({exc}); falling back to cosine scan")
+                metrics.inc("vector_search_fallbacks_total", {"collection": collection})
+        if self.db is None:
+            return self._local_search(collection, embedding, k, fallback_docs, recent, clauses)
+        return await asyncio.to_thread(self._local_search, collection, embedding, k,
+                                       fallback_docs, recent, clauses)
+
+    @staticmethod
+    def _atlas_pipeline(index_name: str, embedding: List[float], k: int,
+                        clauses: Sequence[Clause]) -> List[Dict[str, Any]]:
+        stage = {
+            "index": index_name,
+            "path": "embedding",
+            "queryVector": embedding,
+            "numCandidates": max(50, k * 10),
+            "limit": k,
+        }
+        if clauses:
+            stage["filter"] = to_mongo(clauses)
+        return [
+            {"$vectorSearch": stage},
+            {"$addFields": {"score": {"$meta": "vectorSearchScore"}}},
+        ]
+
+    def _merge_atlas(self, results: List[Dict[str, Any]], recent: Optional[VectorIndex],
+                     embedding: List[float], k: int, clauses: Sequence[Clause]) -> List[Dict[str, Any]]:
+        # Atlas reports cosine as (1 + cos) / 2; put recent hits on that scale.
+        return self._merge([self._clean(d) for d in results],
+                           self._cosine_rank(recent, embedding, k, atlas_scale=True, clauses=clauses), k)
+
+    def _local_search(self, collection: str, embedding: List[float], k: int,
+                      fallback_docs: VectorIndex, recent: Optional[VectorIndex],
+                      clauses: Sequence[Clause]) -> List[Dict[str, Any]]:
+        if self.db is not None:
+            # Local ANN mirror of the collection (works on any MongoDB)
             try:
-                docs = list(self.db[collection].find({"embedding": {"$exists": True}}).limit(500))
-                return self._cosine_rank(docs, embedding, k)
+                return self._merge(self._mirror_search(collection, embedding, k, clauses),
+                                   self._cosine_rank(recent, embedding, k, clauses=clauses), k)
             except PyMongoError:  # pragma: no cover
                 pass
-        return self._cosine_rank(fallback_docs, embedding, k)
+        return self._merge(self._cosine_rank(fallback_docs, embedding, k, clauses=clauses),
+                           self._cosine_rank(recent, embedding, k, clauses=clauses), k)
 
-    def _cosine_rank(self, docs: List[Dict[str, Any]], embedding: List[float],
-                     k: int) -> List[Dict[str, Any]]:
+    def _policies(self) -> VectorIndex:
+        """The policy corpus as a normalised matrix, loaded once."""
+        with self._policy_lock:
+            if self._policy_table is not None:
+                return self._policy_table
+        table = self._mem.policies
+        if self.db is not None:
+            try:
+                docs = [_from_storage(d) for d in self.db["policies"].find({"embedding": {"$exists": True}})]
+                if docs:
+                    table = VectorIndex.from_docs(docs)
+            except PyMongoError as exc:  # pragma: no cover - network dependent
+                print(f"[long_term] policy load failed ({exc}); using in-memory policies")
+        with self._policy_lock:
+            if self._policy_table is None:
+                self._policy_table = table
+            return self._policy_table
+
+    def _mirror(self, collection: str, batch_size: int = 10000) -> IVFIndex:
+        """Load ``_id``, embedding and filter fields of a collection once, then
+        pick up documents written elsewhere (other workers, ``seed_memory``)
+        every ``MIRROR_REFRESH_S``; this process's own writes are appended as
+        they happen."""
+        with self._mirror_lock:
+            index = self._mirrors.get(collection)
+            if index is None:
+                index = _ann_index()
+                ids: set = set()
+                high = None
+                batch = []
+                for doc in self._mirror_find(collection, {}):
+                    batch.append(doc)
+                    ids.add(doc["_id"])
+                    high = doc["_id"] if high is None or self._id_gt(doc["_id"], high) else high
+                    if len(batch) >= batch_size:
+                        index.extend(batch)
+                        batch = []
+                index.extend(batch)
+                self._mirrors[collection] = index
+                self._mirror_ids[collection] = ids
+                self._mirror_high[collection] = high
+                self._mirror_loaded_at[collection] = time.monotonic()
+                return index
+            due = time.monotonic() - self._mirror_loaded_at[collection] >= self._mirror_refresh_s
+            if due:  # claim the refresh; other threads keep searching the current index
+                self._mirror_loaded_at[collection] = time.monotonic()
+                high = self._mirror_high[collection]
+        if due:
+            self._mirror_refresh(collection, index, high)
+        return index
+
+    def _mirror_refresh(self, collection: str, index: IVFIndex, high: Any) -> None:
+        """Append documents with ``_id`` past the high-water mark. ObjectIds are
+        minted before a (write-behind) insert lands, so the query reaches back
+        ``MIRROR_REFRESH_LAG_S`` and skips ids already mirrored."""
+        query: Dict[str, Any] = {}
+        if high is not None:
+            floor = high
+            if ObjectId is not None and isinstance(high, ObjectId):
+                floor = ObjectId.from_datetime(high.generation_time - timedelta(seconds=self._mirror_lag_s))
+            query = {"_id": {"$gt": floor}}
+        try:
+            docs = list(self._mirror_find(collection, query))
+        except PyMongoError as exc:  # pragma: no cover - network dependent
+            print(f"[long_term] mirror refresh of '{collection}' failed ({exc}); serving stale mirror")
+            return
+        with self._mirror_lock:
+            ids = self._mirror_ids[collection]
+            fresh = [d for d in docs if d["_id"] not in ids]
+            for doc in docs:
+                if self._id_gt(doc["_id"], self._mirror_high[collection]):
+                    self._mirror_high[collection] = doc["_id"]
+            ids.update(d["_id"] for d in fresh)
+            if fresh:
+                index.extend(fresh)
+
+    def _mirror_find(self, collection: str, query: Dict[str, Any]):
+        projection = {"embedding": 1, **{f: 1 for f in INDEXED_FIELDS}}
+        cursor = self.db[collection].find(dict(query, embedding={"$exists": True}), projection)
+        return (_from_storage(doc) for doc in cursor)
+
+    @staticmethod
+    def _id_gt(a: Any, b: Any) -> bool:
+        if b is None:
+            return True
+        try:
+            return a > b
+        except TypeError:  # mixed _id types: keep the current mark
+            return False
+
+    def _mirror_search(self, collection: str, embedding: List[float], k: int,
+                       clauses: Sequence[Clause] = ()) -> List[Dict[str, Any]]:
+        index = self._mirror(collection)
+        mask = index.filter_mask(clauses)
+        hits = [(index[pos]["_id"], score) for pos, score in index.search(embedding, k, mask=mask)]
+        if not hits:
+            return []
+        found = {
+            d["_id"]: d
+            for d in self.db[collection].find({"_id": {"$in": [i for i, _ in hits]}}, {"embedding": 0})
+        }
         scored = []
-        for d in docs:
-            emb = d.get("embedding")
-            if not emb:
-                continue
-            score = cosine_similarity(embedding, emb)
-            item = self._clean(d)
-            item["score"] = round(score, 4)
+        for _id, score in hits:
+            if _id in found:
+                item = self._clean(found[_id])
+                item["score"] = round(score, 4)
+                scored.append(item)
+        return scored
+
+    def _cosine_rank(self, index: Optional[VectorIndex], embedding: List[float], k: int,
+                     atlas_scale: bool = False,
+                     clauses: Sequence[Clause] = ()) -> List[Dict[str, Any]]:
+        """Top-k by cosine among rows passing ``clauses``; only the winners are
+        copied out as dicts."""
+        if index is None:
+            return []
+        scored = []
+        for pos, score in index.search(embedding, k, mask=index.filter_mask(clauses)):
+            item = self._clean(index[pos])
+            item["score"] = round((1 + score) / 2 if atlas_scale else score, 4)
             scored.append(item)
-        scored.sort(key=lambda x: x.get("score", 0), reverse=True)
-        return scored[:k]
+        return scored
+
+    @staticmethod
+    def _merge(primary: List[Dict[str, Any]], recent: List[Dict[str, Any]],
+               k: int) -> List[Dict[str, Any]]:
+        if not recent:
+            return primary
+        seen = {d.get("_id") for d in recent}
+        merged = recent + [d for d in primary if d.get("_id") not in seen]
+        merged.sort(key=lambda d: d.get("score", 0), reverse=True)
+        return merged[:k]
+
+    def _mirror_append(self, collection: str, doc: Dict[str, Any]) -> None:
+        with self._mirror_lock:
+            mirror = self._mirrors.get(collection)
+            if mirror is not None and doc["_id"] not in self._mirror_ids[collection]:
+                self._mirror_ids[collection].add(doc["_id"])
+                mirror.append({f: doc[f] for f in ("_id", "embedding", *INDEXED_FIELDS) if f in doc})
+
+    @staticmethod
+    def _decision_doc(record: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        doc = dict(record)
+        doc.setdefault("timestamp", now.isoformat())
+        doc.setdefault("decided_at", now.timestamp())
+        doc.setdefault("age_bucket", age_bucket(doc.get("Age")))
+        return doc
 
     @staticmethod
     def _clean(doc: Dict[str, Any]) -> Dict[str, Any]:
@@ -186,10 +648,12 @@ class LongTermMemory:
 
 # Convenience singleton for the API layer
 _DEFAULT: Optional[LongTermMemory] = None
+_DEFAULT_LOCK = threading.Lock()
 
 
 def get_memory() -> LongTermMemory:
     global _DEFAULT
-    if _DEFAULT is None:
-        _DEFAULT = LongTermMemory()
-    return _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = LongTermMemory()
+        return _DEFAULT
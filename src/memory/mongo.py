@@ -0,0 +1,227 @@
+"""Process-wide, pooled MongoDB clients.
+
+``MongoClient`` owns a connection pool, its TLS sessions and the server
+monitoring threads, so it is meant to be created once per process and shared.
+Every module (long-term memory, product recommendations, the MCP server and
+the index script) gets its client from :func:`get_client` instead of building
+its own - previously ``/similar_products`` paid for a fresh pool, TLS handshake
+and server selection on every call.
+
+Clients are keyed by ``(uri, pid)``: a uvicorn/gunicorn worker forked from a
+parent that already held a client builds its own instead of reusing sockets it
+shares with the parent. :func:`get_async_client` does the same for pymongo's
+``AsyncMongoClient`` (used by ``CreditAgent.aevaluate``), per event loop.
+
+Configuration (all optional):
+
+    MONGODB_MAX_POOL_SIZE=100             MONGODB_MIN_POOL_SIZE=0
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS=4000
+    MONGODB_CONNECT_TIMEOUT_MS=5000       MONGODB_SOCKET_TIMEOUT_MS=0 (none)
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS=0 (none)
+    MONGODB_READ_PREFERENCE=primary       e.g. primaryPreferred, nearest
+
+:func:`pool_stats` (shown on ``/health``) reports checked-out connections and
+checkout wait times gathered by a pool listener.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+try:  # pymongo is optional for the pure-offline path
+    from pymongo import MongoClient, monitoring
+except Exception:  # pragma: no cover
+    MongoClient = None  # type: ignore
+    monitoring = None  # type: ignore
+
+try:  # pymongo >= 4.10
+    from pymongo import AsyncMongoClient
+except Exception:  # pragma: no cover
+    AsyncMongoClient = None  # type: ignore
+
+
+def _env(name: str, default: str = "") -> str:
+    return (os.getenv(name) or default).strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+class PoolStats(monitoring.ConnectionPoolListener if monitoring else object):  # type: ignore[misc]
+    """Connection pool counters for one client (events arrive on driver threads)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.created = self.closed = self.checked_out = 0
+        self.checkouts = self.checkout_failures = 0
+        self.wait_ms_total = self.wait_ms_max = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open": self.created - self.closed,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+            }
+
+    def _waited(self, event: Any) -> None:
+        ms = float(getattr(event, "duration", 0.0) or 0.0) * 1000
+        self.wait_ms_total += ms
+        self.wait_ms_max = max(self.wait_ms_max, ms)
+
+    def connection_created(self, event: Any) -> None:
+        with self._lock:
+            self.created += 1
+
+    def connection_closed(self, event: Any) -> None:
+        with self._lock:
+            self.closed += 1
+
+    def connection_checked_out(self, event: Any) -> None:
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self._waited(event)
+
+    def connection_check_out_failed(self, event: Any) -> None:
+        with self._lock:
+            self.checkout_failures += 1
+            self._waited(event)
+
+    def connection_checked_in(self, event: Any) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    # Remaining pool events are not tracked.
+    def pool_created(self, event: Any) -> None:
+        pass
+
+    def pool_ready(self, event: Any) -> None:
+        pass
+
+    def pool_cleared(self, event: Any) -> None:
+        pass
+
+    def pool_closed(self, event: Any) -> None:
+        pass
+
+    def connection_ready(self, event: Any) -> None:
+        pass
+
+    def connection_check_out_started(self, event: Any) -> None:
+        pass
+
+
+def client_options() -> Dict[str, Any]:
+    """Pool, timeout and read-preference keyword arguments from the environment."""
+    options: Dict[str, Any] = {
+        "maxPoolSize": _env_int("MONGODB_MAX_POOL_SIZE", 100),
+        "minPoolSize": _env_int("MONGODB_MIN_POOL_SIZE", 0),
+        "serverSelectionTimeoutMS": _env_int("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 4000),
+        "connectTimeoutMS": _env_int("MONGODB_CONNECT_TIMEOUT_MS", 5000),
+        "readPreference": _env("MONGODB_READ_PREFERENCE", "primary"),
+    }
+    for key, name in (("socketTimeoutMS", "MONGODB_SOCKET_TIMEOUT_MS"),
+                      ("waitQueueTimeoutMS", "MONGODB_WAIT_QUEUE_TIMEOUT_MS")):
+        value = _env_int(name, 0)
+        if value > 0:
+            options[key] = value
+    return options
+
+
+_CLIENTS: Dict[Tuple[str, int], Tuple[Any, PoolStats]] = {}
+_LOCK = threading.Lock()
+
+
+def get_client(uri: Optional[str] = None) -> Optional[Any]:
+    """The shared client for ``uri`` (default ``MONGODB_URI``), or ``None``
+    when no URI is configured or pymongo is missing."""
+    uri = uri if uri is not None else _env("MONGODB_URI")
+    if not uri or MongoClient is None:
+        return None
+    pid = os.getpid()
+    with _LOCK:
+        entry = _CLIENTS.get((uri, pid))
+        if entry is None:
+            # Entries from a parent process are unusable after fork; forget them.
+            for key in [k for k in _CLIENTS if k[1] != pid]:
+                del _CLIENTS[key]
+            stats = PoolStats()
+            client = MongoClient(uri, event_listeners=[stats], **client_options())
+            entry = _CLIENTS[(uri, pid)] = (client, stats)
+        return entry[0]
+
+
+def get_database(uri: Optional[str] = None, db_name: Optional[str] = None) -> Optional[Any]:
+    client = get_client(uri)
+    if client is None:
+        return None
+    return client[db_name or _env("MONGODB_DB", "bfsi-genai")]
+
+
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Tuple[Any, PoolStats]]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def get_async_client(uri: Optional[str] = None) -> Optional[Any]:
+    """The shared ``AsyncMongoClient`` for ``uri`` on the running event loop,
+    or ``None`` (no URI, no async driver, or called outside a loop)."""
+    uri = uri if uri is not None else _env("MONGODB_URI")
+    if not uri or AsyncMongoClient is None:
+        return None
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        entry = clients.get(uri)
+        if entry is None:
+            stats = PoolStats()
+            client = AsyncMongoClient(uri, event_listeners=[stats], **client_options())
+            entry = clients[uri] = (client, stats)
+        return entry[0]
+
+
+def get_async_database(uri: Optional[str] = None, db_name: Optional[str] = None) -> Optional[Any]:
+    client = get_async_client(uri)
+    if client is None:
+        return None
+    return client[db_name or _env("MONGODB_DB", "bfsi-genai")]
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Pool counters per client in this process (URIs are not exposed)."""
+    pid = os.getpid()
+    with _LOCK:
+        mine = [stats for (_, p), (_, stats) in _CLIENTS.items() if p == pid]
+        mine += [stats for clients in _ASYNC_CLIENTS.values() for _, stats in clients.values()]
+    return {"clients": len(mine), "pools": [stats.snapshot() for stats in mine]}
+
+
+def close_clients() -> None:
+    """Close this process's sync clients (called on shutdown)."""
+    pid = os.getpid()
+    with _LOCK:
+        mine = [k for k in _CLIENTS if k[1] == pid]
+        entries = [_CLIENTS.pop(k) for k in mine]
+    for client, _ in entries:
+        client.close()
+
+
+async def aclose_clients() -> None:
+    """Close the async clients bound to the running loop."""
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client, _ in clients.values():
+        await client.close()
@@ -0,0 +1,370 @@
+"""Optional on-disk persistence for the in-memory decision store.
+
+Without ``MONGODB_URI`` every decision written back by the agent used to vanish
+when the process exited. Setting ``MEMORY_STORE_PATH`` to a directory keeps the
+decision index on local disk instead:
+
+    <name>.vec    128-byte header + float32 rows, opened with ``np.memmap``
+    <name>.jsonl  append-only document metadata, one JSON object per line
+    <name>.idx    fixed-size (offset, length, valid) record per document
+
+Reopening maps the vector file and reads the small ``.idx`` array; the filter
+fields (band, occupation, applicant, ...) are read in one sequential pass over
+the JSONL so the first filtered query does not parse every document. Other
+metadata is parsed lazily when a search actually returns it.
+
+Crash safety: data is appended and fsync'd *before* the header is updated, and
+the header holds two checksummed slots written alternately. On open the newest
+valid slot wins and anything past its committed length (a torn write) is
+truncated, so the index never sees a half-written record.
+
+Durability (``MEMORY_STORE_SYNC``):
+
+    batch   (default) group commit: writes are visible at once and a timer
+            fsyncs data then header every ``MEMORY_STORE_SYNC_MS`` (100), so a
+            burst of decisions costs one round of fsyncs; a crash loses at most
+            that window, never consistency
+    always  fsync data and header on every write (three fsyncs per decision)
+
+The on-disk rows are always float32. ``EMBED_STORAGE_PRECISION=binary`` keeps
+only the sign bits in RAM (rebuilt on open) and rescores from the mapped rows;
+float16/int8 are in-RAM encodings and fall back to float32 here.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .ann import IVFIndex
+from .filters import INDEXED_FIELDS
+from .vector_index import VectorIndex, _pack_signs
+
+_MAGIC = b"CSVEC001"
+_HEADER_SIZE = 128
+_SLOT = struct.Struct("<QQQI4x")  # seq, count, metadata bytes, crc32
+_SLOT_OFFSETS = (16, 16 + _SLOT.size)
+_RECORD = np.dtype([("offset", "<i8"), ("length", "<u4"), ("valid", "u1"), ("pad", "V3")])
+
+
+def _env(name: str, default: str = "") -> str:
+    return (os.getenv(name) or default).strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _sibling(prefix: Path, suffix: str) -> Path:
+    return prefix.parent / (prefix.name + suffix)
+
+
+def _slot_crc(seq: int, count: int, meta: int) -> int:
+    return zlib.crc32(struct.pack("<QQQ", seq, count, meta))
+
+
+class _Header:
+    """Fixed header of the ``.vec`` file with two alternating commit slots."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.dim: Optional[int] = None
+        self.seq = self.count = self.meta = 0
+        if path.exists() and path.stat().st_size >= _HEADER_SIZE:
+            with path.open("rb") as f:
+                raw = f.read(_HEADER_SIZE)
+            if raw[:8] != _MAGIC:
+                raise ValueError(f"{path} is not a vector store file")
+            self.dim = struct.unpack_from("<I", raw, 8)[0] or None
+            for off in _SLOT_OFFSETS:
+                seq, count, meta, crc = _SLOT.unpack_from(raw, off)
+                if crc == _slot_crc(seq, count, meta) and seq >= self.seq:
+                    self.seq, self.count, self.meta = seq, count, meta
+
+    def create(self) -> None:
+        with self.path.open("wb") as f:
+            f.write(_MAGIC + bytes(_HEADER_SIZE - len(_MAGIC)))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def set_dim(self, fd: int, dim: int) -> None:
+        os.pwrite(fd, struct.pack("<I", dim), 8)
+        os.fsync(fd)
+        self.dim = dim
+
+    def commit(self, fd: int, count: int, meta: int) -> None:
+        self.seq += 1
+        slot = _SLOT.pack(self.seq, count, meta, _slot_crc(self.seq, count, meta))
+        os.pwrite(fd, slot, _SLOT_OFFSETS[self.seq % 2])
+        os.fsync(fd)
+        self.count, self.meta = count, meta
+
+
+class _DocLog:
+    """Lazy, list-like view over the JSONL sidecar (what ``VectorIndex._docs`` holds)."""
+
+    def __init__(self, prefix: Path, count: int, meta_bytes: int, cache_size: int = 4096) -> None:
+        self._jsonl = _sibling(prefix, ".jsonl")
+        self._idx = _sibling(prefix, ".idx")
+        for path, size in ((self._jsonl, meta_bytes), (self._idx, count * _RECORD.itemsize)):
+            path.touch()
+            if path.stat().st_size > size:  # drop a torn, uncommitted tail
+                os.truncate(path, size)
+        self._records = np.fromfile(self._idx, dtype=_RECORD, count=count)
+        self._committed = count
+        self._meta_bytes = meta_bytes
+        self._tail = meta_bytes  # next append offset in the JSONL file
+        self._pending: List[Tuple[int, int]] = []
+        self._rewrites: Dict[int, Tuple[int, int]] = {}  # committed pos -> new line
+        self._fd_jsonl = os.open(self._jsonl, os.O_RDWR)
+        self._fd_idx = os.open(self._idx, os.O_RDWR)
+        self._cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self._records["valid"].astype(bool)
+
+    @property
+    def staged(self) -> Tuple[int, int]:
+        """``(count, meta_bytes)`` written so far, durable or not."""
+        return self._committed, self._meta_bytes
+
+    def project(self, fields: Iterable[str]) -> List[Dict[str, Any]]:
+        """``fields`` of every committed document, in one sequential read."""
+        fields = tuple(fields)
+        if not self._committed or not self._meta_bytes:
+            return [{} for _ in range(self._committed)]
+        out = []
+        with self._jsonl.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for offset, length in zip(self._records["offset"].tolist(), self._records["length"].tolist()):
+                doc = json.loads(view[offset:offset + length])
+                out.append({k: doc[k] for k in fields if k in doc})
+        return out
+
+    def __len__(self) -> int:
+        return self._committed + len(self._pending)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, pos: int) -> Dict[str, Any]:
+        if pos < 0:
+            pos += len(self)
+        with self._cache_lock:
+            doc = self._cache.get(pos)
+            if doc is not None:
+                self._cache.move_to_end(pos)
+                return doc
+        if pos in self._rewrites:
+            offset, length = self._rewrites[pos]
+        elif pos < self._committed:
+            offset, length = int(self._records["offset"][pos]), int(self._records["length"][pos])
+        else:
+            offset, length = self._pending[pos - self._committed]
+        doc = json.loads(os.pread(self._fd_jsonl, length, offset))
+        self._remember(pos, doc)
+        return doc
+
+    def extend(self, docs: Iterable[Dict[str, Any]]) -> None:
+        docs = list(docs)
+        lines = [json.dumps(d, default=str).encode("utf-8") + b"\n" for d in docs]
+        offset = self._tail
+        os.pwrite(self._fd_jsonl, b"".join(lines), offset)
+        for doc, line in zip(docs, lines):
+            self._pending.append((offset, len(line)))
+            self._remember(len(self) - 1, doc)
+            offset += len(line)
+        self._tail = offset
+
+    def __setitem__(self, pos: int, doc: Dict[str, Any]) -> None:
+        """Replace a document: the new line is appended and its record repointed
+        at the next ``commit`` (the old line is left as dead space)."""
+        line = json.dumps(doc, default=str).encode("utf-8") + b"\n"
+        os.pwrite(self._fd_jsonl, line, self._tail)
+        entry = (self._tail, len(line))
+        self._tail += len(line)
+        if pos < self._committed:
+            self._rewrites[pos] = entry
+        else:
+            self._pending[pos - self._committed] = entry
+        self._remember(pos, doc)
+
+    def commit(self, valid: np.ndarray, sync: bool = True) -> Tuple[int, int]:
+        """Write pending records (durably unless ``sync`` is off); returns the
+        new ``(count, meta_bytes)``."""
+        records = np.zeros(len(self._pending), dtype=_RECORD)
+        if self._pending:
+            records["offset"], records["length"] = zip(*self._pending)
+            records["valid"] = valid[-len(self._pending):]
+            os.pwrite(self._fd_idx, records.tobytes(), self._committed * _RECORD.itemsize)
+        if sync:
+            self.sync()
+        self._records = np.concatenate([self._records, records])
+        self._committed += len(self._pending)
+        self._meta_bytes = self._tail
+        self._pending = []
+        return self._committed, self._meta_bytes
+
+    def sync(self) -> None:
+        os.fsync(self._fd_jsonl)
+        os.fsync(self._fd_idx)
+
+    def publish_rewrites(self, rewrites: Optional[Dict[int, Tuple[int, int]]] = None,
+                         sync: bool = True) -> None:
+        """Repoint replaced documents (all, or the ``rewrites`` snapshot); only
+        once the header durably covers their lines, so a crash leaves either the
+        old or the new version, never a torn one."""
+        rewrites = dict(self._rewrites) if rewrites is None else rewrites
+        if not rewrites:
+            return
+        for pos, entry in rewrites.items():
+            self._records["offset"][pos], self._records["length"][pos] = entry
+            os.pwrite(self._fd_idx, self._records[pos:pos + 1].tobytes(), pos * _RECORD.itemsize)
+            if self._rewrites.get(pos) == entry:  # not replaced again since
+                del self._rewrites[pos]
+        if sync:
+            os.fsync(self._fd_idx)
+
+    def close(self) -> None:
+        os.close(self._fd_jsonl)
+        os.close(self._fd_idx)
+
+    def _remember(self, pos: int, doc: Dict[str, Any]) -> None:
+        with self._cache_lock:
+            self._cache[pos] = doc
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+
+class PersistentIndexMixin:
+    """Makes a :class:`VectorIndex` (or subclass) durable under ``prefix``."""
+
+    def _open_store(self, prefix: str) -> None:
+        if self.precision not in ("float32", "binary"):
+            print(f"[persistence] {self.precision} storage is in-memory only; "
+                  "persisting float32 rows")
+            self.precision = "float32"
+        self._prefix = Path(prefix)
+        self._prefix.parent.mkdir(parents=True, exist_ok=True)
+        self._vec_path = _sibling(self._prefix, ".vec")
+        self._header = _Header(self._vec_path)
+        if not self._vec_path.exists():
+            self._header.create()
+        self._fd_vec = os.open(self._vec_path, os.O_RDWR)
+        self._docs = _DocLog(self._prefix, self._header.count, self._header.meta)
+        self._sync_mode = _env("MEMORY_STORE_SYNC", "batch").lower()
+        self._sync_s = max(_env_int("MEMORY_STORE_SYNC_MS", 100), 1) / 1000.0
+        self._sync_lock = threading.Lock()
+        self._sync_timer: Optional[threading.Timer] = None
+        self._store_closed = False
+        if self._header.dim is not None:
+            self.dim = self._header.dim
+        elif self.dim is not None:
+            self._header.set_dim(self._fd_vec, self.dim)
+        n = self._header.count
+        self._capacity = max(self._capacity, n)
+        self._valid = np.zeros(self._capacity, dtype=bool)
+        self._valid[:n] = self._docs.valid
+        if self.dim is not None:
+            self._map(self._capacity)
+            if self.precision == "binary":
+                self._bits = np.zeros((self._capacity, (self.dim + 63) // 64), dtype=np.uint64)
+                for lo in range(0, n, 65536):
+                    self._bits[lo:min(n, lo + 65536)] = _pack_signs(self._matrix[lo:min(n, lo + 65536)])
+        if n:
+            docs = self._docs.project(INDEXED_FIELDS + ("_id",))
+            self._filters.preload(docs, n)
+            self._ids = {d["_id"]: pos for pos, d in enumerate(docs) if "_id" in d}
+
+    def _map(self, capacity: int) -> None:
+        size = _HEADER_SIZE + capacity * self.dim * 4
+        if self._vec_path.stat().st_size < size:
+            os.truncate(self._vec_path, size)
+        self._matrix = np.memmap(self._vec_path, dtype=np.float32, mode="r+",
+                                 offset=_HEADER_SIZE, shape=(capacity, self.dim))
+
+    def _grow_matrix(self, capacity: int) -> None:
+        if self._header.dim is None:
+            self._header.set_dim(self._fd_vec, self.dim)
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._map(capacity)
+
+    def _persist(self, start: int, count: int) -> None:
+        if self._sync_mode != "always":
+            self._docs.commit(self._valid[:start + count], sync=False)
+            if self._sync_timer is None:
+                self._sync_timer = threading.Timer(self._sync_s, self._group_commit)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+            return
+        if self._matrix is not None:
+            self._matrix.flush()
+        n, meta = self._docs.commit(self._valid[:start + count])
+        self._header.commit(self._fd_vec, n, meta)
+        self._docs.publish_rewrites()
+
+    def _group_commit(self) -> None:
+        """Make everything written so far durable: rows and metadata first,
+        then the header slot, then repoint rewritten documents. The fsyncs run
+        outside the index lock, so searches and writes carry on meanwhile."""
+        with self._sync_lock:
+            with self._lock:
+                self._sync_timer = None
+                if self._store_closed:
+                    return
+                count, meta = self._docs.staged
+                rewrites = dict(self._docs._rewrites)
+                if (count, meta) == (self._header.count, self._header.meta) and not rewrites:
+                    return
+                matrix = self._matrix
+            if matrix is not None:
+                matrix.flush()
+            self._docs.sync()
+            self._header.commit(self._fd_vec, count, meta)
+            if rewrites:
+                with self._lock:
+                    self._docs.publish_rewrites(rewrites, sync=False)
+                self._docs.sync()
+
+    def sync(self) -> None:
+        """Commit pending writes now instead of at the next group commit."""
+        timer = self._sync_timer
+        if timer is not None:
+            timer.cancel()
+        self._group_commit()
+
+    def close(self) -> None:
+        self.sync()
+        with self._sync_lock, self._lock:
+            self._store_closed = True
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._docs.close()
+            os.close(self._fd_vec)
+
+
+class PersistentVectorIndex(PersistentIndexMixin, VectorIndex):
+    def __init__(self, prefix: str, dim: Optional[int] = None, capacity: int = 1024,
+                 precision: str = "float32") -> None:
+        VectorIndex.__init__(self, dim=dim, capacity=capacity, precision=precision)
+        self._open_store(prefix)
+
+
+class PersistentIVFIndex(PersistentIndexMixin, IVFIndex):
+    def __init__(self, prefix: str, **kwargs: Any) -> None:
+        IVFIndex.__init__(self, **kwargs)
+        self._open_store(prefix)
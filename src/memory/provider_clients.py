@@ -0,0 +1,146 @@
+"""Cached, thread-safe clients for the paid embedding providers.
+
+``_voyage_embedding`` used to build a ``voyageai.Client`` per call and
+``_bedrock_embedding`` a ``boto3.client("bedrock-runtime")`` per call - the
+latter re-resolves credentials and builds a new botocore session and HTTP pool
+every time. Clients are now built once per process (fork-safe, like
+``mongo.py``) and reused; boto3 clients are thread-safe once constructed, so
+the ``embed_many`` worker pool shares one keep-alive connection pool.
+
+Configuration:
+
+    EMBED_MAX_CONNECTIONS=50      HTTP pool size for the Bedrock client
+    EMBED_MAX_RETRIES=3           retry attempts (Voyage and Bedrock)
+    EMBED_RETRY_MODE=standard     botocore retry mode: standard | adaptive | legacy
+    EMBED_CONNECT_TIMEOUT_S=5     EMBED_READ_TIMEOUT_S=30
+
+:func:`client_stats` separates the time spent constructing clients from the
+time spent in provider round trips.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+
+def _env(name: str, default: str = "") -> str:
+    return (os.getenv(name) or default).strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(_env(name, str(default)))
+    except ValueError:
+        return default
+
+
+_CLIENTS: Dict[Tuple[Any, ...], Any] = {}
+_LOCK = threading.Lock()
+_STATS: Dict[str, Dict[str, float]] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def _record(provider: str, stage: str, ms: float) -> None:
+    with _STATS_LOCK:
+        entry = _STATS.setdefault(provider, {})
+        entry[f"{stage}_count"] = entry.get(f"{stage}_count", 0) + 1
+        entry[f"{stage}_ms_total"] = entry.get(f"{stage}_ms_total", 0.0) + ms
+        entry[f"{stage}_ms_max"] = max(entry.get(f"{stage}_ms_max", 0.0), ms)
+
+
+@contextmanager
+def timed(provider: str, stage: str = "call") -> Iterator[None]:
+    """Record the duration of a provider round trip (or construction)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(provider, stage, (time.perf_counter() - t0) * 1000)
+
+
+def client_stats() -> Dict[str, Dict[str, float]]:
+    """Per provider: construct_* and call_* count, total and max milliseconds."""
+    with _STATS_LOCK:
+        return {p: {k: round(v, 3) for k, v in s.items()} for p, s in _STATS.items()}
+
+
+def _cached(key: Tuple[Any, ...], provider: str, build) -> Any:
+    key = key + (os.getpid(),)
+    client = _CLIENTS.get(key)
+    if client is not None:
+        return client
+    with _LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            with timed(provider, "construct"):
+                client = build()
+            _CLIENTS[key] = client
+        return client
+
+
+def voyage_client() -> Any:
+    """Shared ``voyageai.Client`` for the configured API key."""
+    import voyageai  # imported lazily so it is an optional dependency
+
+    api_key = _env("VOYAGE_API_KEY")
+    return _cached(
+        ("voyage", api_key), "voyage",
+        lambda: voyageai.Client(
+            api_key=api_key,
+            max_retries=_env_int("EMBED_MAX_RETRIES", 3),
+            timeout=_env_float("EMBED_READ_TIMEOUT_S", 30),
+        ),
+    )
+
+
+def async_voyage_client() -> Any:
+    """Shared ``voyageai.AsyncClient`` (used by ``aembed_text``)."""
+    import voyageai
+
+    api_key = _env("VOYAGE_API_KEY")
+    return _cached(
+        ("voyage-async", api_key), "voyage",
+        lambda: voyageai.AsyncClient(
+            api_key=api_key,
+            max_retries=_env_int("EMBED_MAX_RETRIES", 3),
+            timeout=_env_float("EMBED_READ_TIMEOUT_S", 30),
+        ),
+    )
+
+
+def bedrock_runtime(region: str = "") -> Any:
+    """Shared ``bedrock-runtime`` client with a sized keep-alive pool and retries."""
+    import boto3
+    from botocore.config import Config
+
+    region = region or _env("AWS_REGION", "us-east-1")
+
+    def build() -> Any:
+        config = Config(
+            max_pool_connections=_env_int("EMBED_MAX_CONNECTIONS", 50),
+            retries={"max_attempts": _env_int("EMBED_MAX_RETRIES", 3),
+                     "mode": _env("EMBED_RETRY_MODE", "standard")},
+            connect_timeout=_env_float("EMBED_CONNECT_TIMEOUT_S", 5),
+            read_timeout=_env_float("EMBED_READ_TIMEOUT_S", 30),
+            tcp_keepalive=True,
+        )
+        # A private session: the default boto3 session is not thread-safe.
+        return boto3.session.Session().client("bedrock-runtime", region_name=region, config=config)
+
+    return _cached(("bedrock", region, _env("AWS_PROFILE"), _env("AWS_ACCESS_KEY_ID")), "bedrock", build)
+
+
+def reset_clients() -> None:
+    """Forget cached clients (e.g. after rotating credentials)."""
+    with _LOCK:
+        _CLIENTS.clear()
@@ -0,0 +1,378 @@
+"""Contiguous in-process vector index for long-term memory.
+
+Backs the in-memory store (and the Python-side fallback scan over MongoDB
+documents) with a growable matrix of pre-normalised embeddings. A query is then
+one matrix-vector product plus ``argpartition`` instead of a Python loop over
+every document, and only the top-k winners are ever materialised.
+
+Rows can be held at reduced precision (``EMBED_STORAGE_PRECISION``):
+
+* ``float32`` - the default, 4 bytes per dimension;
+* ``float16`` / ``int8`` - 2 / 1 bytes per dimension plus one float32 scale
+  factor per vector (each row is stored divided by its largest magnitude);
+* ``binary`` - packed sign bits (1 bit per dimension) used as a Hamming
+  pre-filter; the ``rescore_factor * k`` nearest candidates are then rescored
+  against the full-precision rows. The float32 rows stay the rescoring source,
+  so the saving is scan time - and, with ``MEMORY_STORE_PATH``, resident memory,
+  since those rows are then memory-mapped and only candidates are paged in.
+
+numpy has no fast float16 matmul on most CPUs, so float16 halves memory at the
+cost of a slower exact scan; int8 scans in roughly float32 time.
+
+The index also behaves like the plain list it replaces (``append``, ``len``,
+iteration, indexing), so callers that walk the stored documents keep working.
+Stored documents do not keep their ``embedding`` list; the matrix row is the
+embedding of record.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .filters import Clause, FilterIndex
+
+PRECISIONS = ("float32", "float16", "int8", "binary")
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_SCAN_CHUNK = 65536
+_DECODE_CHUNK = 256  # rows dequantised at a time; keeps the float32 copy in cache
+
+
+def _normalise_rows(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _grown(old: Optional[np.ndarray], shape: Tuple[int, ...], dtype: Any, n: int) -> np.ndarray:
+    new = np.zeros(shape, dtype=dtype)
+    if old is not None:
+        new[:n] = old[:n]
+    return new
+
+
+def _pack_signs(rows: np.ndarray) -> np.ndarray:
+    """Sign bits of ``rows`` packed into uint64 words (zero padded)."""
+    packed = np.packbits(rows > 0, axis=-1)
+    pad = -packed.shape[-1] % 8
+    if pad:
+        packed = np.pad(packed, [(0, 0)] * (packed.ndim - 1) + [(0, pad)])
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int32)
+    return _POPCOUNT[words.view(np.uint8)].sum(axis=-1, dtype=np.int32)
+
+
+class VectorIndex:
+    """Documents plus a contiguous matrix of their unit-length embeddings."""
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 1024,
+                 precision: str = "float32", rescore_factor: int = 10) -> None:
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+        self.dim = dim
+        self.precision = precision
+        self.rescore_factor = max(1, rescore_factor)
+        self._capacity = max(1, capacity)
+        self._docs: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None   # rows in the storage dtype
+        self._scales: Optional[np.ndarray] = None   # float16/int8: per-vector scale
+        self._bits: Optional[np.ndarray] = None     # binary: packed sign bits
+        self._valid = np.zeros(self._capacity, dtype=bool)
+        self._filters = FilterIndex()
+        self._ids: Dict[Any, int] = {}  # _id -> position (the latest, if re-added)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_docs(cls, docs: Iterable[Dict[str, Any]]) -> "VectorIndex":
+        index = cls()
+        index.extend(docs)
+        return index
+
+    @property
+    def _dtype(self) -> Any:
+        return {"float16": np.float16, "int8": np.int8}.get(self.precision, np.float32)
+
+    @property
+    def _scaled(self) -> bool:
+        return self.precision in ("float16", "int8")
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the vector structures for the stored rows."""
+        n = len(self._docs)
+        return sum(arr[:n].nbytes for arr in (self._matrix, self._scales, self._bits, self._valid)
+                   if arr is not None)
+
+    # ------------------------------------------------------------------ #
+    # List-like behaviour
+    # ------------------------------------------------------------------ #
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._docs))
+
+    def __getitem__(self, pos: int) -> Dict[str, Any]:
+        return self._docs[pos]
+
+    def append(self, doc: Dict[str, Any]) -> int:
+        """Add one document (its ``embedding`` is moved into the matrix)."""
+        return self.extend([doc])[0]
+
+    def extend(self, docs: Iterable[Dict[str, Any]]) -> List[int]:
+        docs = list(docs)
+        if not docs:
+            return []
+        embeddings = [d.get("embedding") for d in docs]
+        dim = self.dim
+        if dim is None:
+            dim = next((len(e) for e in embeddings if e is not None and len(e)), None)
+        rows = None
+        if dim is not None:
+            rows = np.zeros((len(docs), dim), dtype=np.float32)
+            for i, emb in enumerate(embeddings):
+                if emb is not None and len(emb) == dim:
+                    rows[i] = np.asarray(emb, dtype=np.float32)
+        return self.extend_matrix(rows, docs)
+
+    def extend_matrix(self, vectors: Optional[np.ndarray],
+                      docs: Optional[Iterable[Dict[str, Any]]] = None) -> List[int]:
+        """Bulk-add a ``(n, dim)`` array of embeddings with optional metadata.
+
+        All-zero rows count as "no embedding" and are never returned by search.
+        """
+        stripped = [{k: v for k, v in d.items() if k != "embedding"} for d in docs or ()]
+        if vectors is not None:
+            vectors = np.asarray(vectors, dtype=np.float32)
+            if not stripped:
+                stripped = [{} for _ in range(len(vectors))]
+        if not stripped:
+            return []
+        with self._lock:
+            if self.dim is None and vectors is not None:
+                self.dim = vectors.shape[1]
+            start = len(self._docs)
+            self._reserve(start + len(stripped))
+            if vectors is not None:
+                valid = np.any(vectors != 0, axis=1)
+                rows = _normalise_rows(vectors)
+                self._encode(start, rows)
+                self._valid[start:start + len(rows)] = valid
+                self._on_rows_added(start, rows, valid)
+            self._docs.extend(stripped)
+            self._ids.update((d["_id"], start + i) for i, d in enumerate(stripped) if "_id" in d)
+            self._persist(start, len(stripped))
+        return list(range(start, start + len(stripped)))
+
+    def position(self, _id: Any) -> Optional[int]:
+        """Position of the document with ``_id``, or ``None``."""
+        with self._lock:
+            return self._ids.get(_id)
+
+    def update_doc(self, pos: int, fields: Dict[str, Any]) -> None:
+        """Merge ``fields`` into the stored metadata of document ``pos``.
+
+        Used to patch non-indexed fields (e.g. a late rationale); filter fields
+        must not change after insert.
+        """
+        fields = {k: v for k, v in fields.items() if k != "embedding"}
+        with self._lock:
+            self._docs[pos] = dict(self._docs[pos], **fields)
+            self._persist(len(self._docs), 0)
+
+    def discard(self, positions: Iterable[int]) -> None:
+        """Exclude documents from search; their rows stay allocated."""
+        with self._lock:
+            for pos in positions:
+                self._valid[pos] = False
+
+    def _on_rows_added(self, start: int, rows: np.ndarray, valid: np.ndarray) -> None:
+        """Hook for subclasses that maintain secondary structures over rows."""
+
+    def _persist(self, start: int, count: int) -> None:
+        """Hook for durable subclasses; called with the lock held after a write."""
+
+    # ------------------------------------------------------------------ #
+    # Search
+    # ------------------------------------------------------------------ #
+    def filter_mask(self, clauses: Sequence[Clause]) -> Optional[np.ndarray]:
+        """Pre-filter mask for ``search`` from metadata clauses (see ``filters.py``)."""
+        if not clauses:
+            return None
+        with self._lock:
+            n = len(self._docs)
+            docs = self._docs
+        return self._filters.mask(docs, n, clauses)
+
+    def search(self, query: List[float], k: int,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Return ``(position, cosine)`` for the top ``k`` documents, best first.
+
+        ``mask`` optionally restricts the candidates (boolean, one per document).
+        """
+        with self._lock:
+            n = len(self._docs)
+            matrix, scales, bits = self._matrix, self._scales, self._bits
+            valid = self._valid[:n].copy()
+        if k <= 0 or n == 0 or matrix is None:
+            return []
+        q = self._unit_query(query)
+        if q is None:
+            return []
+        if mask is not None:  # rows appended after the mask was built are excluded
+            valid[:len(mask)] &= mask[:n]
+            valid[len(mask):] = False
+        k = min(k, int(valid.sum()))
+        if k == 0:
+            return []
+        if self.precision == "binary":
+            cand = self._hamming_candidates(bits[:n], q, valid, k * self.rescore_factor)
+            return self._top_k(cand, matrix[cand] @ q, k)
+        if mask is not None and 4 * int(valid.sum()) < n:
+            # Selective pre-filter: score only the surviving rows.
+            cand = np.flatnonzero(valid)
+            return self._top_k(cand, self._scores(matrix, scales, cand, q), k)
+        if self._scaled:
+            scores = np.empty(n, dtype=np.float32)
+            for lo in range(0, n, _DECODE_CHUNK):
+                hi = min(n, lo + _DECODE_CHUNK)
+                scores[lo:hi] = self._scores(matrix, scales, slice(lo, hi), q)
+        else:
+            scores = matrix[:n] @ q
+        scores[~valid] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        return self._top_k(top, scores[top], k)
+
+    def search_many(self, queries: Sequence[List[float]], k: int,
+                    masks: Optional[Sequence[Optional[np.ndarray]]] = None) -> List[List[Tuple[int, float]]]:
+        """:meth:`search` for a batch of queries, scored as one matrix product.
+
+        ``masks`` optionally gives one mask (or ``None``) per query. The index
+        is scanned once per block of queries instead of once per query; binary
+        precision keeps the per-query Hamming prefilter.
+        """
+        out: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        with self._lock:
+            n = len(self._docs)
+            matrix, scales = self._matrix, self._scales
+            valid = self._valid[:n].copy()
+        if k <= 0 or n == 0 or matrix is None or not len(queries):
+            return out
+        if self.precision == "binary":
+            return [VectorIndex.search(self, q, k, mask=None if masks is None else masks[i])
+                    for i, q in enumerate(queries)]
+        units = [(i, self._unit_query(q)) for i, q in enumerate(queries)]
+        units = [(i, q) for i, q in units if q is not None]
+        # Bound the (rows x queries) score block to ~64 MB.
+        step = max(1, (1 << 24) // n)
+        for lo in range(0, len(units), step):
+            block = units[lo:lo + step]
+            q = np.stack([u for _, u in block], axis=1)
+            if self._scaled:
+                scores = np.empty((n, len(block)), dtype=np.float32)
+                for r in range(0, n, _DECODE_CHUNK):
+                    hi = min(n, r + _DECODE_CHUNK)
+                    scores[r:hi] = (matrix[r:hi].astype(np.float32) @ q) * scales[r:hi, None]
+            else:
+                scores = matrix[:n] @ q
+            for j, (i, _) in enumerate(block):
+                keep = valid.copy()
+                mask = None if masks is None else masks[i]
+                if mask is not None:
+                    keep[:len(mask)] &= mask[:n]
+                    keep[len(mask):] = False
+                cand = np.flatnonzero(keep)
+                out[i] = self._top_k(cand, scores[cand, j], k)
+        return out
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+    def _unit_query(self, query: List[float]) -> Optional[np.ndarray]:
+        q = np.asarray(query, dtype=np.float32)
+        if q.shape != (self.dim,):
+            return None
+        qn = float(np.linalg.norm(q))
+        return q / qn if qn else q
+
+    @staticmethod
+    def _top_k(cand: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Best ``k`` of the candidate positions, ties broken by position."""
+        k = min(k, len(cand))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(cand) else np.arange(len(cand))
+        top = top[np.lexsort((cand[top], -scores[top]))]
+        return [(int(cand[i]), float(scores[i])) for i in top]
+
+    @staticmethod
+    def _hamming_candidates(bits: np.ndarray, q: np.ndarray, valid: np.ndarray,
+                            m: int) -> np.ndarray:
+        """The ``m`` valid rows whose sign bits are closest to the query's."""
+        qbits = _pack_signs(q)
+        dist = np.empty(len(bits), dtype=np.int32)
+        for lo in range(0, len(bits), _SCAN_CHUNK):
+            block = np.bitwise_xor(bits[lo:lo + _SCAN_CHUNK], qbits)
+            dist[lo:lo + len(block)] = _popcount(block)
+        cand = np.flatnonzero(valid)
+        if m < len(cand):
+            cand = cand[np.argpartition(dist[cand], m - 1)[:m]]
+        return cand
+
+    def _encode(self, start: int, rows: np.ndarray) -> None:
+        end = start + len(rows)
+        if self._scaled:
+            peak = np.abs(rows).max(axis=1)
+            peak[peak == 0] = 1.0
+            levels = 127 if self.precision == "int8" else 1
+            scaled = rows / peak[:, None] * levels
+            self._matrix[start:end] = np.rint(scaled) if levels > 1 else scaled
+            self._scales[start:end] = peak / levels
+            return
+        self._matrix[start:end] = rows
+        if self.precision == "binary":
+            self._bits[start:end] = _pack_signs(rows)
+
+    def _scores(self, matrix: np.ndarray, scales: Optional[np.ndarray], idx: Any,
+                q: np.ndarray) -> np.ndarray:
+        """Cosine of ``q`` with rows ``idx``; the scale is applied after the dot."""
+        if not self._scaled:
+            return matrix[idx] @ q
+        if isinstance(idx, slice):
+            return (matrix[idx].astype(np.float32) @ q) * scales[idx]
+        out = np.empty(len(idx), dtype=np.float32)
+        for lo in range(0, len(idx), _DECODE_CHUNK):
+            part = idx[lo:lo + _DECODE_CHUNK]
+            out[lo:lo + len(part)] = (matrix[part].astype(np.float32) @ q) * scales[part]
+        return out
+
+    def _decode(self, matrix: np.ndarray, scales: Optional[np.ndarray], idx: Any) -> np.ndarray:
+        """float32 rows for ``idx`` (a slice or an array of positions)."""
+        rows = matrix[idx]
+        if self._scaled:
+            return rows.astype(np.float32) * scales[idx][:, None]
+        return rows
+
+    def _reserve(self, size: int) -> None:
+        if self._matrix is not None and size <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < size:
+            capacity *= 2
+        n = len(self._docs)
+        if self.dim is not None:
+            self._grow_matrix(capacity)
+            if self._scaled:
+                self._scales = _grown(self._scales, (capacity,), np.float32, n)
+            if self.precision == "binary":
+                self._bits = _grown(self._bits, (capacity, (self.dim + 63) // 64), np.uint64, n)
+        self._valid = _grown(self._valid, (capacity,), bool, n)
+        self._capacity = capacity
+
+    def _grow_matrix(self, capacity: int) -> None:
+        self._matrix = _grown(self._matrix, (capacity, self.dim), self._dtype, len(self._docs))
@@ -0,0 +1,206 @@
+"""Write-behind queue for decision write-back.
+
+``store_decision`` used to do a synchronous ``insert_one`` on the request path,
+so every ``/score`` paid a full MongoDB round trip before responding. With this
+queue the decision is acknowledged immediately (its ``_id`` is assigned
+client-side) and a background thread flushes queued documents with
+``insert_many`` when ``batch_size`` is reached or ``flush_ms`` has elapsed.
+
+* **Backpressure** - ``submit`` blocks for up to ``put_timeout`` seconds when
+  the queue is full and then reports failure so the caller can write inline.
+* **Read-your-writes** - until a document is flushed it stays in ``pending()``
+  and in ``pending_index()``, a vector index kept in step with the queue
+  (flushed rows are masked out, and it is compacted once they dominate), which
+  retrieval merges in, so the next evaluation is still "smarter".
+* **Late updates** - ``update()`` patches a document that is still queued (e.g.
+  the LLM rationale finishing after the decision was acknowledged); a document
+  already being written is waited for, so the caller can update it in place.
+* **Shutdown** - ``close()`` (also registered with ``atexit``) drains the queue;
+  a ``submit`` racing with it is either written or reports False.
+"""
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+from .vector_index import VectorIndex
+
+_STOP = object()
+_COMPACT_MIN = 1024  # dead rows tolerated in the pending index before compaction
+
+
+def _close_at_exit(ref: "weakref.ref[WriteBehindQueue]") -> None:
+    writer = ref()
+    if writer is not None:
+        writer.close()
+
+
+class WriteBehindQueue:
+    def __init__(self, write_batch: Callable[[List[Dict[str, Any]]], None],
+                 batch_size: int = 100, flush_ms: int = 200, max_queue: int = 10000,
+                 put_timeout: float = 1.0) -> None:
+        self._write_batch = write_batch
+        self.batch_size = max(1, batch_size)
+        self.flush_s = max(0.001, flush_ms / 1000)
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._inflight: set = set()
+        self._lock = threading.Lock()
+        self._written = threading.Condition(self._lock)
+        self._closed = False
+        self._submit_lock = threading.Lock()  # closed check + put vs. close()
+        self._index: Optional[VectorIndex] = None
+        self._index_pos: Dict[Any, int] = {}
+        self._index_dead = 0
+        self._stats = {"submitted": 0, "flushed": 0, "batches": 0, "rejected": 0}
+        self._thread = threading.Thread(target=self._run, name="decision-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(_close_at_exit, weakref.ref(self))
+
+    # ------------------------------------------------------------------ #
+    def submit(self, doc: Dict[str, Any]) -> bool:
+        """Queue ``doc`` (which must carry its ``_id``); False if it must be written inline."""
+        with self._submit_lock:
+            if self._closed:
+                return False
+            with self._lock:
+                self._pending[doc["_id"]] = doc
+                if self._index is not None:
+                    self._index_pos[doc["_id"]] = self._index.append(doc)
+            try:
+                self._queue.put(doc, timeout=self.put_timeout)
+            except queue.Full:
+                with self._lock:
+                    self._pending.pop(doc["_id"], None)
+                    self._forget([doc["_id"]])
+                    self._stats["rejected"] += 1
+                return False
+        with self._lock:
+            self._stats["submitted"] += 1
+        return True
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Documents acknowledged but not yet flushed."""
+        with self._lock:
+            return list(self._pending.values())
+
+    def pending_index(self) -> Optional[VectorIndex]:
+        """The pending documents as a searchable index (``None`` when there are
+        none); built on first use, then maintained as documents come and go."""
+        with self._lock:
+            if self._index is None:
+                self._rebuild_index()
+            return self._index if self._pending else None
+
+    def update(self, _id: Any, fields: Dict[str, Any]) -> bool:
+        """Patch a queued document; False once it has been written (or never was)."""
+        with self._written:
+            while _id in self._inflight:
+                self._written.wait()
+            doc = self._pending.get(_id)
+            if doc is None:
+                return False
+            doc.update(fields)
+            if _id in self._index_pos:
+                self._index.update_doc(self._index_pos[_id], fields)
+            return True
+
+    def flush(self) -> None:
+        """Block until everything submitted so far has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, queued=self._queue.qsize(), pending=len(self._pending))
+
+    # ------------------------------------------------------------------ #
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._drain()
+                self._queue.task_done()
+                return
+            batch, stop = [item], False
+            deadline = time.monotonic() + self.flush_s
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop:
+                self._drain()
+                self._queue.task_done()
+                return
+
+    def _drain(self) -> None:
+        """Write anything still queued behind ``_STOP``."""
+        rest = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.task_done()
+            else:
+                rest.append(item)
+        for lo in range(0, len(rest), self.batch_size):
+            self._flush(rest[lo:lo + self.batch_size])
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._inflight.update(doc["_id"] for doc in batch)
+        try:
+            self._write_batch(batch)
+        except Exception as exc:  # pragma: no cover - the writer owns its fallback
+            print(f"[write_behind] batch of {len(batch)} failed ({exc})")
+        finally:
+            with self._lock:
+                for doc in batch:
+                    self._pending.pop(doc["_id"], None)
+                    self._inflight.discard(doc["_id"])
+                self._forget([doc["_id"] for doc in batch])
+                self._stats["flushed"] += len(batch)
+                self._stats["batches"] += 1
+                self._written.notify_all()
+            for _ in batch:
+                self._queue.task_done()
+
+    def _forget(self, ids: List[Any]) -> None:
+        """Mask flushed documents out of the pending index (lock held)."""
+        if self._index is None:
+            return
+        positions = [self._index_pos.pop(_id) for _id in ids if _id in self._index_pos]
+        self._index.discard(positions)
+        self._index_dead += len(positions)
+        if self._index_dead > max(_COMPACT_MIN, len(self._index_pos)):
+            self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        """Fresh pending index over the live documents only (lock held)."""
+        docs = list(self._pending.values())
+        self._index = VectorIndex()
+        self._index_pos = dict(zip((d["_id"] for d in docs), self._index.extend(docs)))
+        self._index_dead = 0
@@ -0,0 +1,196 @@
+"""Process-local metrics for the agent loop, rendered in Prometheus text format.
+
+* **Stage latency** - :func:`stage` times a block on the monotonic clock into
+  the ``credit_agent_stage_duration_ms`` histogram (label ``stage``) and,
+  optionally, into a per-request ``timings`` dict that ends up in
+  ``meta.timings_ms``. Stages: ``screening``, ``embed``, ``similar_decisions``,
+  ``similar_policies``, ``llm``, ``store``.
+* **Counters** - :func:`inc` e.g. ``credit_agent_embedding_fallbacks_total``
+  (``provider`` label: how often Voyage/Bedrock fell back to local) or
+  ``credit_agent_rationales_total`` (``source`` label).
+* **Collectors** - components that already keep their own counters (MongoDB
+  pools, provider clients, embedding cache, write-behind queue, rationale
+  cache, explanation queue, LLM guard) register a callable with
+  :func:`register_collector`; its numeric leaves are exported as gauges.
+
+``GET /metrics`` serves :func:`render`. Metrics are per process; scrape every
+worker.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+PREFIX = "credit_agent"
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+_LOCK = threading.Lock()
+_HISTOGRAMS: Dict[Tuple[str, Labels], Histogram] = {}
+_COUNTERS: Dict[Tuple[str, Labels], float] = {}
+_COLLECTORS: Dict[str, Callable[[], Any]] = {}
+_HELP = {
+    "stage_duration_ms": "Agent loop stage latency in milliseconds.",
+    "embedding_fallbacks_total": "Embedding calls served by the local fallback after a provider error.",
+    "vector_search_fallbacks_total": "Vector searches that fell back from $vectorSearch to a local scan.",
+    "rationales_total": "Rationales by source (bedrock-llm, deterministic-fallback, cache, deferred).",
+    "screening_total": "Screening outcomes.",
+}
+
+
+def _labels(labels: Optional[Dict[str, Any]]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def observe(name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+    key = (name, _labels(labels))
+    with _LOCK:
+        hist = _HISTOGRAMS.get(key)
+        if hist is None:
+            hist = _HISTOGRAMS[key] = Histogram()
+        hist.observe(value)
+
+
+def inc(name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1.0) -> None:
+    key = (name, _labels(labels))
+    with _LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0.0) + value
+
+
+@contextmanager
+def stage(name: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+    """Time a stage into the latency histogram (and ``timings[name]``, in ms)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        observe("stage_duration_ms", ms, {"stage": name})
+        if timings is not None:
+            timings[name] = round(timings.get(name, 0.0) + ms, 3)
+
+
+async def timed_stage(name: str, awaitable: Any, timings: Optional[Dict[str, float]] = None) -> Any:
+    """``await awaitable`` inside :func:`stage` (for stages run with ``gather``)."""
+    with stage(name, timings):
+        return await awaitable
+
+
+def register_collector(name: str, collect: Callable[[], Any]) -> None:
+    """Export the numeric leaves of ``collect()`` as ``<prefix>_<name>_<path>`` gauges."""
+    with _LOCK:
+        _COLLECTORS[name] = collect
+
+
+def reset() -> None:
+    """Forget recorded values and collectors (tests)."""
+    with _LOCK:
+        _HISTOGRAMS.clear()
+        _COUNTERS.clear()
+        _COLLECTORS.clear()
+
+
+# --------------------------------------------------------------------------- #
+# Prometheus text exposition
+# --------------------------------------------------------------------------- #
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _name(*parts: str) -> str:
+    return _NAME_RE.sub("_", "_".join(p for p in (PREFIX,) + parts if p))
+
+
+def _fmt_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _num(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _leaves(value: Any, path: Tuple[str, ...], labels: Labels, out: List[Tuple[str, Labels, float]]) -> None:
+    if isinstance(value, bool):
+        out.append((_name(*path), labels, float(value)))
+    elif isinstance(value, (int, float)):
+        if not (isinstance(value, float) and math.isnan(value)):
+            out.append((_name(*path), labels, float(value)))
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            _leaves(v, path + (str(k),), labels, out)
+    elif isinstance(value, (list, tuple)):
+        for i, v in enumerate(value):
+            _leaves(v, path, labels + (("index", str(i)),), out)
+    # strings / None are not numeric samples
+
+
+def render() -> str:
+    with _LOCK:
+        snap = [(k, list(h.counts), h.total, h.count, h.buckets) for k, h in sorted(_HISTOGRAMS.items())]
+        counters = sorted(_COUNTERS.items())
+        collectors = sorted(_COLLECTORS.items())
+
+    lines: List[str] = []
+    seen = set()
+    for (name, labels), counts, total, count, buckets in snap:
+        metric = _name(name)
+        if metric not in seen:
+            seen.add(metric)
+            lines.append(f"# HELP {metric} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, n in zip(buckets + (math.inf,), counts):
+            cumulative += n
+            lines.append(f"{metric}_bucket{_fmt_labels(labels, (('le', _num(bound)),))} {cumulative}")
+        lines.append(f"{metric}_sum{_fmt_labels(labels)} {_num(round(total, 3))}")
+        lines.append(f"{metric}_count{_fmt_labels(labels)} {count}")
+
+    for (name, labels), value in counters:
+        metric = _name(name)
+        if metric not in seen:
+            seen.add(metric)
+            lines.append(f"# HELP {metric} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_fmt_labels(labels)} {_num(value)}")
+
+    for name, collect in collectors:
+        try:
+            value = collect()
+        except Exception as exc:  # a broken collector must not break the scrape
+            print(f"[metrics] collector '{name}' failed ({exc})")
+            continue
+        samples: List[Tuple[str, Labels, float]] = []
+        _leaves(value, (name,), (), samples)
+        for metric, labels, sample in samples:
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{_fmt_labels(labels)} {_num(sample)}")
+    return "\n".join(lines) + "\n"
@@ -6,41 +6,58 @@ Two backends, selected automatically:
   (on-message with the workshop story) when MongoDB + embeddings are available.
 * **TF-IDF cosine** over the local ``cc_products.json`` as an offline fallback
   so the endpoint always returns something during rehearsal and tests.
+
+The catalog is read and the TF-IDF model fitted on first use (scikit-learn is
+imported then too), not at import; :func:`init_recommendations` does it ahead
+of time for the API warm-up.
 """
 from __future__ import annotations
 
 import json
 import os
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity as _sk_cosine
 
 _DATA_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "cc_products.json"
 
-with _DATA_PATH.open() as f:
-    _PRODUCTS = json.load(f)
-
-_TEXTS = [p.get("text", "") for p in _PRODUCTS]
-_VECTOR = TfidfVectorizer(stop_words="english")
-_MATRIX = _VECTOR.fit_transform(_TEXTS)
+_CATALOG: Optional[Tuple[List[Dict[str, Any]], Any, Any]] = None
+_CATALOG_LOCK = threading.Lock()
 
 
 def _env(name: str, default: str = "") -> str:
     return (os.getenv(name) or default).strip()
 
 
+def init_recommendations() -> Tuple[List[Dict[str, Any]], Any, Any]:
+    """Load the product catalog and fit the TF-IDF fallback (once):
+    ``(products, vectorizer, matrix)``."""
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            with _DATA_PATH.open() as f:
+                products = json.load(f)
+            vectorizer = TfidfVectorizer(stop_words="english")
+            matrix = vectorizer.fit_transform([p.get("text", "") for p in products])
+            _CATALOG = (products, vectorizer, matrix)
+        return _CATALOG
+
+
+def recommendations_ready() -> bool:
+    return _CATALOG is not None
+
+
 def _vector_search_recommend(query: str, top_k: int) -> List[Dict[str, str]]:
     """Atlas $vectorSearch over the products collection. Raises on any problem
     so the caller can fall back to TF-IDF."""
-    from pymongo import MongoClient
-
     from src.memory.embeddings import embed_text
+    from src.memory.mongo import get_database
 
-    client = MongoClient(_env("MONGODB_URI"), serverSelectionTimeoutMS=4000)
-    db = client[_env("MONGODB_DB", "bfsi-genai")]
+    db = get_database()  # process-wide pooled client
     qvec = embed_text(query)
     pipeline = [
         {
@@ -68,14 +85,17 @@ def _vector_search_recommend(query: str, top_k: int) -> List[Dict[str, str]]:
 
 
 def _tfidf_recommend(query: str, top_k: int) -> List[Dict[str, str]]:
-    q_vec = _VECTOR.transform([query])
-    sims = _sk_cosine(q_vec, _MATRIX).ravel()
+    from sklearn.metrics.pairwise import cosine_similarity as _sk_cosine
+
+    products, vectorizer, matrix = init_recommendations()
+    q_vec = vectorizer.transform([query])
+    sims = _sk_cosine(q_vec, matrix).ravel()
     if not np.any(sims):
         return []
     top_idxs = sims.argsort()[-top_k:][::-1]
     results: List[Dict[str, str]] = []
     for idx in top_idxs:
-        prod = _PRODUCTS[idx]
+        prod = products[idx]
         results.append(
             {
                 "title": prod.get("title", "Unknown Product"),
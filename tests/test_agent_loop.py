@@ -85,3 +85,291 @@ def test_policies_are_retrieved_after_seeding():
     agent = CreditAgent(memory=mem)
     result = agent.evaluate(_applicant())
     assert len(result["policies_cited"]) >= 1
+
+
+def test_aevaluate_matches_evaluate_and_patches_stored_rationale(tmp_path, monkeypatch):
+    import asyncio
+
+    from src.agent import credit_agent
+
+    async def fake_rationale(profile, features, band, similar, policies):
+        await asyncio.sleep(0)
+        return f"LLM rationale for {band}"
+
+    monkeypatch.setattr(credit_agent, "_allm_rationale", fake_rationale)
+    for path in ("", str(tmp_path)):
+        monkeypatch.setenv("MEMORY_STORE_PATH", path)
+        mem = LongTermMemory(uri="")
+        agent = CreditAgent(memory=mem)
+        agent.evaluate(_applicant(ssn="B-1"), store=True)
+        result = asyncio.run(agent.aevaluate(_applicant(ssn="B-2", Name="Async Person")))
+
+        assert result["meta"]["reasoning"] == "bedrock-llm"
+        assert [c["applicant_id"] for c in result["similar_cases"]] == ["B-1"]
+        stored = [d for d in mem._mem.decisions if d["_id"] == result["decision_id"]]
+        assert stored[0]["summary"] == result["summary"] == f"LLM rationale for {result['band']}"
+
+    mem._mem.decisions.close()
+    reopened = LongTermMemory(uri="")
+    assert [d["summary"] for d in reopened._mem.decisions][-1] == result["summary"]
+
+
+def test_batch_features_match_scalar_path():
+    from src.agent.credit_agent import bands_for, compute_features_batch
+
+    values = ["0", "3", "-2.7", "12.9", "nan", "abc", "", None, "1e3", "100", "5000.5", "-inf"]
+    keys = ["Num_of_Delayed_Payment", "Delay_from_due_date", "Credit_Utilization_Ratio",
+            "Outstanding_Debt", "Num_Credit_Card"]
+    profiles = [{k: values[(i * (j + 3)) % len(values)] for j, k in enumerate(keys)} for i in range(200)]
+    batch = compute_features_batch(profiles)
+    bands = bands_for(batch["credit_score"])
+    for i, profile in enumerate(profiles):
+        try:
+            expected = compute_features(profile)
+        except OverflowError:
+            assert batch["invalid"][i]
+            continue
+        assert not batch["invalid"][i]
+        assert {k: int(batch[k][i]) for k in expected} == expected
+        assert bands[i] == band_for(expected["credit_score"])
+
+
+def test_evaluate_many_scores_stores_and_isolates_errors():
+    mem = LongTermMemory(uri="")
+    agent = CreditAgent(memory=mem)
+    agent.evaluate(_applicant(ssn="C-0"))
+    batch = [_applicant(ssn="C-1"), _applicant(ssn="C-2", Num_of_Delayed_Payment="inf"),
+             _applicant(ssn="C-3", Credit_Utilization_Ratio="70")]
+    results = agent.evaluate_many(batch)
+
+    assert [r["status"] for r in results] == ["ok", "error", "ok"]
+    for profile, result in zip(batch[::2], results[::2]):
+        single = compute_features(profile)
+        assert result["credit_score_estimate"] == single["credit_score"]
+        assert result["band"] == band_for(single["credit_score"])
+        assert [c["applicant_id"] for c in result["similar_cases"]] == ["C-0"]
+    stored = {d["_id"]: d["applicant_id"] for d in mem._mem.decisions}
+    assert stored[results[0]["decision_id"]] == "C-1"
+    assert stored[results[2]["decision_id"]] == "C-3"
+    assert len(stored) == 3
+
+
+def test_rationale_cache_reuses_llm_text_only_for_the_same_applicant(monkeypatch):
+    from src.agent import credit_agent
+    from src.agent.rationale_cache import RationaleCache
+
+    calls = []
+
+    def fake_llm(profile, features, band, similar, policies):
+        calls.append(profile["ssn"])
+        return f"LLM rationale for {profile['Name']} #{len(calls)}"
+
+    monkeypatch.setattr(credit_agent, "_llm_rationale", fake_llm)
+    agent = CreditAgent(memory=LongTermMemory(uri=""), rationale_cache=RationaleCache())
+    first = agent.evaluate(_applicant(ssn="R-1"), store=False)
+    # Same band, score and retrieval context but another applicant: never reused.
+    other = agent.evaluate(_applicant(ssn="R-2", Name="Other Person"), store=False)
+    income = agent.evaluate(_applicant(ssn="R-3", Annual_Income="61000"), store=False)
+    # The same applicant scored again -> reused, no further LLM call.
+    again = agent.evaluate(_applicant(ssn="R-1"), store=False)
+
+    assert calls == ["R-1", "R-2", "R-3"]
+    assert "Other Person" in other["summary"] and other["summary"] != first["summary"]
+    assert income["summary"] != first["summary"]
+    assert again["summary"] == first["summary"]
+    assert [r["meta"]["rationale_cache"]["hit"] for r in (first, other, income, again)] == [
+        False, False, False, True]
+    assert again["meta"]["rationale_cache"]["entry"] == first["meta"]["rationale_cache"]["entry"]
+
+
+def test_rationale_cache_ttl_lru_and_similarity(monkeypatch):
+    from src.agent import rationale_cache
+    from src.agent.rationale_cache import RationaleCache
+
+    features = {"repayment": 28, "utilization": 22, "outstanding": 28, "inquiries": 29, "credit_score": 607}
+    cache = RationaleCache(max_entries=2, ttl_s=60, min_similarity=0.9)
+    profile = {"Name": "Jane Doe", "Age": 41, "Annual_Income": 85000}
+    key = cache.key(profile, "Decline", features, [{"policy_id": "p1"}], [{"_id": "d1"}])
+    assert key == cache.key(dict(profile, ssn="other id"), "Decline", features,
+                            [{"policy_id": "p1"}], [{"_id": "d1"}])
+    assert key != cache.key(dict(profile, Name="John Doe"), "Decline", features,
+                            [{"policy_id": "p1"}], [{"_id": "d1"}])
+    assert key != cache.key(profile, "Decline", dict(features, credit_score=606),
+                            [{"policy_id": "p1"}], [{"_id": "d1"}])
+    assert "Jane Doe" not in repr(key)
+    cache.put(key, "text", [1.0, 0.0])
+    assert cache.get(key, [0.99, 0.05])[0] == "text"
+    assert cache.get(key, [0.0, 1.0]) is None  # same key, dissimilar applicant
+
+    clock = [1000.0]
+    monkeypatch.setattr(rationale_cache.time, "time", lambda: clock[0])
+    cache.put(("a",), "A", [1.0, 0.0])
+    cache.put(("b",), "B", [1.0, 0.0])  # evicts the least recently used key
+    assert cache.get(key, [1.0, 0.0]) is None
+    clock[0] += 61
+    assert cache.get(("b",), [1.0, 0.0]) is None
+    assert cache.stats()["expired"] == 1 and cache.stats()["evictions"] >= 1
+
+
+def test_astream_evaluate_sends_result_then_tokens_then_decision(monkeypatch):
+    import asyncio
+
+    from src.agent import credit_agent
+    from src.agent.rationale_cache import RationaleCache
+
+    async def fake_stream(profile, features, band, similar, policies):
+        for part in ("Strong ", "payment ", "history."):
+            await asyncio.sleep(0)
+            yield part
+
+    monkeypatch.setattr(credit_agent, "_astream_rationale", fake_stream)
+    mem = LongTermMemory(uri="")
+    agent = CreditAgent(memory=mem, rationale_cache=RationaleCache())
+
+    async def collect():
+        return [e async for e in agent.astream_evaluate(_applicant(ssn="S-1"))]
+
+    events = asyncio.run(collect())
+    names = [name for name, _ in events]
+    assert names == ["result", "token", "token", "token", "done"]
+    assert "band" in events[0][1] and "summary" not in events[0][1]
+    done = events[-1][1]
+    assert done["summary"] == "Strong payment history."
+    assert done["meta"]["reasoning"] == "bedrock-llm"
+    stored = [d for d in mem._mem.decisions if d["_id"] == done["decision_id"]]
+    assert stored[0]["summary"] == "Strong payment history."
+
+
+def test_deferred_explanation_returns_job_and_patches_decision(monkeypatch, tmp_path):
+    from src.agent import credit_agent
+    from src.agent.rationale_cache import RationaleCache
+
+    monkeypatch.setenv("EXPLAIN_SPOOL_PATH", str(tmp_path / "jobs.sqlite"))
+    monkeypatch.setattr(credit_agent, "_llm_rationale",
+                        lambda profile, features, band, similar, policies: f"Deferred LLM text ({band})")
+    mem = LongTermMemory(uri="")
+    agent = CreditAgent(memory=mem, rationale_cache=RationaleCache())
+    result = agent.evaluate(_applicant(ssn="D-1"), defer_explanation=True)
+
+    assert result["meta"]["reasoning"] == "deferred"
+    assert result["summary"].startswith("### Summary")  # deterministic for now
+    job_id = result["explanation"]["job_id"]
+    agent.explanations.drain()
+
+    job = agent.explanations.status(job_id)
+    assert job["status"] == "done" and job["summary"] == f"Deferred LLM text ({result['band']})"
+    stored = [d for d in mem._mem.decisions if d["_id"] == result["decision_id"]]
+    assert stored[0]["summary"] == job["summary"]
+    assert agent.explanation_stats()["completed"] == 1
+    agent.close()
+
+
+def test_explanation_spool_survives_restart(tmp_path):
+    import threading
+
+    from src.agent.explanations import ExplanationQueue
+
+    spool = str(tmp_path / "jobs.sqlite")
+    stuck = threading.Event()
+    # First process "dies" with one job running and one still queued.
+    crashed = ExplanationQueue(lambda p: stuck.wait(10) and {}, workers=1, spool_path=spool)
+    ids = [crashed.submit({"n": n}) for n in (1, 2)]
+
+    restarted = ExplanationQueue(lambda p: {"summary": f"job {p['n']}"}, workers=2, spool_path=spool)
+    restarted.drain()
+    assert restarted.stats()["recovered"] == 2
+    assert [restarted.status(i)["summary"] for i in ids] == ["job 1", "job 2"]
+    stuck.set()
+    restarted.close()
+
+
+def test_session_events_are_batched_per_session_in_the_background(monkeypatch):
+    import threading
+
+    from src.agent import credit_agent
+    from src.agent.session import SessionMemory
+
+    monkeypatch.setattr(credit_agent, "_llm_rationale", lambda *a: None)
+
+    class SlowAgentCore:
+        def __init__(self):
+            self.calls = []
+            self.release = threading.Event()
+
+        def create_event(self, **kwargs):
+            self.release.wait(5)
+            self.calls.append(kwargs)
+
+    client = SlowAgentCore()
+    session = SessionMemory(client=client)
+    agent = CreditAgent(memory=LongTermMemory(uri=""), session=session)
+    agent.evaluate(_applicant(ssn="S-1"))  # returns while AgentCore is still blocked
+    assert client.calls == []
+    client.release.set()
+    session.flush()
+    assert len(client.calls) == 1  # one round trip for the whole evaluation
+    assert [m[0].split(":")[0] for m in client.calls[0]["messages"]] == ["features", "retrieved"]
+    assert session.stats()["events"] == 2
+
+
+class _RecordingAgentCore:
+    def __init__(self):
+        self.calls = []
+
+    def create_event(self, **kwargs):
+        self.calls.append(kwargs)
+
+
+def test_open_sessions_flush_on_schedule_under_steady_traffic(monkeypatch):
+    import time
+
+    from src.agent.session import SessionMemory
+
+    monkeypatch.setenv("SESSION_FLUSH_INTERVAL_S", "0.1")
+    client = _RecordingAgentCore()
+    session = SessionMemory(client=client)
+    open_sid = session.create_session()
+    session.remember(open_sid, "features", "still open")
+    deadline = time.monotonic() + 2.0
+    while time.monotonic() < deadline and not any(c["session_id"] == open_sid for c in client.calls):
+        sid = session.create_session()  # closed sessions keep the sender's queue busy
+        session.remember(sid, "k", "v")
+        session.close(sid)
+        time.sleep(0.01)
+    assert any(c["session_id"] == open_sid for c in client.calls)
+
+
+def test_evicted_sessions_ship_and_drop_their_buffers(monkeypatch):
+    from src.agent.session import SessionMemory
+
+    monkeypatch.setenv("SESSION_FLUSH_INTERVAL_S", "60")
+    monkeypatch.setenv("SESSION_MAX_LIVE", "1")
+    client = _RecordingAgentCore()
+    session = SessionMemory(client=client)
+    first = session.create_session()
+    session.remember(first, "features", "x")
+    assert first in session._buffers
+    session.create_session()  # evicts the first session
+    assert first not in session._buffers
+    session.flush()
+    assert [c["session_id"] for c in client.calls] == [first]
+    assert session.stats()["local"]["evicted"] == 1
+
+
+def test_local_sessions_expire_and_are_capped(monkeypatch):
+    from src.agent import session as session_mod
+
+    clock = [1000.0]
+    monkeypatch.setattr(session_mod.time, "monotonic", lambda: clock[0])
+    store = session_mod._LocalSessionStore(ttl_s=60, max_sessions=3)
+    stale = store.create()
+    clock[0] += 30
+    kept = store.create()
+    clock[0] += 40  # stale idle 70 s, kept 40 s
+    store.create()
+    assert store.recall(stale) == {} and store.stats()["expired"] == 1
+    store.remember(kept, "k", 1)
+    store.create()
+    store.create()  # cap of 3: the least recently touched goes
+    assert store.stats() == {"expired": 1, "evicted": 1, "live": 3}
+    assert store.recall(kept) == {"k": 1}
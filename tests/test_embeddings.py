@@ -0,0 +1,162 @@
+"""Offline tests for the embedding layer (batching, fallbacks)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["EMBED_PROVIDER"] = "local"
+
+from src.memory import embeddings  # noqa: E402
+
+
+def test_embed_many_batches_keeps_order_and_falls_back_per_chunk(monkeypatch):
+    calls = []
+
+    def fake_batch(texts):
+        calls.append(list(texts))
+        if "boom" in texts:
+            raise RuntimeError("provider down")
+        return [[float(len(t))] for t in texts]
+
+    monkeypatch.setattr(embeddings, "_resolve_provider", lambda: "voyage")
+    monkeypatch.setitem(embeddings._BATCH_PROVIDERS, "voyage", (fake_batch, 128, 100_000))
+    monkeypatch.setenv("EMBED_CACHE", "off")
+    monkeypatch.setenv("EMBED_BATCH_SIZE", "2")
+    monkeypatch.setenv("EMBED_DIM", "8")
+
+    texts = ["a", "bb", "boom", "ccc", "dddd"]
+    out = embeddings.embed_many(texts)
+
+    assert sorted(len(c) for c in calls) == [1, 2, 2]
+    assert out[0] == [1.0] and out[1] == [2.0] and out[4] == [4.0]
+    # the failing chunk ("boom", "ccc") is served by the local embedding
+    assert out[2] == embeddings._local_embedding("boom", 8)
+    assert out[3] == embeddings._local_embedding("ccc", 8)
+
+
+def test_chunk_spans_respect_token_budget():
+    spans = embeddings._chunk_spans(["x" * 40] * 5, max_items=10, max_tokens=25)
+    assert spans == [(0, 2), (2, 4), (4, 5)]
+
+
+def test_cache_serves_repeats_survives_restart_and_isolates_models(monkeypatch, tmp_path):
+    from src.memory import embedding_cache
+
+    calls = []
+
+    def fake_batch(texts):
+        calls.extend(texts)
+        return [[0.5, float(len(t))] for t in texts]
+
+    path = str(tmp_path / "emb.sqlite")
+    monkeypatch.setattr(embeddings, "_resolve_provider", lambda: "voyage")
+    monkeypatch.setitem(embeddings._BATCH_PROVIDERS, "voyage", (fake_batch, 128, 100_000))
+    monkeypatch.setattr(embeddings, "_voyage_embedding", lambda t: fake_batch([t])[0])
+    monkeypatch.setattr(embeddings, "get_embedding_cache", lambda: cache)
+
+    cache = embedding_cache.EmbeddingCache(path=path)
+    first = embeddings.embed_many(["alpha", "beta", "alpha"])
+    assert calls == ["alpha", "beta", "alpha"]
+    assert embeddings.embed_text("beta") == first[1]
+    assert len(calls) == 3 and cache.stats()["memory_hits"] == 1
+
+    # A fresh process-level cache over the same file is already warm.
+    cache = embedding_cache.EmbeddingCache(path=path)
+    assert embeddings.embed_text("alpha") == first[0]
+    assert len(calls) == 3 and cache.stats()["disk_hits"] == 1
+
+    # Another model never sees those entries.
+    monkeypatch.setenv("VOYAGE_MODEL", "voyage-other")
+    embeddings.embed_text("alpha")
+    assert len(calls) == 4
+
+
+def test_cache_lru_respects_byte_budget():
+    from src.memory.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(path=None, max_bytes=3 * 16)
+    for i in range(5):
+        cache.put(cache.key("voyage", "m", 2, str(i)), [float(i), 1.0])
+    stats = cache.stats()
+    assert stats["memory_entries"] == 3 and stats["memory_bytes"] <= 48
+    assert cache.get(cache.key("voyage", "m", 2, "0")) is None
+    assert cache.get(cache.key("voyage", "m", 2, "4")) == [4.0, 1.0]
+
+
+def _reference_local_embedding(text, dim):
+    """The original pure-Python implementation, kept to pin compatibility."""
+    import hashlib
+    import math
+
+    vec = [0.0] * dim
+    for tok in embeddings._TOKEN_RE.findall((text or "").lower()):
+        h = int(hashlib.md5(tok.encode("utf-8")).hexdigest(), 16)
+        vec[h % dim] += 1.0 if (h >> 8) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec))
+    return vec if norm == 0 else [v / norm for v in vec]
+
+
+def test_local_embedding_is_bit_compatible_with_stored_vectors():
+    texts = [
+        "Test User is a 23-year-old Analyst with annual income 60000.",
+        "debt debt debt utilization 80% delayed payments " * 20,
+        "",
+        "!!!",
+    ]
+    for dim in (8, 1024):
+        batch = embeddings._local_embedding_matrix(texts, dim)
+        for row, text in zip(batch, texts):
+            expected = _reference_local_embedding(text, dim)
+            assert embeddings._local_embedding(text, dim) == expected
+            assert row.tolist() == expected
+
+
+def test_provider_clients_are_cached_and_construction_is_timed(monkeypatch):
+    from src.memory import provider_clients
+
+    monkeypatch.setenv("EMBED_MAX_CONNECTIONS", "17")
+    provider_clients.reset_clients()
+    client = provider_clients.bedrock_runtime("us-east-1")
+    assert provider_clients.bedrock_runtime("us-east-1") is client
+    assert client.meta.config.max_pool_connections == 17
+    assert provider_clients.client_stats()["bedrock"]["construct_count"] >= 1
+
+    with provider_clients.timed("bedrock"):
+        pass
+    assert provider_clients.client_stats()["bedrock"]["call_count"] >= 1
+    provider_clients.reset_clients()
+
+
+def test_async_voyage_path_keeps_sqlite_off_the_event_loop(monkeypatch, tmp_path):
+    import asyncio
+    import threading
+
+    from src.memory import embedding_cache
+
+    class FakeAsyncVoyage:
+        async def embed(self, texts, model, input_type):
+            return type("Result", (), {"embeddings": [[0.25, float(len(t))] for t in texts]})()
+
+    cache = embedding_cache.EmbeddingCache(path=str(tmp_path / "emb.sqlite"))
+    monkeypatch.setattr(embeddings, "_resolve_provider", lambda: "voyage")
+    monkeypatch.setattr(embeddings, "async_voyage_client", lambda: FakeAsyncVoyage())
+    monkeypatch.setattr(embeddings, "get_embedding_cache", lambda: cache)
+    disk_threads = []
+    for name in ("_disk_get", "_disk_put"):
+        original = getattr(cache, name)
+
+        def spy(*args, _original=original):
+            disk_threads.append(threading.current_thread())
+            return _original(*args)
+
+        monkeypatch.setattr(cache, name, spy)
+
+    async def run():
+        first = await embeddings.aembed_text("alpha")  # miss: disk read + write
+        again = await embeddings.aembed_text("alpha")  # memory hit, no disk access
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert first == again == [0.25, 5.0]
+    assert len(disk_threads) == 2 and threading.main_thread() not in disk_threads
+    assert cache.stats()["memory_hits"] == 1
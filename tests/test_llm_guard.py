@@ -0,0 +1,162 @@
+"""Offline tests for the guarded rationale LLM (limits, deadline, breaker)."""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.llm.guard import FakeLLM, GuardedLLM  # noqa: E402
+
+
+def _guard(fake, **kwargs):
+    return GuardedLLM(call=fake, acall=fake.acall, astream=fake.astream, **kwargs)
+
+
+def test_deadline_falls_back_without_waiting_for_the_llm():
+    guard = _guard(FakeLLM(latency_s=1.0), deadline_s=0.05)
+    start = time.monotonic()
+    assert guard.summarize("p") is None
+    assert asyncio.run(guard.asummarize("p")) is None
+    assert time.monotonic() - start < 0.5
+    assert guard.stats()["timeouts"] == 2
+
+
+def test_breaker_opens_short_circuits_and_recovers():
+    fake = FakeLLM(failure_rate=1.0)
+    guard = _guard(fake, failure_threshold=3, cooldown_s=0.1)
+    for _ in range(5):
+        assert guard.summarize("p") is None
+    assert fake.calls == 3  # the last two never reached the LLM
+    stats = guard.stats()
+    assert stats["breaker"] == "open" and stats["short_circuit"] == 2 and stats["breaker_opened"] == 1
+
+    time.sleep(0.12)
+    fake.failure_rate = 0.0
+    assert guard.stats()["breaker"] == "half-open"
+    assert guard.summarize("p") == fake.text
+    assert guard.stats()["breaker"] == "closed"
+
+
+def test_in_flight_cap_skips_calls_that_cannot_get_a_slot():
+    guard = _guard(FakeLLM(latency_s=0.3), max_in_flight=2, deadline_s=0.1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(guard.summarize("p"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = guard.stats()
+    assert results == [None] * 4
+    assert stats["timeouts"] == 2 and stats["busy"] == 2
+    time.sleep(0.3)
+    assert guard.stats()["in_flight"] == 0
+
+
+def test_stream_yields_chunks_or_nothing_when_skipped():
+    async def collect(guard):
+        return [c async for c in guard.astream("p")]
+
+    assert asyncio.run(collect(_guard(FakeLLM(text="hello")))) == ["hello"]
+    assert asyncio.run(collect(_guard(FakeLLM(failure_rate=1.0)))) == []
+
+
+def _half_open(fake, **kwargs):
+    guard = _guard(fake, failure_threshold=1, cooldown_s=0.05, **kwargs)
+    fake.failure_rate = 1.0
+    assert guard.summarize("p") is None
+    fake.failure_rate = 0.0
+    time.sleep(0.06)
+    assert guard.stats()["breaker"] == "half-open"
+    return guard
+
+
+def test_cancelled_or_closed_trial_hands_over_to_the_next_call():
+    fake = FakeLLM(latency_s=0.5, text="ok")
+    guard = _half_open(fake)
+
+    async def cancel_trial():
+        task = asyncio.create_task(guard.asummarize("p"))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cancel_trial())
+    fake.latency_s = 0.0
+    assert guard.summarize("p") == "ok"  # not short-circuited by a stale trial
+    assert guard.stats()["breaker"] == "closed"
+
+    guard = _half_open(fake)
+
+    async def close_stream():
+        stream = guard.astream("p")
+        assert await stream.__anext__() == "ok"
+        await stream.aclose()
+
+    asyncio.run(close_stream())
+    assert guard.summarize("p") == "ok"
+    assert guard.stats()["in_flight"] == 0
+
+
+def test_cancelled_slot_waiter_does_not_leak_the_slot():
+    guard = _guard(FakeLLM(text="ok"), max_in_flight=1, deadline_s=1.0)
+
+    async def cancel_waiter():
+        assert guard._slots.acquire(blocking=False)  # another call holds the only slot
+        task = asyncio.create_task(guard.asummarize("p"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        guard._slots.release()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0.05)
+
+    asyncio.run(cancel_waiter())
+    assert guard._slots.acquire(blocking=False)
+    guard._slots.release()
+    assert guard.summarize("p") == "ok" and guard.stats()["busy"] == 0
+
+
+def test_contention_alone_does_not_open_the_breaker():
+    fake = FakeLLM(latency_s=0.2)
+    guard = _guard(fake, max_in_flight=2, deadline_s=0.3, failure_threshold=2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(guard.summarize("p"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = guard.stats()
+    assert stats["breaker"] == "closed" and stats["timeouts"] == 0 and stats["errors"] == 0
+    assert stats["ok"] >= 4 and stats["ok"] + stats["busy"] == 8
+    assert fake.calls == stats["ok"]  # a call that got no slot never reaches the LLM
+
+    async def burst():
+        return await asyncio.gather(*(guard.asummarize("p") for _ in range(8)))
+
+    asyncio.run(burst())
+    assert guard.stats()["breaker"] == "closed" and guard.stats()["timeouts"] == 0
+
+
+def test_slot_waiters_do_not_hold_executor_threads():
+    guard = _guard(FakeLLM(latency_s=0.2, text="ok"), max_in_flight=1, deadline_s=0.5)
+
+    async def saturate():
+        tasks = [asyncio.create_task(guard.asummarize("p")) for _ in range(60)]
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        await asyncio.to_thread(lambda: None)
+        waited = time.monotonic() - start
+        return waited, await asyncio.gather(*tasks)
+
+    waited, results = asyncio.run(saturate())
+    assert waited < 0.1
+    stats = guard.stats()
+    assert results.count("ok") == stats["ok"] >= 2 and stats["ok"] + stats["busy"] == 60
+    assert stats["timeouts"] == 0 and stats["in_flight"] == 0
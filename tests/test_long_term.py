@@ -0,0 +1,275 @@
+"""Offline tests for LongTermMemory plumbing (write-behind, retrieval merge)."""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["EMBED_PROVIDER"] = "local"
+
+from pymongo.errors import PyMongoError  # noqa: E402
+
+from src.memory.embeddings import embed_text  # noqa: E402
+from src.memory.long_term import LongTermMemory  # noqa: E402
+from src.memory.write_behind import WriteBehindQueue  # noqa: E402
+
+
+class _UnindexedCollection:
+    """Accepts inserts but has no search capability, like a cluster with no index."""
+
+    def __init__(self, gate):
+        self.gate, self.inserted = gate, []
+
+    def insert_many(self, docs, ordered=True):
+        self.gate.wait(5)
+        self.inserted.extend(docs)
+
+    def aggregate(self, pipeline):
+        raise PyMongoError("no vector index")
+
+    def find(self, *args, **kwargs):
+        raise PyMongoError("scan unavailable")
+
+
+def test_write_behind_batches_flushes_and_exposes_pending():
+    written, gate = [], threading.Event()
+
+    def write(batch):
+        gate.wait(5)
+        written.append([d["_id"] for d in batch])
+
+    q = WriteBehindQueue(write, batch_size=3, flush_ms=50)
+    for i in range(5):
+        assert q.submit({"_id": i})
+    # Nothing flushed yet (writer is blocked), but all acknowledged docs are visible.
+    assert {d["_id"] for d in q.pending()} == set(range(5))
+    gate.set()
+    q.flush()
+    assert sorted(i for batch in written for i in batch) == list(range(5))
+    assert max(len(b) for b in written) <= 3
+    assert q.pending() == []
+    q.close()
+    assert not q.submit({"_id": 99})
+
+
+def test_write_behind_backpressure_rejects_when_full():
+    gate = threading.Event()
+    q = WriteBehindQueue(lambda batch: gate.wait(5), batch_size=1, max_queue=1, put_timeout=0.05)
+    results = [q.submit({"_id": i}) for i in range(4)]
+    assert results[0] and False in results
+    assert q.stats()["rejected"] >= 1
+    gate.set()
+    q.close()
+
+
+def test_submit_racing_close_is_written_or_rejected():
+    for _ in range(20):
+        written = []
+        q = WriteBehindQueue(written.extend, batch_size=5, flush_ms=1)
+        acked, start = [], threading.Barrier(5)
+
+        def submitter(base):
+            start.wait()
+            for i in range(50):
+                if q.submit({"_id": base + i}):
+                    acked.append(base + i)
+
+        threads = [threading.Thread(target=submitter, args=(n * 1000,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        start.wait()
+        q.close()
+        for t in threads:
+            t.join()
+        assert sorted(d["_id"] for d in written) == sorted(acked)
+
+
+def test_pending_index_is_maintained_incrementally():
+    gate = threading.Event()
+    q = WriteBehindQueue(lambda batch: gate.wait(5), batch_size=2, flush_ms=5)
+    assert q.pending_index() is None
+    vec = embed_text("clerk part time")
+    q.submit({"_id": "a", "band": "Approve", "embedding": vec})
+    index = q.pending_index()
+    q.submit({"_id": "b", "band": "Decline", "embedding": embed_text("other text")})
+    assert q.pending_index() is index and len(index) == 2  # appended, not rebuilt
+    assert index[index.search(vec, 1)[0][0]]["_id"] == "a"
+    gate.set()
+    q.flush()
+    assert q.pending_index() is None and index.search(vec, 2) == []  # flushed rows masked
+    q.close()
+
+
+def test_decision_patches_use_the_id_map_not_the_filter_cache(monkeypatch):
+    monkeypatch.delenv("MEMORY_STORE_PATH", raising=False)
+    mem = LongTermMemory(uri="")
+    ids = [mem.store_decision({"applicant_id": f"U-{i}", "band": "Approve"}) for i in range(200)]
+    for i, decision_id in enumerate(ids):
+        assert mem.update_decision(decision_id, {"summary": f"rationale {i}"})
+    assert not mem.update_decision("mem-unknown", {"summary": "x"})
+    index = mem._mem.decisions
+    assert index[57]["summary"] == "rationale 57"
+    assert "_id" not in index._filters._postings
+    assert not [key for key in index._filters._arrays if key[0] == "_id"]
+
+
+def test_unflushed_decisions_are_visible_to_retrieval():
+    gate = threading.Event()
+    collection = _UnindexedCollection(gate)
+    mem = LongTermMemory(uri="")
+    mem.db = {"decisions": collection}
+    mem._writer = WriteBehindQueue(mem._insert_decisions, flush_ms=10)
+
+    vec = embed_text("young analyst stable income low utilization")
+    decision_id = mem.store_decision({"applicant_id": "WB-1", "band": "Approve"}, embedding=vec)
+    hits = mem.similar_decisions(vec, k=3)
+    assert [h["applicant_id"] for h in hits] == ["WB-1"]
+    assert hits[0]["_id"] == decision_id and collection.inserted == []
+
+    gate.set()
+    mem.close()
+    assert [str(d["_id"]) for d in collection.inserted] == [decision_id]
+
+
+def test_reduced_precision_writes_bindata_and_mirror_decodes_it(monkeypatch):
+    from bson.binary import Binary
+
+    from src.memory.long_term import _from_storage, _to_storage
+
+    vec = embed_text("retired teacher modest pension")
+    monkeypatch.setenv("EMBED_STORAGE_PRECISION", "float32")
+    assert _to_storage({"embedding": vec})["embedding"] is vec
+
+    monkeypatch.setenv("EMBED_STORAGE_PRECISION", "int8")
+    stored = _to_storage({"_id": 1, "embedding": vec})
+    assert isinstance(stored["embedding"], Binary)
+    assert len(bytes(stored["embedding"])) < len(vec) * 8
+    decoded = _from_storage(stored)["embedding"]
+    assert max(abs(a - b) for a, b in zip(decoded, vec)) < 1e-6
+
+
+class _ScanOnlyCollection:
+    """A collection without $vectorSearch that other writers also insert into."""
+
+    def __init__(self):
+        self.docs = []
+
+    def aggregate(self, pipeline):
+        raise PyMongoError("no vector index")
+
+    def insert_many(self, docs, ordered=True):
+        self.docs.extend(docs)
+
+    def insert_one(self, doc):
+        self.docs.append(doc)
+
+    def find(self, query=None, projection=None):
+        query = dict(query or {})
+        query.pop("embedding", None)
+        cond = query.get("_id", {})
+        out = [d for d in self.docs
+               if ("$gt" not in cond or d["_id"] > cond["$gt"])
+               and ("$in" not in cond or d["_id"] in cond["$in"])]
+        return [dict(d) for d in out]
+
+
+def test_mirror_picks_up_decisions_written_by_other_workers():
+    from bson import ObjectId
+
+    collection = _ScanOnlyCollection()
+    mem = LongTermMemory(uri="")
+    mem.db = {"decisions": collection}
+    vec = embed_text("nurse steady income low utilization")
+    mem._mirror_refresh_s = 0
+    assert mem.similar_decisions(vec, k=3) == []  # mirror loaded (empty)
+
+    # Another worker inserts directly; an older-minted id lands late too.
+    late = ObjectId()
+    collection.insert_many([{"_id": ObjectId(), "applicant_id": "W2-1", "embedding": vec}])
+    mem.store_decision({"applicant_id": "OWN"}, embedding=embed_text("unrelated retired pilot"))
+    collection.insert_many([{"_id": late, "applicant_id": "W2-late", "embedding": vec}])
+    hits = mem.similar_decisions(vec, k=3)
+    assert {h["applicant_id"] for h in hits} >= {"W2-1", "W2-late"}
+    mem.similar_decisions(vec, k=3)
+    assert len(mem._mirrors["decisions"]) == 3  # no duplicates across refreshes
+    mem.close()
+
+
+def test_filters_prune_before_ranking_so_k_is_satisfied():
+    from src.memory.filters import age_bucket, build_clauses, to_mongo
+
+    mem = LongTermMemory(uri="")
+    vec = embed_text("engineer stable income low utilization")
+    # The applicant's own history is the closest match; it must not eat into k.
+    for i in range(5):
+        mem.store_decision({"applicant_id": "SELF", "band": "Approve", "Age": "30"}, embedding=vec)
+    for i, (band, occ, age) in enumerate([("Approve", "Engineer", "29"), ("Decline", "Engineer", "52"),
+                                          ("Approve", "Teacher", "41"), ("Review", "Engineer", "33")]):
+        mem.store_decision({"applicant_id": f"A-{i}", "band": band, "Occupation": occ, "Age": age},
+                           embedding=embed_text(f"{occ} applicant {i}"))
+
+    hits = mem.similar_decisions(vec, k=3, exclude_applicant="SELF")
+    assert len(hits) == 3 and all(h["applicant_id"] != "SELF" for h in hits)
+
+    hits = mem.similar_decisions(vec, k=3, filters={"occupation": "Engineer", "band": ["Approve", "Review"]})
+    assert {h["applicant_id"] for h in hits} == {"A-0", "A-3"}
+    hits = mem.similar_decisions(vec, k=5, exclude_applicant="SELF", filters={"age_bucket": "25-34"})
+    assert {h["applicant_id"] for h in hits} == {"A-0", "A-3"}
+    assert mem.similar_decisions(vec, k=3, filters={"since": "2999-01-01T00:00:00+00:00"}) == []
+    assert len(mem.similar_decisions(vec, k=20, filters={"max_age_days": 1})) == 9
+
+    assert age_bucket("23_") == "18-24" and age_bucket(70) == "65+" and age_bucket("n/a") is None
+    assert to_mongo(build_clauses({"band": "Approve"}, exclude_applicant="X")) == {
+        "$and": [{"band": {"$eq": "Approve"}}, {"applicant_id": {"$ne": "X"}}]
+    }
+
+
+def test_ivf_filtered_search_falls_back_to_exact_when_lists_run_dry():
+    import numpy as np
+
+    from src.memory.ann import IVFIndex
+
+    rng = np.random.default_rng(1)
+    index = IVFIndex(nprobe=1, min_train_size=500)
+    index.extend([{"_id": i, "band": "Decline" if i % 97 else "Approve", "embedding": rng.normal(size=16).tolist()}
+                  for i in range(1000)])
+    assert index.trained
+    mask = index.filter_mask([("in", "band", ["Approve"])])
+    hits = index.search(rng.normal(size=16), 5, mask=mask)
+    assert len(hits) == 5 and all(pos % 97 == 0 for pos, _ in hits)
+
+
+def test_policy_table_is_resident_memoised_and_refreshed_on_upsert():
+    mem = LongTermMemory(uri="")
+    mem.upsert_policies([{"policy_id": "P1", "text": "high utilization over thirty percent"},
+                         {"policy_id": "P2", "text": "delayed payments and collections"}])
+    vec = embed_text("utilization thirty percent")
+    first = mem.similar_policies(vec, k=1)
+    assert first[0]["policy_id"] == "P1"
+    first[0]["policy_id"] = "mutated"
+    assert mem.similar_policies(vec, k=1)[0]["policy_id"] == "P1"
+    assert len(mem._policy_memo) == 1
+
+    mem.upsert_policies([{"policy_id": "P3", "text": "utilization thirty percent"}])
+    assert len(mem._policy_memo) == 0
+    assert mem.similar_policies(vec, k=1)[0]["policy_id"] == "P3"
+
+
+def test_mongo_client_registry_is_shared_per_process(monkeypatch):
+    from src.memory import mongo
+
+    monkeypatch.setenv("MONGODB_MAX_POOL_SIZE", "7")
+    monkeypatch.setenv("MONGODB_READ_PREFERENCE", "nearest")
+    uri = "mongodb://registry-test.invalid:27017"
+    try:
+        client = mongo.get_client(uri)  # lazy: no connection is attempted here
+        assert mongo.get_client(uri) is client
+        assert client.options.pool_options.max_pool_size == 7
+        assert mongo.pool_stats()["pools"][0]["checked_out"] == 0
+
+        monkeypatch.setattr(mongo.os, "getpid", lambda: -1)  # as seen from a forked worker
+        assert mongo.get_client(uri) is not client
+    finally:
+        mongo.close_clients()
+        client.close()
+    assert mongo.get_client("") is None
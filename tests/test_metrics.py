@@ -0,0 +1,61 @@
+"""Offline tests for stage timings and the Prometheus exposition."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["MONGODB_URI"] = ""
+os.environ["EMBED_PROVIDER"] = "local"
+os.environ["AGENT_SESSION_BACKEND"] = "local"
+
+from src import metrics  # noqa: E402
+from src.agent import credit_agent  # noqa: E402
+from src.agent.credit_agent import CreditAgent  # noqa: E402
+from src.memory.long_term import LongTermMemory  # noqa: E402
+from tests.test_agent_loop import _applicant  # noqa: E402
+
+
+def test_render_histograms_counters_and_collectors():
+    metrics.reset()
+    timings = {}
+    with metrics.stage("embed", timings):
+        pass
+    metrics.observe("stage_duration_ms", 30.0, {"stage": "llm"})
+    metrics.inc("embedding_fallbacks_total", {"provider": "voyage"})
+    metrics.inc("embedding_fallbacks_total", {"provider": "voyage"}, 2)
+    metrics.register_collector("pool", lambda: {"clients": 1, "pools": [{"checked_out": 3}], "name": "x"})
+    metrics.register_collector("broken", lambda: 1 / 0)
+
+    text = metrics.render()
+    assert "embed" in timings and timings["embed"] >= 0
+    assert "# TYPE credit_agent_stage_duration_ms histogram" in text
+    assert 'credit_agent_stage_duration_ms_bucket{stage="llm",le="25"} 0' in text
+    assert 'credit_agent_stage_duration_ms_bucket{stage="llm",le="50"} 1' in text
+    assert 'credit_agent_stage_duration_ms_bucket{stage="llm",le="+Inf"} 1' in text
+    assert 'credit_agent_stage_duration_ms_count{stage="embed"} 1' in text
+    assert 'credit_agent_embedding_fallbacks_total{provider="voyage"} 3' in text
+    assert "credit_agent_pool_clients 1" in text
+    assert 'credit_agent_pool_pools_checked_out{index="0"} 3' in text
+    assert "broken" not in text
+    metrics.reset()
+
+
+def test_evaluate_reports_stage_timings(monkeypatch):
+    metrics.reset()
+    monkeypatch.setenv("RATIONALE_CACHE", "off")
+    monkeypatch.setattr(credit_agent, "_llm_rationale", lambda *a: "### Summary\nLLM text.")
+    agent = CreditAgent(memory=LongTermMemory(uri=""))
+    agent.meta_timings = True
+
+    timings = {"screening": 0.5}
+    result = agent.evaluate(_applicant(), timings=timings)
+    stages = result["meta"]["timings_ms"]
+    assert set(stages) == {"screening", "embed", "similar_decisions", "similar_policies", "llm", "store"}
+    assert all(v >= 0 for v in stages.values())
+
+    agent.meta_timings = False
+    assert "timings_ms" not in agent.evaluate(_applicant(ssn="T-0002"))["meta"]
+    text = metrics.render()
+    assert 'credit_agent_stage_duration_ms_count{stage="llm"} 2' in text
+    assert 'credit_agent_rationales_total{source="bedrock-llm"} 2' in text
+    metrics.reset()
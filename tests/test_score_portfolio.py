@@ -0,0 +1,86 @@
+"""Offline portfolio scoring CLI (scripts/score_portfolio.py)."""
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.score_portfolio import OUTPUT_HEADER, score_portfolio  # noqa: E402
+from src.agent.credit_agent import compute_features  # noqa: E402
+
+# generate_credit_data.py spelling: lowercase features, uppercase metadata, any order
+HEADER = ["outstanding_debt", "ENTITY_ID", "num_credit_card", "credit_utilization_ratio",
+          "num_of_delayed_payment", "delay_from_due_date", "occupation"]
+
+
+def _portfolio(path, rows=7):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            writer.writerow([1000 * i, f"E{i}", i % 5, 10 + 7 * i, i, 3 * i, "Engineer"])
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _read(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_columns_are_mapped_and_chunks_written_in_input_order(tmp_path):
+    src, out = str(tmp_path / "portfolio.csv"), str(tmp_path / "scores.csv")
+    applicants = _portfolio(src)
+    result = score_portfolio(src, out, chunk_size=2, workers=2)
+    assert result["rows"] == result["total_rows"] == 7
+    assert not os.path.exists(out + ".ckpt")
+
+    rows = _read(out)
+    assert rows[0] == OUTPUT_HEADER
+    assert [r[0] for r in rows[1:]] == [str(i) for i in range(7)]
+    for row, applicant in zip(rows[1:], applicants):
+        expected = compute_features({
+            "Num_of_Delayed_Payment": applicant["num_of_delayed_payment"],
+            "Delay_from_due_date": applicant["delay_from_due_date"],
+            "Credit_Utilization_Ratio": applicant["credit_utilization_ratio"],
+            "Outstanding_Debt": applicant["outstanding_debt"],
+            "Num_Credit_Card": applicant["num_credit_card"],
+        })
+        assert row[1] == applicant["ENTITY_ID"]
+        assert int(row[2]) == expected["credit_score"]
+        assert int(row[4]) == expected["repayment"] and row[-1] == ""
+
+
+def test_resume_truncates_torn_tail_and_continues(tmp_path):
+    src, out = str(tmp_path / "portfolio.csv"), str(tmp_path / "scores.csv")
+    _portfolio(src)
+    score_portfolio(src, out, chunk_size=2, workers=1)
+    with open(out, "rb") as f:
+        complete = f.read()
+
+    # crash after two chunks (header + rows 0-3 durable) midway through the third
+    lines = complete.split(b"\r\n")
+    durable = len(b"\r\n".join(lines[:5])) + 2
+    with open(out, "wb") as f:
+        f.write(complete[:durable] + b"4,E4,55")
+    with open(out + ".ckpt", "w") as f:
+        json.dump({"input": os.path.abspath(src), "chunk_size": 2,
+                   "chunks_done": 2, "rows_done": 4, "output_bytes": durable}, f)
+
+    result = score_portfolio(src, out, chunk_size=2, workers=1, resume=True)
+    assert result["rows"] == 3 and result["total_rows"] == 7
+    with open(out, "rb") as f:
+        assert f.read() == complete
+    assert not os.path.exists(out + ".ckpt")
+
+
+def test_header_only_and_empty_inputs_write_just_the_header(tmp_path):
+    src, out = str(tmp_path / "portfolio.csv"), str(tmp_path / "scores.csv")
+    _portfolio(src, rows=0)
+    assert score_portfolio(src, out, workers=1)["total_rows"] == 0
+    assert _read(out) == [OUTPUT_HEADER]
+
+    open(src, "w").close()
+    assert score_portfolio(src, out, workers=1)["total_rows"] == 0
+    assert _read(out) == [OUTPUT_HEADER]
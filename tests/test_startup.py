@@ -0,0 +1,31 @@
+"""Importing the API must not build the heavy components (they are lazy)."""
+import os
+import subprocess
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_api_defers_heavy_initialisation():
+    code = (
+        "import sys, backend.main\n"
+        "from src.recommendations.service import recommendations_ready\n"
+        "from src.llm.service import llm_ready\n"
+        "import src.agent.credit_agent as agent\n"
+        "print(sorted(m for m in ('sklearn', 'langchain_aws') if m in sys.modules),"
+        " recommendations_ready(), llm_ready(), agent._DEFAULT is None)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "[] False False True"
+
+
+def test_spooled_explanations_are_resumed_at_startup(tmp_path):
+    code = (
+        "import backend.main as api\n"
+        "print(sorted(api._WARMUP_STEPS), api._WARMUP_STEPS.get('explanations') is api._warm_explanations)\n"
+    )
+    env = dict(os.environ, EXPLAIN_SPOOL_PATH=str(tmp_path / "jobs.sqlite"))
+    out = subprocess.run([sys.executable, "-c", code], cwd=_ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == (
+        "['agent', 'embeddings', 'explanations', 'llm', 'recommendations'] True")
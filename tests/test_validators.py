@@ -0,0 +1,68 @@
+"""Compiled screening rules: same outcomes as evaluating each condition afresh,
+one form at a time or a whole batch column-wise."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from backend.bulk_screening import evaluate_rules_batch, screen_batch  # noqa: E402
+from backend.validators import CompiledRuleset, evaluate_rules, load_ruleset  # noqa: E402
+from scripts.bench_rules import SAMPLE, legacy_evaluate, payloads  # noqa: E402
+
+
+def test_compiled_rules_match_the_interpreted_outcomes():
+    for form in payloads(500, seed=3):
+        assert evaluate_rules(dict(form)) == legacy_evaluate(dict(form)), form
+    assert evaluate_rules(dict(SAMPLE)) == {"status": "ok", "flags": []}
+    assert evaluate_rules(dict(SAMPLE, ssn="bad"))["rule"] == "SSN/ID Format Validation"
+
+
+def test_ruleset_compiles_once_and_skips_rules_without_inputs():
+    ruleset = load_ruleset()
+    assert load_ruleset() is ruleset
+    income = next(r for r in ruleset.rules if r.name == "Income Threshold")
+    assert income.inputs == ("income", "is_student_or_dependent")
+    ssn = next(r for r in ruleset.rules if r.name == "SSN/ID Format Validation")
+    assert ssn.inputs == ("ssn",) and ssn.when_absent is True  # a missing SSN still rejects
+    assert income.when_absent is False  # None < 12000 raises: never fires without inputs
+
+    broken = CompiledRuleset([{"rules": [{"name": "bad", "condition": "income <", "action": "reject"},
+                                         {"name": "low", "condition": "income < 10", "action": "flag"}]}])
+    assert [r.name for r in broken.rules] == ["low"]
+    assert broken.evaluate({"Income": 5})["flags"][0]["rule"] == "low"
+
+
+def test_batch_screening_matches_per_form_outcomes():
+    forms = payloads(1000, seed=5) + [
+        {"age": float("nan")}, {"Age": 5, "age": 30}, {"age": 30, "Age": 5},
+        {"ssn": 123456789}, {"zip_code": "1", "high_risk_zip_codes": "12"},
+        {"zip_code": [1], "high_risk_zip_codes": [[1]]}, {"income": complex(1)},
+        {"age": np.int64(16)}, {"matches_regex": lambda value, pattern: True, "ssn": "x"},
+    ]
+    assert evaluate_rules_batch(forms) == [evaluate_rules(dict(f)) for f in forms]
+    assert screen_batch(forms)["per_row_rules"] == []
+
+    columns = {"age": np.array([16, 30, 40]), "income": [5000, None, "x"],
+               "ssn": ("123-45-6789", "bad", "123-45-6789"), "missing_fields": [[], [], []]}
+    rows = [{k: v[i] for k, v in columns.items()} for i in range(3)]
+    screened = screen_batch(columns)
+    assert list(screened["status"]) == ["reject", "reject", "ok"]
+    assert screened["rule"][0] == "Minimum Age Check" and screened["rule"][2] is None
+    assert evaluate_rules_batch(columns) == [evaluate_rules(r) for r in rows]
+
+
+def test_batch_screening_evaluates_unsupported_rules_per_row():
+    ruleset = CompiledRuleset([{"rules": [
+        {"name": "band", "condition": "18 <= age < 25", "action": "flag"},
+        {"name": "ratio", "condition": "debt / income > 0.5", "action": "reject"},
+        {"name": "low", "condition": "income < 1000", "action": "flag"},
+    ]}])
+    forms = [{"age": 20, "debt": 80, "income": 100}, {"age": 20, "debt": 1, "income": 500},
+             {"age": 40, "income": 0}, {"debt": 1}]
+    screened = screen_batch(forms, ruleset)
+    assert screened["per_row_rules"] == ["band", "ratio"]
+    assert evaluate_rules_batch(forms, ruleset) == [ruleset.evaluate(f) for f in forms]
+    assert list(screened["status"]) == ["reject", "ok", "ok", "ok"]
+    assert screened["flags"][1] == ("band", "low") and screened["flags"][2] == ("low",)
@@ -0,0 +1,177 @@
+"""Offline tests for the in-process vector index behind long-term memory."""
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from src.memory.embeddings import cosine_similarity  # noqa: E402
+from src.memory.vector_index import VectorIndex  # noqa: E402
+
+
+def _docs(n, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{"_id": f"d{i}", "embedding": rng.normal(size=dim).tolist()} for i in range(n)]
+
+
+def _query():
+    return _docs(1)[0]["embedding"]
+
+
+def test_search_matches_exact_cosine_ranking():
+    docs = _docs(200)
+    index = VectorIndex.from_docs(docs)
+    query = docs[17]["embedding"]
+    expected = sorted(range(len(docs)),
+                      key=lambda i: cosine_similarity(query, docs[i]["embedding"]), reverse=True)[:5]
+    hits = index.search(query, 5)
+    assert [pos for pos, _ in hits] == expected
+    assert hits[0][0] == 17 and abs(hits[0][1] - 1.0) < 1e-5
+
+
+def test_behaves_like_a_list_and_skips_docs_without_embeddings():
+    index = VectorIndex(capacity=2)
+    index.append({"_id": "no-vec"})
+    for d in _docs(5):
+        index.append(d)
+    assert len(index) == 6
+    assert "embedding" not in index[1]
+    assert [d["_id"] for d in index][:2] == ["no-vec", "d0"]
+    positions = [pos for pos, _ in index.search(_query(), k=10)]
+    assert 0 not in positions and len(positions) == 5
+
+
+def test_mask_restricts_candidates():
+    index = VectorIndex.from_docs(_docs(50))
+    mask = np.zeros(50, dtype=bool)
+    mask[[3, 9]] = True
+    assert {pos for pos, _ in index.search(_query(), k=5, mask=mask)} == {3, 9}
+
+
+def test_ivf_recall_and_incremental_inserts():
+    from src.memory.ann import IVFIndex
+
+    rng = np.random.default_rng(3)
+    centres = rng.normal(size=(20, 32))
+    data = centres[rng.integers(0, 20, 3000)] + 0.3 * rng.normal(size=(3000, 32))
+    index = IVFIndex(nprobe=8, min_train_size=2000)
+    index.extend_matrix(data)
+    assert index.trained
+
+    hits = 0
+    for q in data[:20]:
+        exact = {pos for pos, _ in VectorIndex.search(index, q, 5)}
+        hits += len(exact & {pos for pos, _ in index.search(q, 5)})
+    assert hits / 100 >= 0.9
+
+    new = rng.normal(size=32)
+    pos = index.append({"_id": "fresh", "embedding": new.tolist()})
+    assert index.search(new, 1)[0][0] == pos
+
+
+def test_persistent_store_survives_restart_and_ignores_torn_tail(tmp_path, monkeypatch):
+    from src.memory.long_term import LongTermMemory
+    from src.memory.persistence import PersistentVectorIndex
+
+    monkeypatch.setenv("MEMORY_STORE_PATH", str(tmp_path))
+    mem = LongTermMemory(uri="")
+    emb = _docs(1, dim=16)[0]["embedding"]
+    decision_id = mem.store_decision({"applicant_id": "P-1", "band": "Approve"}, embedding=emb)
+    mem._mem.decisions.close()
+
+    # Simulate a crash mid-append: bytes written after the last commit.
+    with open(tmp_path / "decisions.jsonl", "ab") as f:
+        f.write(b'{"applicant_id": "torn"')
+
+    reopened = LongTermMemory(uri="")
+    hits = reopened.similar_decisions(emb, k=3)
+    assert [h["applicant_id"] for h in hits] == ["P-1"]
+    assert hits[0]["_id"] == decision_id
+    assert reopened.update_decision(decision_id, {"summary": "late rationale"})  # id map rebuilt at open
+    assert reopened._mem.decisions[0]["summary"] == "late rationale"
+    reopened.store_decision({"applicant_id": "P-2"}, embedding=emb)
+    assert [d["applicant_id"] for d in reopened._mem.decisions] == ["P-1", "P-2"]
+
+    index = PersistentVectorIndex(str(tmp_path / "plain"))
+    index.append({"_id": "x", "embedding": emb})
+    index.close()
+    assert len(PersistentVectorIndex(str(tmp_path / "plain"))) == 1
+
+
+def test_group_commit_batches_fsyncs_and_filters_load_at_open(tmp_path, monkeypatch):
+    from src.memory import persistence
+    from src.memory.persistence import PersistentVectorIndex
+
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(persistence.os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    monkeypatch.setenv("MEMORY_STORE_SYNC_MS", "60000")  # only explicit syncs below
+    docs = [dict(d, band="Approve" if i % 2 else "Decline", applicant_id=f"A{i}")
+            for i, d in enumerate(_docs(50))]
+    index = PersistentVectorIndex(str(tmp_path / "batch"))
+    index.append(docs[0])  # first row also records the dimension (one fsync)
+    fsyncs.clear()
+    for doc in docs[1:40]:
+        index.append(doc)
+    assert fsyncs == [] and len(index) == 40  # visible, not yet durable
+    index.sync()
+    assert len(fsyncs) == 3  # jsonl + idx, then the header, once for all 40
+    for doc in docs[40:]:
+        index.append(doc)
+    # "Crash": the files as they are now, without close; the unsynced tail is dropped.
+    (tmp_path / "crash").mkdir()
+    for suffix in (".vec", ".jsonl", ".idx"):
+        shutil.copy(tmp_path / f"batch{suffix}", tmp_path / "crash" / f"batch{suffix}")
+    assert len(PersistentVectorIndex(str(tmp_path / "crash" / "batch"))) == 40
+    index.close()
+
+    reopened = PersistentVectorIndex(str(tmp_path / "batch"))
+    assert len(reopened) == 50
+    assert reopened._filters._synced[("in", "applicant_id")] == 50  # no lazy parse on first query
+    mask = reopened.filter_mask([("in", "band", ["Approve"]), ("nin", "applicant_id", ["A1"])])
+    assert list(np.flatnonzero(mask)) == list(range(3, 50, 2))
+
+    monkeypatch.setenv("MEMORY_STORE_SYNC", "always")
+    strict = PersistentVectorIndex(str(tmp_path / "strict"))
+    strict.append(docs[0])
+    fsyncs.clear()
+    strict.append(docs[1])
+    assert len(fsyncs) == 3
+
+
+def test_reduced_precision_storage_keeps_ranking_and_shrinks_memory(tmp_path):
+    from src.memory.persistence import PersistentVectorIndex
+
+    rng = np.random.default_rng(5)
+    centres = rng.normal(size=(10, 64))
+    data = centres[rng.integers(0, 10, 2000)] + 0.3 * rng.normal(size=(2000, 64))
+    exact = VectorIndex()
+    exact.extend_matrix(data)
+    truth = [{pos for pos, _ in exact.search(q, 5)} for q in data[:20]]
+
+    for precision, floor in (("float16", 0.95), ("int8", 0.9), ("binary", 0.8)):
+        index = VectorIndex(precision=precision, rescore_factor=20)
+        index.extend_matrix(data)
+        hits = sum(len(t & {pos for pos, _ in index.search(q, 5)}) for t, q in zip(truth, data[:20]))
+        assert hits / 100 >= floor, precision
+        if precision != "binary":
+            assert index.memory_bytes() < exact.memory_bytes() / 1.9
+
+    stored = PersistentVectorIndex(str(tmp_path / "bin"), precision="binary")
+    stored.extend_matrix(data[:50])
+    stored.close()
+    reopened = PersistentVectorIndex(str(tmp_path / "bin"), precision="binary")
+    assert reopened.search(data[7], 1)[0][0] == 7
+
+
+def test_search_many_matches_per_query_search():
+    docs = _docs(300)
+    index = VectorIndex.from_docs(docs)
+    queries = [d["embedding"] for d in docs[:10]]
+    masks = [None if i % 2 else np.arange(300) % 3 == 0 for i in range(10)]
+    for batched, q, m in zip(index.search_many(queries, 4, masks=masks), queries, masks):
+        single = index.search(q, 4, mask=m)
+        assert [pos for pos, _ in batched] == [pos for pos, _ in single]
+        assert np.allclose([s for _, s in batched], [s for _, s in single], atol=1e-5)
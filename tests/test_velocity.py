@@ -0,0 +1,61 @@
+"""Sliding-window velocity counters behind submission_count_24h."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import velocity  # noqa: E402
+from backend.validators import evaluate_rules  # noqa: E402
+from backend.velocity import SQLiteVelocityStore, VelocityStore  # noqa: E402
+from scripts.bench_rules import SAMPLE  # noqa: E402
+
+HOUR = 3600
+
+
+def _window(store, t0):
+    """Hits at t0, t0+1h and t0+23h; counts at t0+23h, +24h30m and +48h."""
+    assert store.hit("ssn", "123-45-6789", now=t0) == 1
+    assert store.hit("ssn", "123-45-6789", now=t0 + HOUR) == 2
+    assert store.hit_many({"ssn": "123-45-6789", "ip": "10.0.0.1"}, now=t0 + 23 * HOUR) == {"ssn": 3, "ip": 1}
+    assert store.count("ssn", "123-45-6789", now=t0 + 24 * HOUR + HOUR // 2) == 2  # first bucket left
+    assert store.count("ssn", "123-45-6789", now=t0 + 48 * HOUR) == 0
+    # the slot of t0 is reused a day later and restarts from zero
+    assert store.hit("ssn", "123-45-6789", now=t0 + 24 * HOUR) == 3
+    assert store.count("ip", "10.0.0.2", now=t0) == 0
+
+
+def test_memory_ring_buckets_slide_and_keys_are_bounded():
+    t0 = 1_700_000_000 - 1_700_000_000 % HOUR
+    _window(VelocityStore(window_s=24 * HOUR, buckets=24), t0)
+
+    small = VelocityStore(max_keys=2)
+    for ssn in ("a", "b", "c"):
+        small.hit("ssn", ssn, now=t0)
+    small.hit("ssn", "b", now=t0)
+    assert small.stats() == {"hits": 4, "evicted": 1, "keys": 2}
+    assert small.count("ssn", "a", now=t0) == 0 and small.count("ssn", "b", now=t0) == 2
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    t0 = 1_700_000_000 - 1_700_000_000 % HOUR
+    path = str(tmp_path / "velocity.sqlite")
+    _window(SQLiteVelocityStore(path), t0)
+    other = SQLiteVelocityStore(path)  # a second worker process on the same file
+    assert other.hit("ssn", "123-45-6789", now=t0 + 24 * HOUR) == 4
+    assert other.stats()["keys"] == 2
+    assert "123-45-6789" not in open(path, "rb").read().decode("latin-1")
+
+
+def test_second_submission_trips_the_repeated_submissions_rule(monkeypatch):
+    monkeypatch.setenv("VELOCITY", "memory")
+    monkeypatch.setattr(velocity, "_DEFAULT", None)
+    first = velocity.submission_counts(ssn="123-45-6789", ip="10.0.0.1")
+    assert first == {"submission_count_24h": 1, "ip_submission_count_24h": 1}
+    assert evaluate_rules(dict(SAMPLE, **first)) == {"status": "ok", "flags": []}
+    second = velocity.submission_counts(ssn="123-45-6789", ip="10.0.0.2", device="d-1")
+    assert second == {"submission_count_24h": 2, "ip_submission_count_24h": 1, "device_submission_count_24h": 1}
+    flags = evaluate_rules(dict(SAMPLE, **second))["flags"]
+    assert [f["rule"] for f in flags] == ["Repeated Submissions"]
+
+    monkeypatch.setenv("VELOCITY", "off")
+    assert velocity.submission_counts(ssn="123-45-6789") == {}